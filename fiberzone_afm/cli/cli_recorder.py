@@ -0,0 +1,127 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from cloudshell.cli.cli_service import CliService
+
+
+class CliRecorder(object):
+    """
+    Write every CLI command, its output and timing to a corpus file, one JSON record per line.
+    The first line is a header with the corpus format version.
+    """
+    CORPUS_FORMAT = 'fiberzone_afm-cli-corpus'
+    CORPUS_VERSION = 1
+
+    def __init__(self, corpus_path, logger):
+        """
+        :param corpus_path: corpus file path
+        :type corpus_path: str
+        :type logger: logging.Logger
+        """
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._start_time = time.time()
+        self._last_command_end = {}
+        self._sessions_lock = threading.Lock()
+        corpus_dir = os.path.dirname(corpus_path)
+        if corpus_dir and not os.path.isdir(corpus_dir):
+            os.makedirs(corpus_dir)
+        self._descriptor = open(corpus_path, 'w')
+        self._write({'format': self.CORPUS_FORMAT, 'version': self.CORPUS_VERSION,
+                     'created': datetime.now().isoformat(), 'pid': os.getpid()})
+        self._logger.info('Recording CLI commands to {}'.format(corpus_path))
+
+    def _write(self, record):
+        with self._lock:
+            self._descriptor.write(json.dumps(record) + '\n')
+            self._descriptor.flush()
+
+    def record(self, session_id, command, start_time, end_time, output=None, error=None):
+        """
+        Record one command
+        :param session_id: id of the CLI session, settle time is measured between commands of one session
+        :param command: command sent
+        :param start_time: time the command was sent
+        :param end_time: time the output was received
+        :param output: command output
+        :param error: error message if the command raised an exception
+        """
+        with self._sessions_lock:
+            previous_end = self._last_command_end.get(session_id)
+            self._last_command_end[session_id] = end_time
+        self._write({'command': command, 'output': output, 'error': error,
+                     'offset': round(start_time - self._start_time, 6),
+                     'response_time': round(end_time - start_time, 6),
+                     'settle_time': round(start_time - previous_end, 6) if previous_end is not None else None,
+                     'session': session_id,
+                     'thread': threading.current_thread().name})
+
+    def close_session(self, session_id):
+        """
+        Forget the session closed or removed from the pool
+        :param session_id: id of the CLI session
+        """
+        with self._sessions_lock:
+            self._last_command_end.pop(session_id, None)
+
+
+class RecordingCliService(CliService):
+    """
+    Cli service wrapper which records every send_command
+    """
+
+    def __init__(self, cli_service, recorder, logger):
+        super(RecordingCliService, self).__init__(getattr(cli_service, 'session', None), logger)
+        self._cli_service = cli_service
+        self._recorder = recorder
+        self.session_id = id(self.session or cli_service)
+
+    def send_command(self, command, expected_string=None, action_map=None, error_map=None, logger=None, *args,
+                     **kwargs):
+        start_time = time.time()
+        try:
+            output = self._cli_service.send_command(command, expected_string, action_map, error_map, logger, *args,
+                                                    **kwargs)
+        except Exception as e:
+            self._recorder.record(self.session_id, command, start_time, time.time(), error=str(e))
+            raise
+        self._recorder.record(self.session_id, command, start_time, time.time(), output=output)
+        return output
+
+    def enter_mode(self, command_mode):
+        return self._cli_service.enter_mode(command_mode)
+
+    def reconnect(self, timeout=None):
+        return self._cli_service.reconnect(timeout)
+
+
+class RecordingSessionContextManager(object):
+    """
+    Session pool context manager wrapper, returns recording cli service. Sessions dropped from the pool on errors
+    or disconnects are forgotten by the recorder.
+    """
+
+    def __init__(self, session_context_manager, recorder, logger):
+        self._session_context_manager = session_context_manager
+        self._recorder = recorder
+        self._logger = logger
+        self._cli_service = None
+
+    def __enter__(self):
+        self._cli_service = RecordingCliService(self._session_context_manager.__enter__(), self._recorder,
+                                                self._logger)
+        return self._cli_service
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            return self._session_context_manager.__exit__(exc_type, exc_val, exc_tb)
+        finally:
+            session = self._cli_service.session
+            if exc_type or session and not session.active():
+                self._recorder.close_session(self._cli_service.session_id)
@@ -1,6 +1,7 @@
 from collections import OrderedDict
 
 from cloudshell.cli.session.telnet_session import TelnetSession
+from fiberzone_afm.helpers.tracer import TRACER
 
 
 class FiberzoneTelnetSession(TelnetSession):
@@ -10,6 +11,7 @@ class FiberzoneTelnetSession(TelnetSession):
                                                                                                   logger)
         action_map['[Pp]assword:'] = lambda session, logger: session.send_line(session.password, logger)
         error_map = OrderedDict([(r'[Ii]nvalid', 'Username or Password invalid')])
-        self.hardware_expect(None, expected_string=prompt, timeout=self._timeout, logger=logger,
-                             action_map=action_map, error_map=error_map)
-        self._on_session_start(logger)
+        with TRACER.span('login', 'session', host=self.host):
+            self.hardware_expect(None, expected_string=prompt, timeout=self._timeout, logger=logger,
+                                 action_map=action_map, error_map=error_map)
+            self._on_session_start(logger)
@@ -1,37 +1,66 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-from cloudshell.cli.cli import CLI
+import os
+from datetime import datetime
+
 from cloudshell.cli.session.ssh_session import SSHSession
-from cloudshell.cli.session_pool_manager import SessionPoolManager
 from cloudshell.layer_one.core.helper.runtime_configuration import RuntimeConfiguration
 from cloudshell.layer_one.core.layer_one_driver_exception import LayerOneDriverException
+from fiberzone_afm.cli.cli_recorder import CliRecorder, RecordingSessionContextManager
 from fiberzone_afm.cli.fiberzone_telnet_session import FiberzoneTelnetSession
+from fiberzone_afm.cli.session_registry import SessionRegistry, HostSessionContextManager
+from fiberzone_afm.cli.session_start_profile import SessionStartProfile
+from fiberzone_afm.cli.transport_selector import TransportSelector, TransportSessionContextManager
+from fiberzone_afm.helpers.tracer import trace_session
 
 
 class L1CliHandler(object):
     def __init__(self, logger):
         self._logger = logger
-        self._cli = CLI(session_pool=SessionPoolManager(max_pool_size=1))
+        self._session_registry = SessionRegistry(
+            int(RuntimeConfiguration().read_key('CLI.SESSION_POOL_SIZE', 1)),
+            int(RuntimeConfiguration().read_key('CLI.SESSION_REGISTRY.MAX_HOSTS', 16)),
+            float(RuntimeConfiguration().read_key('CLI.SESSION_REGISTRY.IDLE_TTL', 600)), logger,
+            self._session_closed)
         self._defined_session_types = {'SSH': SSHSession, 'TELNET': FiberzoneTelnetSession}
 
         self._session_types = RuntimeConfiguration().read_key(
             'CLI.TYPE') or self._defined_session_types.keys()
         self._ports = RuntimeConfiguration().read_key('CLI.PORTS')
+        self._transport_selector = TransportSelector(logger)
+
+        self._cli_recorder = None
+        if RuntimeConfiguration().read_key('CLI.RECORD.ENABLED', False):
+            corpus_path = RuntimeConfiguration().read_key('CLI.RECORD.PATH') or os.path.join(
+                os.environ.get('LOG_PATH', 'Logs'), 'fiberzone_afm', 'cli_corpus',
+                'corpus--{}.jsonl'.format(datetime.now().strftime('%d-%b-%Y--%H-%M-%S')))
+            self._cli_recorder = CliRecorder(corpus_path, logger)
+
+        self._session_start_profile = None
+        if RuntimeConfiguration().read_key('CLI.SESSION_START.ENABLED', False):
+            self._session_start_profile = SessionStartProfile(
+                RuntimeConfiguration().read_key('CLI.SESSION_START.SETTINGS', []), logger)
 
         self._host = None
         self._username = None
         self._password = None
 
+    def _session_closed(self, session):
+        if self._cli_recorder:
+            self._cli_recorder.close_session(id(session))
+
     def _new_sessions(self):
         sessions = []
-        for session_type in self._session_types:
+        for session_type in self._transport_selector.order_session_types(self._host, self._session_types,
+                                                                         self._ports):
             session_class = self._defined_session_types.get(session_type)
             if not session_class:
                 raise LayerOneDriverException(self.__class__.__name__,
                                               'Session type {} is not defined'.format(session_type))
             port = self._ports.get(session_type)
-            sessions.append(session_class(self._host, self._username, self._password, port))
+            sessions.append(session_class(self._host, self._username, self._password, port,
+                                          on_session_start=self._session_start_profile))
         return sessions
 
     def define_session_attributes(self, address, username, password):
@@ -60,4 +89,19 @@ class L1CliHandler(object):
         if not self._host or not self._username or not self._password:
             raise LayerOneDriverException(self.__class__.__name__,
                                           "Cli Attributes is not defined, call Login command first")
-        return self._cli.get_session(self._new_sessions(), command_mode, self._logger)
+        host_pool = self._session_registry.get_host_pool(self._host, self._username, self._password)
+        session_context = HostSessionContextManager(host_pool, TransportSessionContextManager(
+            self._transport_selector, self._host, self._session_types, self._ports,
+            lambda: host_pool.get_session(self._new_sessions(), command_mode, self._logger), self._logger),
+            self._logger)
+        if self._cli_recorder:
+            session_context = RecordingSessionContextManager(session_context, self._cli_recorder, self._logger)
+        return trace_session(session_context, self._logger)
+
+    def session_stats(self):
+        """
+        Session pool statistics per host
+        :return: '<username>@<address>' to stats dict
+        :rtype: dict
+        """
+        return self._session_registry.stats()
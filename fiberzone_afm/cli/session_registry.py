@@ -0,0 +1,217 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+from Queue import Queue, Empty
+
+from cloudshell.cli.cli import CLI
+from cloudshell.cli.session_manager_impl import SessionManagerImpl
+from cloudshell.cli.session_pool_manager import SessionPoolManager
+
+
+class CountingSessionManager(SessionManagerImpl):
+    """
+    Session manager which counts created sessions, every created session is a device login
+    """
+
+    def __init__(self):
+        super(CountingSessionManager, self).__init__()
+        self.created = 0
+
+    def new_session(self, new_sessions, prompt, logger):
+        session = super(CountingSessionManager, self).new_session(new_sessions, prompt, logger)
+        self.created += 1
+        return session
+
+
+class HostSessionPool(object):
+    """
+    CLI with its own bounded session pool for one host and credentials
+    """
+
+    def __init__(self, address, username, max_pool_size, on_session_closed=None):
+        """
+        :param address: chassis address
+        :param username: login username
+        :param max_pool_size: sessions allowed to the host
+        :param on_session_closed: function called with every session disconnected by close
+        """
+        self.address = address
+        self.username = username
+        self._on_session_closed = on_session_closed
+        self._sessions_queue = Queue(max_pool_size)
+        self._session_manager = CountingSessionManager()
+        self.session_pool = SessionPoolManager(session_manager=self._session_manager, max_pool_size=max_pool_size,
+                                               pool=self._sessions_queue)
+        self._cli = CLI(session_pool=self.session_pool)
+        self._lock = threading.Lock()
+        self.closed = False
+        self.in_use = 0
+        self.acquired = 0
+        self.last_used = time.time()
+
+    @property
+    def name(self):
+        return '{0}@{1}'.format(self.username, self.address)
+
+    def get_session(self, new_sessions, command_mode, logger):
+        """
+        Session context of the host pool
+        :rtype: cloudshell.cli.session_pool_context_manager.SessionPoolContextManager
+        """
+        return self._cli.get_session(new_sessions, command_mode, logger)
+
+    def acquire(self):
+        with self._lock:
+            self.in_use += 1
+            self.acquired += 1
+            self.last_used = time.time()
+
+    def release(self):
+        with self._lock:
+            self.in_use -= 1
+            self.last_used = time.time()
+
+    def stats(self):
+        """
+        :rtype: dict
+        """
+        with self._lock:
+            return {'acquired': self.acquired, 'created': self._session_manager.created,
+                    'reused': self.acquired - self._session_manager.created,
+                    'open': self._session_manager.existing_sessions_count(), 'idle': self._sessions_queue.qsize(),
+                    'in_use': self.in_use, 'idle_time': round(time.time() - self.last_used, 1)}
+
+    def close(self, logger):
+        """
+        Disconnect sessions waiting in the pool, sessions returned to the closed pool are disconnected by
+        HostSessionContextManager
+        """
+        self.closed = True
+        while True:
+            try:
+                session = self._sessions_queue.get(False)
+            except Empty:
+                break
+            try:
+                session.disconnect()
+            except Exception:
+                logger.exception('Cannot disconnect session of {}'.format(self.name))
+            self.session_pool.remove_session(session, logger)
+            if self._on_session_closed:
+                self._on_session_closed(session)
+
+
+class HostSessionContextManager(object):
+    """
+    Session pool context manager wrapper, releases the host pool acquired by SessionRegistry.get_host_pool when the
+    session is done and disconnects the session if the pool was closed meanwhile
+    """
+
+    def __init__(self, host_session_pool, session_context_manager, logger):
+        """
+        :param host_session_pool: host pool already acquired for this session
+        :type host_session_pool: HostSessionPool
+        :type logger: logging.Logger
+        """
+        self._host_session_pool = host_session_pool
+        self._session_context_manager = session_context_manager
+        self._logger = logger
+
+    def __enter__(self):
+        try:
+            return self._session_context_manager.__enter__()
+        except:
+            self._release()
+            raise
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            return self._session_context_manager.__exit__(exc_type, exc_val, exc_tb)
+        finally:
+            self._release()
+
+    def _release(self):
+        self._host_session_pool.release()
+        if self._host_session_pool.closed:
+            self._host_session_pool.close(self._logger)
+
+
+class SessionRegistry(object):
+    """
+    Session pools keyed by host and credentials, so a driver serving several chassis keeps warm sessions of every
+    chassis instead of replacing them on every Login. Pools idle longer than the idle TTL are closed, above
+    the hosts limit the least recently used idle pools are closed.
+    """
+
+    def __init__(self, max_pool_size, max_hosts, idle_ttl, logger, on_session_closed=None):
+        """
+        :param max_pool_size: sessions allowed per host
+        :param max_hosts: host pools kept open
+        :param idle_ttl: seconds an unused host pool is kept open
+        :type logger: logging.Logger
+        :param on_session_closed: function called with every session disconnected when a host pool is closed
+        """
+        self._on_session_closed = on_session_closed
+        self._max_pool_size = max_pool_size
+        self._max_hosts = max_hosts
+        self._idle_ttl = idle_ttl
+        self._logger = logger
+        self._host_pools = {}
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get_host_pool(self, address, username, password):
+        """
+        Session pool of the host, created on the first request. The pool is acquired under the registry lock so it
+        cannot be evicted before use, the caller releases it with HostSessionPool.release or HostSessionContextManager
+        :rtype: HostSessionPool
+        """
+        key = (address, username, password)
+        with self._lock:
+            host_pool = self._host_pools.get(key)
+            if not host_pool:
+                host_pool = HostSessionPool(address, username, self._max_pool_size, self._on_session_closed)
+                self._host_pools[key] = host_pool
+                self._logger.debug('Session pool created for {}'.format(host_pool.name))
+            host_pool.acquire()
+            evicted = self._select_evicted(host_pool)
+        for evicted_pool in evicted:
+            self._logger.info('Closing idle sessions of {0}, {1}'.format(evicted_pool.name, evicted_pool.stats()))
+            evicted_pool.close(self._logger)
+        return host_pool
+
+    def _select_evicted(self, current_pool):
+        """
+        Remove expired and least recently used idle pools from the registry
+        :rtype: list[HostSessionPool]
+        """
+        now = time.time()
+        idle_pools = sorted(((key, host_pool) for key, host_pool in self._host_pools.iteritems() if
+                             host_pool is not current_pool and not host_pool.in_use),
+                            key=lambda item: item[1].last_used)
+        over_limit = len(self._host_pools) - self._max_hosts
+        evicted = []
+        for key, host_pool in idle_pools:
+            if over_limit > 0 or now - host_pool.last_used > self._idle_ttl:
+                del self._host_pools[key]
+                evicted.append(host_pool)
+                over_limit -= 1
+        self.evictions += len(evicted)
+        return evicted
+
+    def stats(self):
+        """
+        Statistics per host, '<username>@<address>' to stats dict
+        :rtype: dict
+        """
+        with self._lock:
+            host_pools = self._host_pools.values()
+        return dict((host_pool.name, host_pool.stats()) for host_pool in host_pools)
+
+    def close(self):
+        with self._lock:
+            host_pools, self._host_pools = self._host_pools.values(), {}
+        for host_pool in host_pools:
+            host_pool.close(self._logger)
@@ -0,0 +1,72 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import re
+from collections import OrderedDict
+
+from cloudshell.cli.session.session_exceptions import CommandExecutionException
+from fiberzone_afm.cli.fiberzone_command_modes import DefaultCommandMode
+from fiberzone_afm.helpers.firmware_capabilities import FirmwareCapabilities
+
+
+class SessionStartProfile(object):
+    """
+    Terminal settings sent to every new session right after login, so large outputs such as 'port show'
+    come without paging, wrapping and echo. Every setting is probed once per chassis: the command is sent and,
+    when a verify command is configured, its output has to match the expected pattern. Settings the firmware
+    rejects or ignores are remembered in FirmwareCapabilities and are not sent to later sessions of the chassis.
+    Results are kept per firmware version read on Login, an upgraded chassis is probed again.
+    The default terminal length, width and echo settings are only checked against the simulated terminal, not
+    against a recorded chassis session, so the profile stays disabled unless CLI.SESSION_START.ENABLED is set.
+    """
+    CAPABILITY_PREFIX = 'session start: '
+    ERROR_MAP = OrderedDict([(r'[Ee]rror:|[Uu]nknown [Cc]ommand|[Ii]nvalid', 'Command error')])
+
+    def __init__(self, settings, logger, prompt=DefaultCommandMode.PROMPT):
+        """
+        :param settings: [{'COMMAND': 'terminal length 0', 'VERIFY': 'show terminal', 'EXPECTED': 'Length: 0'}],
+            VERIFY and EXPECTED are optional
+        :type settings: list[dict]
+        :type logger: logging.Logger
+        :param prompt: prompt of the session after login
+        """
+        self._settings = settings or []
+        self._logger = logger
+        self._prompt = prompt
+        self._firmware_capabilities = FirmwareCapabilities(logger)
+
+    def __call__(self, session, logger):
+        """
+        on_session_start callback of the session
+        :type session: cloudshell.cli.session.expect_session.ExpectSession
+        :type logger: logging.Logger
+        """
+        for setting in self._settings:
+            self._apply(session, setting, logger)
+
+    def _send(self, session, command, logger):
+        return session.hardware_expect(command, expected_string=self._prompt, logger=logger,
+                                       error_map=self.ERROR_MAP)
+
+    def _apply(self, session, setting, logger):
+        command = setting['COMMAND']
+        probed = []
+
+        def probe():
+            probed.append(command)
+            try:
+                self._send(session, command, logger)
+                if not setting.get('VERIFY'):
+                    return True
+                output = self._send(session, setting['VERIFY'], logger)
+            except CommandExecutionException as e:
+                logger.warning('Session start command {0} failed: {1}'.format(command, e))
+                return False
+            if not re.search(setting.get('EXPECTED', ''), output):
+                logger.warning('Session start command {} did not take effect'.format(command))
+                return False
+            return True
+
+        if self._firmware_capabilities.is_supported(session.host, self._firmware_capabilities.sw_version(session.host),
+                                                    self.CAPABILITY_PREFIX + command, probe) and not probed:
+            self._send(session, command, logger)
@@ -0,0 +1,238 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import socket
+import threading
+import time
+from Queue import Queue, Empty
+
+from cloudshell.layer_one.core.helper.runtime_configuration import RuntimeConfiguration
+
+
+class TransportRecord(object):
+    def __init__(self, session_type, latency):
+        """
+        :param session_type: winning session type, 'SSH' or 'TELNET'
+        :type session_type: str
+        :param latency: measured TCP handshake latency in seconds
+        :type latency: float
+        """
+        self.session_type = session_type
+        self.latency = latency
+        self.timestamp = time.time()
+
+
+class TransportSelector(object):
+    """
+    Race configured transports (Happy Eyeballs style) and remember the fastest working one per chassis address and
+    configured transports
+    """
+    DEFAULT_PORTS = {'SSH': 22, 'TELNET': 23}
+    STAGGER_DELAY = 0.25
+    CONNECT_TIMEOUT = 5
+    CACHE_TTL = 3600
+
+    _cache = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, logger):
+        self._logger = logger
+        runtime_config = RuntimeConfiguration()
+        self._enabled = runtime_config.read_key('CLI.TRANSPORT_RACE.ENABLED', False)
+        self._stagger_delay = float(runtime_config.read_key('CLI.TRANSPORT_RACE.STAGGER_DELAY', self.STAGGER_DELAY))
+        self._connect_timeout = float(runtime_config.read_key('CLI.TRANSPORT_RACE.TIMEOUT', self.CONNECT_TIMEOUT))
+        self._cache_ttl = float(runtime_config.read_key('CLI.TRANSPORT_RACE.CACHE_TTL', self.CACHE_TTL))
+
+    @classmethod
+    def reset(cls):
+        """
+        Forget race winners of all hosts
+        """
+        with cls._cache_lock:
+            cls._cache.clear()
+
+    def _candidates(self, session_types, ports):
+        """
+        :return: ((session_type, port), ...)
+        :rtype: tuple
+        """
+        return tuple((session_type, (ports or {}).get(session_type) or self.DEFAULT_PORTS.get(session_type)) for
+                     session_type in session_types)
+
+    def order_session_types(self, host, session_types, ports):
+        """
+        Order session types, the fastest working transport for the host goes first
+        :param host: chassis address
+        :type host: str
+        :param session_types: configured session types, ['SSH', 'TELNET']
+        :type session_types: list
+        :param ports: configured ports, {'SSH': 22, 'TELNET': 23}
+        :type ports: dict
+        :return: ordered session types
+        :rtype: list
+        """
+        session_types = list(session_types)
+        if not self._enabled or len(session_types) < 2 or not host:
+            return session_types
+
+        record = self.get_record(host, session_types, ports)
+        if not record:
+            record = self._race(host, self._candidates(session_types, ports))
+        if not record:
+            return session_types
+
+        session_types.remove(record.session_type)
+        return [record.session_type] + session_types
+
+    def get_record(self, host, session_types, ports):
+        """
+        Cached race winner for the host and transports
+        :param host: chassis address
+        :param session_types: configured session types, ['SSH', 'TELNET']
+        :param ports: configured ports, {'SSH': 22, 'TELNET': 23}
+        :return:
+        :rtype: TransportRecord
+        """
+        key = (host, self._candidates(session_types, ports))
+        with self._cache_lock:
+            record = self._cache.get(key)
+            if record and time.time() - record.timestamp > self._cache_ttl:
+                del self._cache[key]
+                record = None
+            return record
+
+    def invalidate(self, host):
+        """
+        Forget race winners for the host, whatever transports were raced
+        :param host:
+        :return:
+        """
+        with self._cache_lock:
+            for key in [key for key in self._cache if key[0] == host]:
+                del self._cache[key]
+
+    def _attempt(self, host, session_type, port, results):
+        start_time = time.time()
+        try:
+            connection = socket.create_connection((host, int(port)), self._connect_timeout)
+            latency = time.time() - start_time
+            connection.close()
+            results.put((session_type, latency, None))
+        except Exception as e:
+            results.put((session_type, None, e))
+
+    def _race(self, host, candidates):
+        """
+        Start TCP handshakes staggered by STAGGER_DELAY, the first one completed wins
+        :param host:
+        :param candidates: ((session_type, port), ...)
+        :type candidates: tuple
+        :return: winner record, None if all transports failed
+        :rtype: TransportRecord
+        """
+        self._logger.debug('Racing transports {0} for host {1}'.format(
+            ', '.join('{0}:{1}'.format(session_type, port) for session_type, port in candidates), host))
+        results = Queue()
+        pending = 0
+        deadline = None
+        for session_type, port in candidates:
+            thread = threading.Thread(target=self._attempt, args=(host, session_type, port, results))
+            thread.daemon = True
+            thread.start()
+            pending += 1
+            deadline = time.time() + self._connect_timeout
+            record, failed = self._wait_result(results, self._stagger_delay)
+            pending -= failed
+            if record:
+                return self._store(host, candidates, record)
+
+        while pending > 0:
+            timeout = deadline - time.time()
+            if timeout <= 0:
+                break
+            record, failed = self._wait_result(results, timeout)
+            pending -= failed
+            if record:
+                return self._store(host, candidates, record)
+
+        self._logger.debug('All transports failed for host {}'.format(host))
+        return None
+
+    def _wait_result(self, results, timeout):
+        """
+        Wait for the first successful handshake, failed attempts are counted and skipped
+        :return: (winner record or None, count of failed attempts)
+        :rtype: tuple
+        """
+        failed = 0
+        end_time = time.time() + timeout
+        while True:
+            remaining = end_time - time.time()
+            if remaining <= 0:
+                return None, failed
+            try:
+                session_type, latency, error = results.get(timeout=remaining)
+            except Empty:
+                return None, failed
+            if error is None:
+                return TransportRecord(session_type, latency), failed
+            self._logger.debug('Transport {0} failed: {1}'.format(session_type, error))
+            failed += 1
+            if results.empty():
+                return None, failed
+
+    def _store(self, host, candidates, record):
+        self._logger.debug('Transport {0} won for host {1}, latency {2:.3f}s'.format(record.session_type, host,
+                                                                                    record.latency))
+        with self._cache_lock:
+            self._cache[(host, candidates)] = record
+        return record
+
+
+class TransportSessionContextManager(object):
+    """
+    Session context opened over the ordered transports. When the cached transport of the host fails the host
+    record is invalidated, if no session could be opened at all the transports are raced again and the session
+    is opened once more.
+    """
+
+    def __init__(self, transport_selector, host, session_types, ports, session_context_factory, logger):
+        """
+        :type transport_selector: TransportSelector
+        :param host: chassis address
+        :param session_types: configured session types, ['SSH', 'TELNET']
+        :param ports: configured ports, {'SSH': 22, 'TELNET': 23}
+        :param session_context_factory: function creating session context manager over freshly ordered transports
+        :type logger: logging.Logger
+        """
+        self._transport_selector = transport_selector
+        self._host = host
+        self._session_types = session_types
+        self._ports = ports
+        self._session_context_factory = session_context_factory
+        self._logger = logger
+        self._session_context_manager = None
+
+    def __enter__(self):
+        record = self._transport_selector.get_record(self._host, self._session_types, self._ports)
+        self._session_context_manager = self._session_context_factory()
+        try:
+            cli_service = self._session_context_manager.__enter__()
+        except Exception as e:
+            if not record:
+                raise
+            self._logger.info('Cannot open session to {0} over cached transport {1}: {2}, racing again'.format(
+                self._host, record.session_type, e))
+            self._transport_selector.invalidate(self._host)
+            self._session_context_manager = self._session_context_factory()
+            return self._session_context_manager.__enter__()
+
+        session = getattr(cli_service, 'session', None)
+        if record and getattr(session, 'new_session', False) and session.session_type != record.session_type:
+            self._logger.info('Cached transport {0} of {1} failed, session opened over {2}'.format(
+                record.session_type, self._host, session.session_type))
+            self._transport_selector.invalidate(self._host)
+        return cli_service
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return self._session_context_manager.__exit__(exc_type, exc_val, exc_tb)
@@ -5,13 +5,19 @@ import re
 
 import fiberzone_afm.command_templates.autoload as command_template
 from cloudshell.cli.command_template.command_template_executor import CommandTemplateExecutor
+from fiberzone_afm.entities.port_entities import Port, PortInfo
 from fiberzone_afm.helpers.command_actions_helper import CommandActionsHelper
+from fiberzone_afm.helpers.tracer import TRACER, traced
 
 
 class AutoloadActions(object):
     """
     Autoload actions
     """
+    PORT_STATUS_PATTERN = re.compile(
+        r'^[ \t]*(?P<side>[ew])(?P<port_id>\d+)\s+(?P<locked>\d+)\s+(?P<oper_state>\d+)\s+(?P<hw_state>\d+)\s+'
+        r'(?P<paired>[ew]\d+)\s+(?:(?P<connected>[ew]\d+)\s+)?\d+\s+(?P<counter>\d+)',
+        re.IGNORECASE | re.MULTILINE)
 
     def __init__(self, cli_service, logger):
         """
@@ -24,49 +30,100 @@ class AutoloadActions(object):
         self._cli_service = cli_service
         self._logger = logger
 
+    @traced('actions')
     def board_table(self):
         """
         :rtype: dict
         """
         board_table = {}
         output = CommandTemplateExecutor(self._cli_service, command_template.SHOW_BOARD).execute_command()
-        serial_search = re.search(r'BOARD\s+.*S/N\((.+?)\)', output, re.DOTALL)
-        if serial_search:
-            board_table['serial_number'] = serial_search.group(1)
+        with TRACER.span('parse show board', 'parse'):
+            serial_search = re.search(r'BOARD\s+.*S/N\((.+?)\)', output, re.DOTALL)
+            if serial_search:
+                board_table['serial_number'] = serial_search.group(1)
 
-        max_port_east_search = re.search(r'MAX_PORT_EAST\s+(\d+)', output, re.DOTALL)
-        max_port_west_search = re.search(r'MAX_PORT_WEST\s+(\d+)', output, re.DOTALL)
-        if max_port_east_search and max_port_west_search:
-            max_port_east = max_port_east_search.group(1)
-            max_port_west = max_port_west_search.group(1)
-            board_table['model_name'] = "AFM-360-{0}X{1}".format(max_port_east, max_port_west)
+            max_port_east_search = re.search(r'MAX_PORT_EAST\s+(\d+)', output, re.DOTALL)
+            max_port_west_search = re.search(r'MAX_PORT_WEST\s+(\d+)', output, re.DOTALL)
+            if max_port_east_search and max_port_west_search:
+                max_port_east = max_port_east_search.group(1)
+                max_port_west = max_port_west_search.group(1)
+                board_table['model_name'] = "AFM-360-{0}X{1}".format(max_port_east, max_port_west)
 
-        sw_version_search = re.search(r'ACTIVE\s+SW\s+VER\s+(\d+\.\d+\.\d+\.\d+)', output, re.DOTALL)
-        if sw_version_search:
-            board_table['sw_version'] = sw_version_search.group(1)
+            sw_version_search = re.search(r'ACTIVE\s+SW\s+VER\s+(\d+\.\d+\.\d+\.\d+)', output, re.DOTALL)
+            if sw_version_search:
+                board_table['sw_version'] = sw_version_search.group(1)
 
         return board_table
 
+    @traced('actions')
     def ports_table(self):
         """
         :rtype: dict
         """
-        port_table = {}
+        port_table = self.port_logic_table()
+        port_connections_table = self.port_connections_table()
+        for port_id, port_record in port_table.iteritems():
+            port_record.update(port_connections_table.get(port_id, {}))
+        return port_table
+
+    @traced('actions')
+    def port_logic_table(self):
+        """
+        Blades of the logical ports, 'port show logic table'
+        :return: port id to {'blade': blade name}
+        :rtype: dict
+        """
+        port_logic_table = {}
         port_logic_output = CommandTemplateExecutor(self._cli_service,
                                                     command_template.PORT_SHOW_LOGIC_TABLE).execute_command()
 
-        for record in CommandActionsHelper.parse_table(port_logic_output.strip(), r'^\w+\s+\d+\s+\w+\s+e\d+\s+w\d+$'):
-            port_table[record[1]] = {'blade': record[2]}
+        with TRACER.span('parse port show logic table', 'parse'):
+            for record in CommandActionsHelper.parse_table(port_logic_output.strip(),
+                                                           r'^\w+\s+\d+\s+\w+\s+e\d+\s+w\d+$'):
+                port_logic_table[record[1]] = {'blade': record[2]}
+        return port_logic_table
 
+    @traced('actions')
+    def port_connections_table(self):
+        """
+        Lock state and connections of the east ports, 'port show'
+        :return: port id to {'locked': lock state, 'connected': connected port id or None}
+        :rtype: dict
+        """
+        port_connections_table = {}
         port_output = CommandTemplateExecutor(self._cli_service,
                                               command_template.PORT_SHOW).execute_command()
 
-        for record in CommandActionsHelper.parse_table(port_output.strip(), r'^e\d+\s+\d+\s+\d+\s+\d+\s+w\d+\s+.*$'):
-            record_id = re.sub(r'\D', '', record[0])
-            if record_id in port_table:
-                port_table[record_id]['locked'] = record[1]
-                if len(record) > 7:
-                    port_table[record_id]['connected'] = re.sub(r'\D', '', record[5])
-                else:
-                    port_table[record_id]['connected'] = None
-        return port_table
+        with TRACER.span('parse port show', 'parse'):
+            for record in CommandActionsHelper.parse_table(port_output.strip(),
+                                                           r'^e\d+\s+\d+\s+\d+\s+\d+\s+w\d+\s+.*$'):
+                record_id = re.sub(r'\D', '', record[0])
+                port_connections_table[record_id] = {
+                    'locked': record[1],
+                    'connected': re.sub(r'\D', '', record[5]) if len(record) > 7 else None}
+        return port_connections_table
+
+    @traced('actions')
+    def ports_status_table(self):
+        """
+        Status of all ports from one 'port show' read
+        :return: port id to port info
+        :rtype: dict[str, fiberzone_afm.entities.port_entities.PortInfo]
+        """
+        port_output = CommandTemplateExecutor(self._cli_service, command_template.PORT_SHOW).execute_command()
+        with TRACER.span('parse port show', 'parse'):
+            sides = {}
+            for match in self.PORT_STATUS_PATTERN.finditer(port_output):
+                connected = match.group('connected')
+                oper_state = match.group('oper_state')
+                port = Port(match.group('side').upper() + match.group('port_id'), match.group('paired'),
+                            re.sub(r'\D', '', connected) if connected and oper_state == '2' else None,
+                            match.group('locked') == '2', match.group('hw_state') == '2', oper_state,
+                            int(match.group('counter')))
+                sides.setdefault(match.group('port_id'), {})[match.group('side').lower()] = port
+
+            ports_status = {}
+            for port_id, port_sides in sides.iteritems():
+                if 'e' in port_sides and 'w' in port_sides:
+                    ports_status[port_id] = PortInfo(port_id, port_sides['e'], port_sides['w'])
+        return ports_status
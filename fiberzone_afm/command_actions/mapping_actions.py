@@ -3,26 +3,33 @@ import re
 import fiberzone_afm.command_templates.autoload as command_template_autoload
 import fiberzone_afm.command_templates.mapping as command_template
 from cloudshell.cli.command_template.command_template_executor import CommandTemplateExecutor
+from cloudshell.cli.session.session_exceptions import CommandExecutionException
 from fiberzone_afm.entities.port_entities import Port, PortInfo
 from fiberzone_afm.helpers.command_actions_helper import CommandActionsHelper
+from fiberzone_afm.helpers.tracer import TRACER, traced
 
 
 class MappingActions(object):
     """
     Autoload actions
     """
+    NARROW_QUERY_ROW_PATTERN = re.compile(r'^\s*([ew])(\d+)\s+\d+\s+\d+\s+\d+\s+[ew]\d+', re.IGNORECASE | re.MULTILINE)
 
-    def __init__(self, cli_service, logger):
+    def __init__(self, cli_service, logger, narrow_query=False):
         """
         :param cli_service: default mode cli_service
         :type cli_service: CliService
         :param logger:
         :type logger: Logger
+        :param narrow_query: read ports with per-port 'port show' instead of the full table
+        :type narrow_query: bool
         :return:
         """
         self._cli_service = cli_service
         self._logger = logger
+        self._narrow_query = narrow_query
 
+    @traced('actions')
     def connect(self, src_port, dst_port):
         """
         Connect ports
@@ -34,6 +41,7 @@ class MappingActions(object):
                                                                                                       dst_port=dst_port)
         return output
 
+    @traced('actions')
     def disconnect(self, src_port, dst_port):
         """
         Disconnect ports
@@ -46,31 +54,60 @@ class MappingActions(object):
             dst_port=dst_port)
         return output
 
+    def probe_narrow_query(self, port_id='1'):
+        """
+        Check if the firmware answers per-port 'port show' with rows of this port only
+        :param port_id: existing port id
+        :rtype: bool
+        """
+        try:
+            output = CommandTemplateExecutor(self._cli_service,
+                                             command_template_autoload.PORT_SHOW_PORT).execute_command(port_id=port_id)
+        except CommandExecutionException:
+            return False
+        rows = self.NARROW_QUERY_ROW_PATTERN.findall(output)
+        return sorted(side.lower() for side, _ in rows) == ['e', 'w'] and all(
+            row_port_id == port_id for _, row_port_id in rows)
+
+    def _port_show_output(self, port_ids):
+        if self._narrow_query:
+            try:
+                return '\n'.join(CommandTemplateExecutor(self._cli_service, command_template_autoload.PORT_SHOW_PORT)
+                                 .execute_command(port_id=port_id) for port_id in port_ids)
+            except CommandExecutionException:
+                self._logger.warning('Per-port query failed, reading the full ports table')
+        return CommandTemplateExecutor(self._cli_service, command_template_autoload.PORT_SHOW).execute_command()
+
+    @traced('actions')
     def ports_info(self, *port_ids):
         self._logger.debug('Getting ports info for ports {}'.format(', '.join(port_ids)))
-        port_output = CommandTemplateExecutor(self._cli_service,
-                                              command_template_autoload.PORT_SHOW).execute_command()
+        port_output = self._port_show_output(port_ids)
         ports_info = []
 
-        for port_id in port_ids:
-            pattern = r'^\D{0}\s+\d+\s+\d+\s+\d+\s+\D{0}.*$'.format(port_id)
-            match_list = CommandActionsHelper.parse_table(port_output.strip(), pattern)
-            east_port = None
-            west_port = None
-            for record in match_list:
-                name = record[0]
-                connected = re.sub(r'\D', '', record[5]) if record[2] == '2' else None
-                locked = record[1] == '2'
-                disabled = record[3] == '2'
-                paired = record[4]
-                port = Port(name, paired, connected, locked, disabled)
-                if re.match(r'e', port.name, re.IGNORECASE):
-                    east_port = port
-                elif re.match(r'w', port.name, re.IGNORECASE):
-                    west_port = port
-            if east_port and west_port:
-                ports_info.append(PortInfo(port_id, east_port, west_port))
-            else:
-                raise Exception(self.__class__.__name__, 'Cannot collect information for port {}'.format(port_id))
+        with TRACER.span('parse port show', 'parse'):
+            for port_id in port_ids:
+                pattern = r'^\D{0}\s+\d+\s+\d+\s+\d+\s+\D{0}.*$'.format(port_id)
+                match_list = CommandActionsHelper.parse_table(port_output.strip(), pattern)
+                east_port = None
+                west_port = None
+                for record in match_list:
+                    name = record[0]
+                    connected = re.sub(r'\D', '', record[5]) if record[2] == '2' else None
+                    locked = record[1] == '2'
+                    disabled = record[3] == '2'
+                    paired = record[4]
+                    counter_index = 7 if len(record) > 5 and not record[5].isdigit() else 6
+                    counter = int(record[counter_index]) if len(record) > counter_index and record[
+                        counter_index].isdigit() else None
+                    port = Port(name, paired, connected, locked, disabled, counter=counter)
+                    if re.match(r'e', port.name, re.IGNORECASE):
+                        east_port = port
+                    elif re.match(r'w', port.name, re.IGNORECASE):
+                        west_port = port
+                if east_port and west_port:
+                    ports_info.append(PortInfo(port_id, east_port, west_port))
+                else:
+                    raise Exception(self.__class__.__name__,
+                                    'Cannot collect information for port {}'.format(port_id))
 
         return ports_info
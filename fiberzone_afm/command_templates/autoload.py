@@ -10,4 +10,5 @@ ERROR_MAP = OrderedDict([(r'[Ee]rror:', 'Command error')])
 
 SHOW_BOARD = CommandTemplate('show board', ACTION_MAP, ERROR_MAP)
 PORT_SHOW = CommandTemplate('port show', ACTION_MAP, ERROR_MAP)
+PORT_SHOW_PORT = CommandTemplate('port show {port_id}', ACTION_MAP, ERROR_MAP)
 PORT_SHOW_LOGIC_TABLE = CommandTemplate('port show logic table', ACTION_MAP, ERROR_MAP)
@@ -1,17 +1,28 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import threading
 import time
 import os
 
+from cloudshell.cli.session.session_exceptions import CommandExecutionException
 from cloudshell.layer_one.core.driver_commands_interface import DriverCommandsInterface
-from cloudshell.layer_one.core.response.response_info import GetStateIdResponseInfo, ResourceDescriptionResponseInfo, \
-    AttributeValueResponseInfo
+from cloudshell.layer_one.core.response.response_info import GetStateIdResponseInfo, AttributeValueResponseInfo
 from fiberzone_afm.cli.fiberzone_cli_handler import FiberzoneCliHandler
 from fiberzone_afm.command_actions.autoload_actions import AutoloadActions
 from fiberzone_afm.command_actions.mapping_actions import MappingActions
+from fiberzone_afm.helpers.afm_simulator import AfmSimulator, SimulatorCliHandler
+from fiberzone_afm.helpers.attributes_helper import AttributesSnapshot
 from fiberzone_afm.helpers.autoload_helper import AutoloadHelper
+from fiberzone_afm.helpers.autoload_pipeline import AutoloadPipeline
+from fiberzone_afm.helpers.command_profiler import CommandProfiler
+from fiberzone_afm.helpers.firmware_capabilities import FirmwareCapabilities
+from fiberzone_afm.helpers.latency_history import LatencyHistory, MappingSchedule
+from fiberzone_afm.helpers.port_locker import PortLocker
+from fiberzone_afm.helpers.replay_cli import ReplayCliHandler
+from fiberzone_afm.helpers.resource_info_builder import CachedResourceDescriptionResponseInfo
 from fiberzone_afm.helpers.test_cli import TestCliHandler
+from fiberzone_afm.helpers.tracer import TRACER, traced
 
 
 class PortsPartiallyConnectedException(Exception):
@@ -30,13 +41,53 @@ class DriverCommands(DriverCommandsInterface):
         """
         self._logger = logger
         self._runtime_config = runtime_config
-        self._cli_handler = FiberzoneCliHandler(logger)
+        replay_path = runtime_config.read_key('CLI.REPLAY.PATH')
+        if replay_path:
+            self._cli_handler = ReplayCliHandler(replay_path, logger,
+                                                 float(runtime_config.read_key('CLI.REPLAY.TIME_SCALE', 1)))
+        elif runtime_config.read_key('CLI.SIMULATOR.ENABLED', False):
+            simulator = AfmSimulator(ports_count=int(runtime_config.read_key('CLI.SIMULATOR.PORTS_COUNT', 180)),
+                                     connect_delay=float(runtime_config.read_key('CLI.SIMULATOR.CONNECT_DELAY', 0)),
+                                     narrow_query=runtime_config.read_key('CLI.SIMULATOR.NARROW_QUERY', False))
+            self._cli_handler = SimulatorCliHandler(
+                simulator, logger, float(runtime_config.read_key('CLI.SIMULATOR.RESPONSE_TIME', 0)),
+                int(runtime_config.read_key('CLI.SESSION_POOL_SIZE', 1)))
+        else:
+            self._cli_handler = FiberzoneCliHandler(logger)
         # self._cli_handler = TestCliHandler(
         #       os.path.join(os.path.dirname(__file__), 'helpers', 'test_fiberzone_data'), logger)
 
         self._mapping_timeout = runtime_config.read_key('MAPPING.TIMEOUT', 120)
         self._mapping_check_delay = runtime_config.read_key('MAPPING.CHECK_DELAY', 3)
-
+        self._optimistic_mapping = runtime_config.read_key('MAPPING.OPTIMISTIC', False)
+        self._narrow_query_enabled = runtime_config.read_key('MAPPING.NARROW_QUERY.ENABLED', False)
+        self._narrow_query_probe_port = str(runtime_config.read_key('MAPPING.NARROW_QUERY.PROBE_PORT', 1))
+        self._parallel_autoload = runtime_config.read_key('AUTOLOAD.PARALLEL', False)
+        self._firmware_capabilities = FirmwareCapabilities(logger)
+        self._address = None
+
+        self._latency_history_enabled = runtime_config.read_key('MAPPING.LATENCY_HISTORY.ENABLED', False)
+        self._latency_history_path = runtime_config.read_key('MAPPING.LATENCY_HISTORY.PATH') or os.path.join(
+            os.environ.get('LOG_PATH', 'Logs'), 'fiberzone_afm', 'latency_history')
+        self._latency_max_samples = int(runtime_config.read_key('MAPPING.LATENCY_HISTORY.MAX_SAMPLES', 20))
+        self._latency_max_pairs = int(runtime_config.read_key('MAPPING.LATENCY_HISTORY.MAX_PAIRS', 1000))
+        self._latency_timeout_factor = float(runtime_config.read_key('MAPPING.LATENCY_HISTORY.TIMEOUT_FACTOR', 2))
+        self._latency_max_timeout = float(runtime_config.read_key('MAPPING.LATENCY_HISTORY.MAX_TIMEOUT', 600))
+        self._latency_fine_delay = float(runtime_config.read_key('MAPPING.LATENCY_HISTORY.FINE_CHECK_DELAY', 1))
+        self._latency_save_delay = float(runtime_config.read_key('MAPPING.LATENCY_HISTORY.SAVE_DELAY', 1))
+        self._latency_histories = {}
+        self._latency_histories_lock = threading.Lock()
+        self._port_locker = PortLocker()
+
+        self._attributes_ttl = runtime_config.read_key('ATTRIBUTES.SNAPSHOT_TTL', 10)
+        self._attributes_snapshots = {}
+        self._attributes_generations = {}
+        self._attributes_lock = threading.Lock()
+
+        TRACER.configure(logger, runtime_config)
+        CommandProfiler(logger, runtime_config).wrap(self)
+
+    @traced('command')
     def login(self, address, username, password):
         """
         Perform login operation on the device
@@ -56,9 +107,14 @@ class DriverCommands(DriverCommandsInterface):
                 self._logger.info(device_info)
         """
         self._cli_handler.define_session_attributes(address, username, password)
+        self._address = address
         with self._cli_handler.default_mode_service() as session:
             autoload_actions = AutoloadActions(session, self._logger)
-            self._logger.info('Connected to ' + autoload_actions.board_table().get('model_name'))
+            board_table = autoload_actions.board_table()
+            self._logger.info('Connected to ' + board_table.get('model_name'))
+            self._firmware_capabilities.update_sw_version(address, board_table.get('sw_version'))
+            # Probe the firmware on login, so the first mapping does not pay for it
+            self._mapping_actions(session)
 
     def get_state_id(self):
         """
@@ -92,6 +148,7 @@ class DriverCommands(DriverCommandsInterface):
         """
         pass
 
+    @traced('command')
     def map_bidi(self, src_port, dst_port):
         """
         Create a bidirectional connection between source and destination ports
@@ -110,7 +167,7 @@ class DriverCommands(DriverCommandsInterface):
         self._logger.info('MapBidi, SrcPort: {0}, DstPort: {1}'.format(src_port, dst_port))
         src_port_id = self._convert_port(src_port)
         dst_port_id = self._convert_port(dst_port)
-        self._connect_ports(src_port_id, dst_port_id)
+        self._connect_ports(self._chassis_address(src_port), src_port_id, dst_port_id)
 
     def map_uni(self, src_port, dst_ports):
         """
@@ -129,6 +186,7 @@ class DriverCommands(DriverCommandsInterface):
         """
         raise Exception(self.__class__.__name__, 'Unidirectional connections are not allowed')
 
+    @traced('command')
     def get_resource_description(self, address):
         """
         Auto-load function to retrieve all information from the device
@@ -162,18 +220,19 @@ class DriverCommands(DriverCommandsInterface):
 
             return ResourceDescriptionResponseInfo([chassis])
         """
-        with self._cli_handler.default_mode_service() as session:
-            autoload_actions = AutoloadActions(session, self._logger)
-            board_table = autoload_actions.board_table()
-            ports_table = autoload_actions.ports_table()
-            autoload_helper = AutoloadHelper(address, board_table, ports_table, self._logger)
-            response_info = ResourceDescriptionResponseInfo(autoload_helper.build_structure())
-            return response_info
+        board_table, ports_table = AutoloadPipeline(self._cli_handler, self._logger, self._parallel_autoload).read()
+        autoload_helper = AutoloadHelper(address, board_table, ports_table, self._logger)
+        response_info = CachedResourceDescriptionResponseInfo(autoload_helper.build_structure())
+        return response_info
 
     @staticmethod
     def _convert_port(cs_port):
         return cs_port.split('/')[-1]
 
+    @staticmethod
+    def _chassis_address(cs_port):
+        return cs_port.split('/')[0]
+
     def _get_connected_port(self, port_info):
         """
         Get connected
@@ -207,81 +266,241 @@ class DriverCommands(DriverCommandsInterface):
         if port_info.east_port.disabled or port_info.west_port.disabled:
             raise Exception(self.__class__.__name__, 'Port {} is disabled'.format(port_info.port_id))
 
-    def _connect_ports(self, src_port_id, dst_port_id):
-        with self._cli_handler.default_mode_service() as session:
-            mapping_actions = MappingActions(session, self._logger)
-            src_port_info, dst_port_info = mapping_actions.ports_info(src_port_id, dst_port_id)
-            self._check_port_locked_or_disabled(src_port_info)
-            self._check_port_locked_or_disabled(dst_port_info)
-            if self._get_connected_port(src_port_info) or self._get_connected_port(dst_port_info):
-                raise Exception(self.__class__.__name__,
-                                'Port {0}, or port {1} has already been connected'.format(src_port_id, dst_port_id))
-            mapping_actions.connect(src_port_id, dst_port_id)
-            start_time = time.time()
-            while time.time() - start_time < self._mapping_timeout:
-                src_port_info, dst_port_info = mapping_actions.ports_info(src_port_id, dst_port_id)
-                self._check_port_locked_or_disabled(src_port_info)
-                self._check_port_locked_or_disabled(dst_port_info)
-                try:
-                    if self._get_connected_port(src_port_info) == dst_port_id and self._get_connected_port(
-                            dst_port_info) == src_port_id:
-                        return
-                    else:
-                        time.sleep(self._mapping_check_delay)
-                except PortsPartiallyConnectedException:
-                    time.sleep(self._mapping_check_delay)
+    def _mapping_actions(self, session):
+        """
+        Mapping actions of the logged in chassis, ports are queried one by one when the chassis firmware supports it
+        :rtype: fiberzone_afm.command_actions.mapping_actions.MappingActions
+        """
+        narrow_query = False
+        if self._narrow_query_enabled:
+            narrow_query = self._firmware_capabilities.is_supported(
+                self._address, self._firmware_capabilities.sw_version(self._address),
+                FirmwareCapabilities.NARROW_PORT_QUERY,
+                lambda: MappingActions(session, self._logger).probe_narrow_query(self._narrow_query_probe_port))
+        return MappingActions(session, self._logger, narrow_query)
+
+    def _wait_check_delay(self, delay=None):
+        with TRACER.span('check delay', 'sleep'):
+            time.sleep(self._mapping_check_delay if delay is None else delay)
+
+    def _get_latency_history(self, address):
+        """
+        Latency history of the chassis, None if the history is disabled
+        :rtype: fiberzone_afm.helpers.latency_history.LatencyHistory
+        """
+        if not self._latency_history_enabled:
+            return None
+        with self._latency_histories_lock:
+            if address not in self._latency_histories:
+                self._latency_histories[address] = LatencyHistory(
+                    os.path.join(self._latency_history_path, '{}.json'.format(address)), self._logger,
+                    self._latency_max_samples, self._latency_max_pairs, self._latency_save_delay)
+            return self._latency_histories[address]
+
+    def _mapping_schedule(self, address, action, src_port_id, dst_port_id):
+        """
+        :param address: chassis address
+        :rtype: fiberzone_afm.helpers.latency_history.MappingSchedule
+        """
+        latency_history = self._get_latency_history(address)
+        if not latency_history:
+            return MappingSchedule(self._mapping_timeout, self._mapping_check_delay)
+        schedule = latency_history.schedule(action, src_port_id, dst_port_id, self._mapping_timeout,
+                                            self._mapping_check_delay, self._latency_timeout_factor,
+                                            self._latency_max_timeout, self._latency_fine_delay)
+        if schedule.timeout != self._mapping_timeout:
+            self._logger.info('Ports {0} and {1} {2} timeout {3}sec from latency history'.format(
+                src_port_id, dst_port_id, action, schedule.timeout))
+        return schedule
+
+    def _record_mapping(self, address, action, src_port_info, dst_port_info, duration):
+        latency_history = self._get_latency_history(address)
+        if latency_history:
+            latency_history.record(action, src_port_info.port_id, dst_port_info.port_id, duration,
+                                   dict((port_info.port_id, port_info.east_port.counter) for port_info in
+                                        (src_port_info, dst_port_info)))
+
+    def _record_mapping_timeout(self, address, action, src_port_id, dst_port_id, timeout):
+        latency_history = self._get_latency_history(address)
+        if latency_history:
+            latency_history.record_timeout(action, src_port_id, dst_port_id, timeout)
+
+    def _check_connect_allowed(self, src_port_id, dst_port_id, src_port_info, dst_port_info):
+        """
+        Raise if the ports cannot be connected
+        :type src_port_info: fiberzone_afm.entities.port_entities.PortInfo
+        :type dst_port_info: fiberzone_afm.entities.port_entities.PortInfo
+        """
+        self._check_port_locked_or_disabled(src_port_info)
+        self._check_port_locked_or_disabled(dst_port_info)
+        if self._get_connected_port(src_port_info) or self._get_connected_port(dst_port_info):
+            raise Exception(self.__class__.__name__,
+                            'Port {0}, or port {1} has already been connected'.format(src_port_id, dst_port_id))
 
+    def _check_connected_elsewhere(self, src_port_id, dst_port_id, src_port_info, dst_port_info):
+        """
+        Raise if a port is connected to a third port, used by optimistic mapping in the confirmation poll
+        """
+        if self._get_connected_port(src_port_info) not in (None, dst_port_id) or self._get_connected_port(
+                dst_port_info) not in (None, src_port_id):
+            raise Exception(self.__class__.__name__,
+                            'Port {0}, or port {1} has already been connected'.format(src_port_id, dst_port_id))
+
+    def _connect_ports(self, address, src_port_id, dst_port_id):
+        """
+        :param address: chassis address of the ports, '192.168.42.240'
+        """
+        with self._port_locker.lock(address, src_port_id, dst_port_id):
+            with self._cli_handler.default_mode_service() as session:
+                mapping_actions = self._mapping_actions(session)
+                if self._optimistic_mapping:
+                    try:
+                        mapping_actions.connect(src_port_id, dst_port_id)
+                    except CommandExecutionException:
+                        # The device refused the connection, read the ports to report the reason the pre-check does
+                        self._check_connect_allowed(src_port_id, dst_port_id,
+                                                    *mapping_actions.ports_info(src_port_id, dst_port_id))
+                        raise
+                else:
+                    self._check_connect_allowed(src_port_id, dst_port_id,
+                                                *mapping_actions.ports_info(src_port_id, dst_port_id))
+                    mapping_actions.connect(src_port_id, dst_port_id)
+            self._invalidate_attributes_snapshot(address)
+            schedule = self._mapping_schedule(address, LatencyHistory.CONNECT, src_port_id, dst_port_id)
+            start_time = time.time()
+            try:
+                while time.time() - start_time < schedule.timeout:
+                    with self._cli_handler.default_mode_service() as session:
+                        mapping_actions = self._mapping_actions(session)
+                        src_port_info, dst_port_info = mapping_actions.ports_info(src_port_id, dst_port_id)
+                    self._check_port_locked_or_disabled(src_port_info)
+                    self._check_port_locked_or_disabled(dst_port_info)
+                    try:
+                        if self._optimistic_mapping:
+                            self._check_connected_elsewhere(src_port_id, dst_port_id, src_port_info, dst_port_info)
+                        if self._get_connected_port(src_port_info) == dst_port_id and self._get_connected_port(
+                                dst_port_info) == src_port_id:
+                            self._record_mapping(address, LatencyHistory.CONNECT, src_port_info, dst_port_info,
+                                                 time.time() - start_time)
+                            return
+                        else:
+                            self._wait_check_delay(schedule.next_delay(time.time() - start_time))
+                    except PortsPartiallyConnectedException:
+                        self._wait_check_delay(schedule.next_delay(time.time() - start_time))
+            finally:
+                # Ports change state until the poll ends, whatever the result is
+                self._invalidate_attributes_snapshot(address)
+
+        self._record_mapping_timeout(address, LatencyHistory.CONNECT, src_port_id, dst_port_id, schedule.timeout)
         raise Exception(self.__class__.__name__,
                         'Cannot connect port {0} to port {1} during {2}sec'.format(src_port_id, dst_port_id,
-                                                                                   self._mapping_timeout))
+                                                                                   schedule.timeout))
 
-    def _disconnect_ports(self, *ports):
+    def _read_disconnect_state(self, src_port_id, dst_port_id, detect_peer):
+        """
+        Read the ports and raise if they cannot be disconnected
+        :param detect_peer: dst port was detected from the src port before the ports were locked
+        :return: True if the ports are connected to each other, False if there is nothing to disconnect,
+            None if the peer of the src port changed and has to be detected again
+        """
         with self._cli_handler.default_mode_service() as session:
-            mapping_actions = MappingActions(session, self._logger)
+            mapping_actions = self._mapping_actions(session)
+            src_port_info, dst_port_info = mapping_actions.ports_info(src_port_id, dst_port_id)
+
+        if not self._get_connected_port(src_port_info) and not self._get_connected_port(dst_port_info):
+            return False
+
+        if detect_peer and self._get_connected_port(src_port_info) != dst_port_id:
+            return None
+
+        if self._get_connected_port(src_port_info) != dst_port_id:
+            raise Exception(
+                'Port {0} is not connected or connected not to port {1}'.format(src_port_id, dst_port_id))
+
+        if self._get_connected_port(dst_port_info) != src_port_id:
+            raise Exception(
+                'Port {0} is not connected or connected not to port {1}'.format(dst_port_id, src_port_id))
+
+        self._check_port_locked_or_disabled(src_port_info)
+        self._check_port_locked_or_disabled(dst_port_info)
+        return True
+
+    def _disconnect_ports(self, address, *ports):
+        """
+        :param address: chassis address of the ports, '192.168.42.240'
+        :param ports: src port id and optionally dst port id, the dst port is detected when not set
+        """
+        src_port_id = ports[0]
+        while True:
             if len(ports) == 1:
-                src_port_id = ports[0]
-                src_port_info, = mapping_actions.ports_info(src_port_id)
+                with self._port_locker.lock(address, src_port_id):
+                    with self._cli_handler.default_mode_service() as session:
+                        mapping_actions = self._mapping_actions(session)
+                        src_port_info, = mapping_actions.ports_info(src_port_id)
                 dst_port_id = self._get_connected_port(src_port_info)
                 if not dst_port_id:
                     return
-                dst_port_info, = mapping_actions.ports_info(dst_port_id)
             else:
-                src_port_id = ports[0]
                 dst_port_id = ports[1]
-                src_port_info, dst_port_info = mapping_actions.ports_info(src_port_id, dst_port_id)
-
-            if not self._get_connected_port(src_port_info) and not self._get_connected_port(dst_port_info):
-                return
-
-            if self._get_connected_port(src_port_info) != dst_port_id:
-                raise Exception(
-                    'Port {0} is not connected or connected not to port {1}'.format(src_port_id, dst_port_id))
 
-            if self._get_connected_port(dst_port_info) != src_port_id:
-                raise Exception(
-                    'Port {0} is not connected or connected not to port {1}'.format(dst_port_id, src_port_id))
-
-            self._check_port_locked_or_disabled(src_port_info)
-            self._check_port_locked_or_disabled(dst_port_info)
-
-            mapping_actions.disconnect(src_port_id, dst_port_id)
-            start_time = time.time()
-            while time.time() - start_time < self._mapping_timeout:
-                src_port_info, dst_port_info = mapping_actions.ports_info(src_port_id, dst_port_id)
-                self._check_port_locked_or_disabled(src_port_info)
-                self._check_port_locked_or_disabled(dst_port_info)
-                try:
-                    if not self._get_connected_port(src_port_info) and not self._get_connected_port(dst_port_info):
+            with self._port_locker.lock(address, src_port_id, dst_port_id):
+                if self._optimistic_mapping:
+                    try:
+                        with self._cli_handler.default_mode_service() as session:
+                            mapping_actions = self._mapping_actions(session)
+                            mapping_actions.disconnect(src_port_id, dst_port_id)
+                    except CommandExecutionException:
+                        # The device refused the disconnection, read the ports to report the reason
+                        ports_connected = self._read_disconnect_state(src_port_id, dst_port_id, len(ports) == 1)
+                        if ports_connected is None:
+                            # Connection changed while the ports were not locked, detect the peer port again
+                            continue
+                        if not ports_connected:
+                            return
+                        raise
+                else:
+                    ports_connected = self._read_disconnect_state(src_port_id, dst_port_id, len(ports) == 1)
+                    if ports_connected is None:
+                        # Connection changed while the ports were not locked, detect the peer port again
+                        continue
+                    if not ports_connected:
                         return
-                    else:
-                        time.sleep(self._mapping_check_delay)
-                except PortsPartiallyConnectedException:
-                    time.sleep(self._mapping_check_delay)
 
-            raise Exception(self.__class__.__name__,
-                            'Cannot disconnect port {0} from port {1} during {2}sec'.format(src_port_id, dst_port_id,
-                                                                                            self._mapping_timeout))
+                    with self._cli_handler.default_mode_service() as session:
+                        mapping_actions = self._mapping_actions(session)
+                        mapping_actions.disconnect(src_port_id, dst_port_id)
+                self._invalidate_attributes_snapshot(address)
+                schedule = self._mapping_schedule(address, LatencyHistory.DISCONNECT, src_port_id, dst_port_id)
+                start_time = time.time()
+                try:
+                    while time.time() - start_time < schedule.timeout:
+                        with self._cli_handler.default_mode_service() as session:
+                            mapping_actions = self._mapping_actions(session)
+                            src_port_info, dst_port_info = mapping_actions.ports_info(src_port_id, dst_port_id)
+                        self._check_port_locked_or_disabled(src_port_info)
+                        self._check_port_locked_or_disabled(dst_port_info)
+                        try:
+                            if not self._get_connected_port(src_port_info) and not self._get_connected_port(
+                                    dst_port_info):
+                                self._record_mapping(address, LatencyHistory.DISCONNECT, src_port_info, dst_port_info,
+                                                     time.time() - start_time)
+                                return
+                            else:
+                                self._wait_check_delay(schedule.next_delay(time.time() - start_time))
+                        except PortsPartiallyConnectedException:
+                            self._wait_check_delay(schedule.next_delay(time.time() - start_time))
+                finally:
+                    # Ports change state until the poll ends, whatever the result is
+                    self._invalidate_attributes_snapshot(address)
+
+                self._record_mapping_timeout(address, LatencyHistory.DISCONNECT, src_port_id, dst_port_id,
+                                             schedule.timeout)
+                raise Exception(self.__class__.__name__,
+                                'Cannot disconnect port {0} from port {1} during {2}sec'.format(src_port_id,
+                                                                                                dst_port_id,
+                                                                                                schedule.timeout))
 
+    @traced('command')
     def map_clear(self, ports):
         """
         Remove simplex/multi-cast/duplex connection ending on the destination port
@@ -300,7 +519,7 @@ class DriverCommands(DriverCommandsInterface):
         for src_port in ports:
             try:
                 src_port_id = self._convert_port(src_port)
-                self._disconnect_ports(src_port_id)
+                self._disconnect_ports(self._chassis_address(src_port), src_port_id)
             except Exception as e:
                 if len(e.args) > 1:
                     exception_messages.append(e.args[1])
@@ -310,6 +529,7 @@ class DriverCommands(DriverCommandsInterface):
         if exception_messages:
             raise Exception(self.__class__.__name__, ', '.join(exception_messages))
 
+    @traced('command')
     def map_clear_to(self, src_port, dst_ports):
         """
         Remove simplex/multi-cast/duplex connection ending on the destination port
@@ -332,8 +552,9 @@ class DriverCommands(DriverCommandsInterface):
         self._logger.info('MapClearTo, SrcPort: {0}, DstPort: {1}'.format(src_port, dst_ports[0]))
         src_port_id = self._convert_port(src_port)
         dst_port_id = self._convert_port(dst_ports[0])
-        self._disconnect_ports(src_port_id, dst_port_id)
+        self._disconnect_ports(self._chassis_address(src_port), src_port_id, dst_port_id)
 
+    @traced('command')
     def get_attribute_value(self, cs_address, attribute_name):
         """
         Retrieve attribute value from the device
@@ -351,15 +572,83 @@ class DriverCommands(DriverCommandsInterface):
                 value = session.send_command(command)
                 return AttributeValueResponseInfo(value)
         """
-        serial_number = 'Serial Number'
-        if len(cs_address.split('/')) == 1 and attribute_name == serial_number:
-            with self._cli_handler.default_mode_service() as session:
-                autoload_actions = AutoloadActions(session, self._logger)
-                board_table = autoload_actions.board_table()
-            return AttributeValueResponseInfo(board_table.get('serial_number'))
-        else:
+        return AttributeValueResponseInfo(self.get_attribute_values([(cs_address, attribute_name)])[0])
+
+    @traced('command')
+    def get_attribute_values(self, attribute_requests):
+        """
+        Bulk read of chassis and port attributes, values are answered from one attributes snapshot per chassis
+        :param attribute_requests: list of (cs_address, attribute_name),
+            [('192.168.42.240', 'Serial Number'), ('192.168.42.240/1_90/21', 'Oper State')]
+        :type attribute_requests: list
+        :return: attribute values in the order of requests
+        :rtype: list
+        :raises Exception: if attribute is not available
+        """
+        for cs_address, attribute_name in attribute_requests:
+            if not AttributesSnapshot.is_supported(cs_address, attribute_name):
+                raise Exception(self.__class__.__name__,
+                                'Attribute {0} for {1} is not available'.format(attribute_name, cs_address))
+
+        snapshots = {}
+        for cs_address, attribute_name in attribute_requests:
+            address = cs_address.split('/')[0]
+            if address not in snapshots:
+                requested = [_cs_address for _cs_address, _attribute_name in attribute_requests if
+                             _cs_address.split('/')[0] == address and not AttributesSnapshot.is_history_attribute(
+                                 _attribute_name)]
+                snapshots[address] = self._get_attributes_snapshot(
+                    address,
+                    any(AttributesSnapshot.is_chassis_address(_cs_address) for _cs_address in requested),
+                    any(not AttributesSnapshot.is_chassis_address(_cs_address) for _cs_address in requested))
+        return [snapshots[cs_address.split('/')[0]].get_value(cs_address, attribute_name) for
+                cs_address, attribute_name in attribute_requests]
+
+    def _get_attributes_snapshot(self, address, board_table_required, ports_status_required):
+        """
+        Cached attributes snapshot, device is read only for the parts which are missing or expired.
+        The device is read outside of the attributes lock, a snapshot invalidated during the read is not cached.
+        :rtype: fiberzone_afm.helpers.attributes_helper.AttributesSnapshot
+        :raises Exception: if the chassis is not the one the session is logged in to
+        """
+        with self._attributes_lock:
+            snapshot = self._attributes_snapshots.get(address)
+            if snapshot and time.time() - snapshot.timestamp > self._attributes_ttl:
+                snapshot = None
+            generation = self._attributes_generations.get(address, 0)
+        board_table_required = board_table_required and (not snapshot or snapshot.board_table is None)
+        ports_status_required = ports_status_required and (not snapshot or snapshot.ports_status is None)
+        if snapshot and not board_table_required and not ports_status_required:
+            return snapshot
+
+        if address != self._address:
             raise Exception(self.__class__.__name__,
-                            'Attribute {0} for {1} is not available'.format(attribute_name, cs_address))
+                            'Chassis {0} is not logged in, the session is open to {1}'.format(address, self._address))
+        board_table = snapshot.board_table if snapshot else None
+        ports_status = snapshot.ports_status if snapshot else None
+        with self._cli_handler.default_mode_service() as session:
+            autoload_actions = AutoloadActions(session, self._logger)
+            if board_table_required:
+                board_table = autoload_actions.board_table()
+            if ports_status_required:
+                ports_status = autoload_actions.ports_status_table()
+        new_snapshot = AttributesSnapshot(address, board_table, ports_status, self._get_latency_history(address))
+        if snapshot:
+            new_snapshot.timestamp = snapshot.timestamp
+
+        with self._attributes_lock:
+            if self._attributes_generations.get(address, 0) == generation:
+                self._attributes_snapshots[address] = new_snapshot
+        return new_snapshot
+
+    def _invalidate_attributes_snapshot(self, address):
+        """
+        Drop the attributes snapshot of the chassis, reads in progress do not cache their result
+        :param address: chassis address, '192.168.42.240'
+        """
+        with self._attributes_lock:
+            self._attributes_snapshots.pop(address, None)
+            self._attributes_generations[address] = self._attributes_generations.get(address, 0) + 1
 
     def set_attribute_value(self, cs_address, attribute_name, attribute_value):
         """
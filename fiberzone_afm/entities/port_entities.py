@@ -1,10 +1,12 @@
 class Port(object):
-    def __init__(self, name, paired, connected, locked, disabled):
+    def __init__(self, name, paired, connected, locked, disabled, oper_state=None, counter=None):
         self.name = name
         self.paired = paired
         self.connected = connected
         self.locked = locked
         self.disabled = disabled
+        self.oper_state = oper_state
+        self.counter = counter
 
 
 class PortInfo(object):
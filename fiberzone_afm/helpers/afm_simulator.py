@@ -0,0 +1,283 @@
+import re
+import threading
+import time
+
+from cloudshell.cli.cli_service import CliService
+from cloudshell.cli.session.session_exceptions import CommandExecutionException
+from fiberzone_afm.cli.l1_cli_handler import L1CliHandler
+from fiberzone_afm.helpers.tracer import trace_session
+
+
+class SimulatedPort(object):
+    def __init__(self, port_id):
+        self.port_id = port_id
+        self.east_locked = False
+        self.west_locked = False
+        self.east_disabled = False
+        self.west_disabled = False
+        self.counter = 0
+        self.connected = None
+        self.connected_since = None
+        self.previous_connected = None
+
+
+class AfmSimulator(object):
+    """
+    In-memory model of an AFM matrix, renders CLI outputs in the device format and applies connection commands
+    """
+    PROMPT = 's53[OPER]# '
+    PORT_SHOW_HEADER = '\r\n'.join([
+        'Admin Lock state: 1-unlocked     2-locked',
+        'Oper state:       1-disconnected 2-connected 6-attached',
+        'HW Admin state:   1-enabled      2-disabled',
+        'Port role:        1-connections  2-loopback  3-test bus  4-pass through  5-link',
+        'OMB: Out of matrix bound',
+        '=' * 80,
+        'Port  Admin  Oper   HW Adm  Paired  Connected-port  Port  Connection  Port',
+        'ID    Lock   state  state   Port     ID   Name      role  counter     Name',
+        '=' * 80])
+    LOGIC_TABLE_HEADER = '\r\n'.join([
+        'Customer        Logical             Side         TX     RX',
+        'Name              Name                           Port   Port',
+        '=' * 65])
+    SHOW_BOARD_TEMPLATE = '\r\n'.join([
+        'AFM STATE        OPER',
+        'AFM NAME         s53',
+        'BOARD            ver(LCU-100) rev(1) S/N({serial_number})',
+        'MATRIX SIZE:',
+        '                 MIN_PORT_EAST 1  MAX_PORT_EAST {ports_count}',
+        '                 MIN_PORT_WEST 1  MAX_PORT_WEST {ports_count}',
+        'ACTIVE SW VER    {sw_version}',
+        'STANDBY SW VER   {sw_version}',
+        'CONNECTIONS      connections are enabled',
+        'PAIRED PORT      Enabled'])
+
+    def __init__(self, ports_count=180, blade_size=90, serial_number='9727-4733-2222', sw_version='1.6.2.1',
+                 connect_delay=0, narrow_query=False):
+        """
+        :param ports_count: logical ports count, 180 for AFM-360-180X180
+        :type ports_count: int
+        :param blade_size: ports count per logical blade in 'port show logic table'
+        :type blade_size: int
+        :param connect_delay: seconds before a created/removed connection is reported by 'port show'
+        :type connect_delay: float
+        :param narrow_query: firmware answers per-port 'port show <port id>'
+        :type narrow_query: bool
+        """
+        self.ports_count = ports_count
+        self.blade_size = blade_size
+        self.serial_number = serial_number
+        self.sw_version = sw_version
+        self.connect_delay = connect_delay
+        self.narrow_query = narrow_query
+        self.ports = dict((str(port_id), SimulatedPort(str(port_id))) for port_id in range(1, ports_count + 1))
+        self._lock = threading.Lock()
+
+    def connect_pairs(self, pairs):
+        """
+        Set connections without delay, used to prepare a synthetic chassis state
+        :param pairs: list of (src_port_id, dst_port_id)
+        """
+        with self._lock:
+            for src_port_id, dst_port_id in pairs:
+                self._set_connected(str(src_port_id), str(dst_port_id), 0)
+
+    def _set_connected(self, src_port_id, dst_port_id, since):
+        src_port = self.ports[src_port_id]
+        dst_port = self.ports[dst_port_id]
+        src_port.connected, src_port.connected_since = dst_port_id, since
+        dst_port.connected, dst_port.connected_since = src_port_id, since
+        src_port.counter += 1
+        dst_port.counter += 1
+
+    def _visible_connection(self, port):
+        """
+        Connection state reported by the device, a pending change keeps the previous state until connect_delay
+        """
+        if port.connected_since is not None and time.time() - port.connected_since < self.connect_delay:
+            return port.previous_connected
+        return port.connected
+
+    def _blade_name(self, port_id):
+        first = (int(port_id) - 1) // self.blade_size * self.blade_size + 1
+        return '{0}_{1}'.format(first, min(first + self.blade_size - 1, self.ports_count))
+
+    def show_board(self):
+        return self.SHOW_BOARD_TEMPLATE.format(serial_number=self.serial_number, ports_count=self.ports_count,
+                                               sw_version=self.sw_version)
+
+    def port_show_logic_table(self):
+        rows = [self.LOGIC_TABLE_HEADER]
+        for port_id in range(1, self.ports_count + 1):
+            rows.append('customer        {0:<16}{1:<16}e{0:<6}w{0}'.format(port_id, self._blade_name(port_id)))
+        return '\r\n'.join(rows)
+
+    def _port_rows(self, port, sides='ew'):
+        rows = []
+        connected = self._visible_connection(port)
+        for side in sides:
+            locked = port.east_locked if side == 'e' else port.west_locked
+            disabled = port.east_disabled if side == 'e' else port.west_disabled
+            peer_side = 'w' if side == 'e' else 'e'
+            paired = '{0}{1}'.format(peer_side, port.port_id)
+            connected_name = '{0}{1}'.format(peer_side.upper(), connected) if connected else ''
+            rows.append('{0:<8}{1:<7}{2:<7}{3:<7}{4:<8}{5:<17}{6:<7}{7}'.format(
+                side.upper() + port.port_id, 2 if locked else 1, 2 if connected else 1, 2 if disabled else 1,
+                paired, connected_name, 1, port.counter))
+        return rows
+
+    def port_show(self):
+        rows = [self.PORT_SHOW_HEADER]
+        east_rows = []
+        west_rows = []
+        for port_id in range(1, self.ports_count + 1):
+            east_row, west_row = self._port_rows(self.ports[str(port_id)])
+            east_rows.append(east_row)
+            west_rows.append(west_row)
+        return '\r\n'.join(rows + east_rows + west_rows)
+
+    def port_show_port(self, port_id):
+        port = self.ports.get(port_id)
+        if not port:
+            return 'Error: wrong port'
+        return '\r\n'.join([self.PORT_SHOW_HEADER] + self._port_rows(port))
+
+    def connection_create(self, src_port_id, dst_port_id):
+        with self._lock:
+            src_port = self.ports.get(src_port_id)
+            dst_port = self.ports.get(dst_port_id)
+            if not src_port or not dst_port or src_port_id == dst_port_id:
+                return 'Error: wrong port'
+            for port in (src_port, dst_port):
+                if port.east_locked or port.west_locked:
+                    return 'Error: port {} is locked'.format(port.port_id)
+                if port.east_disabled or port.west_disabled:
+                    return 'Error: port {} is disabled'.format(port.port_id)
+                if port.connected:
+                    return 'Error: port {} is already connected'.format(port.port_id)
+            src_port.previous_connected = dst_port.previous_connected = None
+            self._set_connected(src_port_id, dst_port_id, time.time())
+            return ''
+
+    def connection_disconnect(self, src_port_id, dst_port_id):
+        with self._lock:
+            src_port = self.ports.get(src_port_id)
+            dst_port = self.ports.get(dst_port_id)
+            if not src_port or not dst_port or src_port.connected != dst_port_id:
+                return 'Error: ports are not connected'
+            for port in (src_port, dst_port):
+                if port.east_locked or port.west_locked:
+                    return 'Error: port {} is locked'.format(port.port_id)
+            now = time.time()
+            for port in (src_port, dst_port):
+                port.previous_connected = port.connected
+                port.connected, port.connected_since = None, now
+            return ''
+
+    def execute(self, command):
+        """
+        Execute CLI command and return the device output, the command echo is not included
+        :param command: 'port show', 'connection create 1 to 2'
+        :type command: str
+        :rtype: str
+        """
+        command = command.strip()
+        connect_match = re.match(r'connection\s+create\s+(\d+)\s+to\s+(\d+)$', command)
+        disconnect_match = re.match(r'connection\s+disconnect\s+(\d+)\s+from\s+(\d+)$', command)
+        port_show_match = re.match(r'port\s+show\s+(\d+)$', command)
+        if command == 'show board':
+            output = self.show_board()
+        elif command == 'port show':
+            output = self.port_show()
+        elif command == 'port show logic table':
+            output = self.port_show_logic_table()
+        elif port_show_match and self.narrow_query:
+            output = self.port_show_port(port_show_match.group(1))
+        elif connect_match:
+            output = self.connection_create(*connect_match.groups())
+        elif disconnect_match:
+            output = self.connection_disconnect(*disconnect_match.groups())
+        else:
+            output = 'Error: unknown command'
+        return '{0}\r\n{1}'.format(output, self.PROMPT)
+
+
+class SimulatorCliService(CliService):
+    """
+    Cli service backed by AfmSimulator, error_map is applied as the real session does
+    """
+
+    def __init__(self, simulator, logger, response_time=0):
+        """
+        :type simulator: AfmSimulator
+        :param response_time: seconds the device takes to answer a command
+        :type response_time: float
+        """
+        self._simulator = simulator
+        self._logger = logger
+        self._response_time = response_time
+
+    def reconnect(self, timeout=None):
+        pass
+
+    def enter_mode(self, command_mode):
+        pass
+
+    def send_command(self, command, expected_string=None, action_map=None, error_map=None, logger=None, *args,
+                     **kwargs):
+        self._logger.debug(command)
+        if self._response_time:
+            time.sleep(self._response_time)
+        output = self._simulator.execute(command)
+        for error_pattern, error in (error_map or {}).iteritems():
+            if re.search(error_pattern, output, re.DOTALL):
+                if isinstance(error, CommandExecutionException):
+                    raise error
+                raise CommandExecutionException('Session returned \'{}\''.format(error))
+        return output
+
+
+class SimulatorSessionContextManager(object):
+    """
+    Limits concurrent sessions to the pool size, as the session pool of the real device does
+    """
+
+    def __init__(self, cli_service, sessions_semaphore):
+        self._cli_service = cli_service
+        self._sessions_semaphore = sessions_semaphore
+
+    def __enter__(self):
+        self._sessions_semaphore.acquire()
+        return self._cli_service
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._sessions_semaphore.release()
+
+
+class SimulatorCliHandler(L1CliHandler):
+    """
+    Cli handler wired to a local AfmSimulator instead of the device
+    """
+
+    def __init__(self, simulator, logger, response_time=0, pool_size=1):
+        """
+        :type simulator: AfmSimulator
+        :param response_time: seconds the simulated device takes to answer a command
+        :param pool_size: concurrent sessions allowed
+        """
+        self._logger = logger
+        self._cli_service = SimulatorCliService(simulator, logger, response_time)
+        self._sessions_semaphore = threading.BoundedSemaphore(pool_size)
+        self._logger.info('Using simulated device, {0} ports, response time {1}s, {2} sessions'.format(
+            simulator.ports_count, response_time, pool_size))
+
+    def get_cli_service(self, command_mode):
+        return trace_session(SimulatorSessionContextManager(self._cli_service, self._sessions_semaphore),
+                             self._logger)
+
+    def define_session_attributes(self, address, username, password):
+        pass
+
+    def default_mode_service(self):
+        return self.get_cli_service(None)
+
@@ -0,0 +1,111 @@
+import time
+
+
+class AttributeNotAvailableException(Exception):
+    pass
+
+
+class AttributesSnapshot(object):
+    """
+    Chassis and port attribute values answered from one parsed read of the device, values are memoized
+    """
+    CHASSIS_ATTRIBUTES = {
+        'Serial Number': 'serial_number',
+        'Model Name': 'model_name',
+        'OS Version': 'sw_version',
+    }
+    PORT_ATTRIBUTES = ['Admin Lock State', 'HW Admin State', 'Oper State', 'Connection Counter', 'Connected To']
+    CHASSIS_HISTORY_ATTRIBUTES = ['Slowest Ports']
+    PORT_HISTORY_ATTRIBUTES = ['Mapping Latency']
+    SLOWEST_PORTS_COUNT = 10
+    OPER_STATES = {'1': 'Disconnected', '2': 'Connected', '6': 'Attached'}
+
+    def __init__(self, address, board_table=None, ports_status=None, latency_history=None):
+        """
+        :param address: chassis address, '192.168.42.240'
+        :param board_table: parsed 'show board', AutoloadActions.board_table()
+        :type board_table: dict
+        :param ports_status: parsed 'port show', AutoloadActions.ports_status_table()
+        :type ports_status: dict
+        :param latency_history: mapping latency history of the chassis
+        :type latency_history: fiberzone_afm.helpers.latency_history.LatencyHistory
+        """
+        self.address = address
+        self.board_table = board_table
+        self.ports_status = ports_status
+        self.latency_history = latency_history
+        self.timestamp = time.time()
+        self._values = {}
+
+    @staticmethod
+    def is_chassis_address(cs_address):
+        return len(cs_address.split('/')) == 1
+
+    @classmethod
+    def is_supported(cls, cs_address, attribute_name):
+        if cls.is_chassis_address(cs_address):
+            return attribute_name in cls.CHASSIS_ATTRIBUTES or attribute_name in cls.CHASSIS_HISTORY_ATTRIBUTES
+        return len(cs_address.split('/')) == 3 and (
+            attribute_name in cls.PORT_ATTRIBUTES or attribute_name in cls.PORT_HISTORY_ATTRIBUTES)
+
+    @classmethod
+    def is_history_attribute(cls, attribute_name):
+        """
+        Attribute answered from the latency history, the device is not read for it
+        """
+        return attribute_name in cls.CHASSIS_HISTORY_ATTRIBUTES or attribute_name in cls.PORT_HISTORY_ATTRIBUTES
+
+    def get_value(self, cs_address, attribute_name):
+        """
+        Attribute value
+        :param cs_address: '192.168.42.240' or '192.168.42.240/1_90/21'
+        :param attribute_name: 'Serial Number', 'Oper State'
+        :rtype: str
+        """
+        key = (cs_address, attribute_name)
+        if key not in self._values:
+            self._values[key] = self._build_value(cs_address, attribute_name)
+        return self._values[key]
+
+    def _build_value(self, cs_address, attribute_name):
+        if not self.is_supported(cs_address, attribute_name):
+            raise AttributeNotAvailableException(
+                self.__class__.__name__, 'Attribute {0} for {1} is not available'.format(attribute_name, cs_address))
+
+        if self.is_history_attribute(attribute_name):
+            return self._build_history_value(cs_address, attribute_name)
+
+        if self.is_chassis_address(cs_address):
+            return self.board_table.get(self.CHASSIS_ATTRIBUTES[attribute_name])
+
+        port_id = cs_address.split('/')[-1]
+        port_info = self.ports_status.get(port_id)
+        if not port_info:
+            raise AttributeNotAvailableException(self.__class__.__name__,
+                                                 'Port {} is not found on the device'.format(port_id))
+        east_port = port_info.east_port
+        west_port = port_info.west_port
+        if attribute_name == 'Admin Lock State':
+            return 'Locked' if east_port.locked or west_port.locked else 'Unlocked'
+        elif attribute_name == 'HW Admin State':
+            return 'Disabled' if east_port.disabled or west_port.disabled else 'Enabled'
+        elif attribute_name == 'Oper State':
+            east_state = self.OPER_STATES.get(east_port.oper_state, east_port.oper_state)
+            west_state = self.OPER_STATES.get(west_port.oper_state, west_port.oper_state)
+            if east_state == west_state:
+                return east_state
+            return 'East {0}, West {1}'.format(east_state, west_state)
+        elif attribute_name == 'Connection Counter':
+            return str(max(east_port.counter, west_port.counter))
+        else:
+            return east_port.connected if east_port.connected == west_port.connected else None
+
+    def _build_history_value(self, cs_address, attribute_name):
+        if not self.latency_history:
+            return None
+        if attribute_name == 'Slowest Ports':
+            return ', '.join('{0}: {1:.1f}s{2}'.format(
+                port_id, latency, ' (counter {})'.format(counter) if counter is not None else '') for
+                port_id, latency, counter in self.latency_history.slowest_ports(self.SLOWEST_PORTS_COUNT)) or None
+        latency = self.latency_history.port_latency(cs_address.split('/')[-1])
+        return '{:.1f}'.format(latency) if latency is not None else None
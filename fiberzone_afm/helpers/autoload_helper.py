@@ -12,6 +12,21 @@ class AutoloadHelper(object):
 
         self._chassis_id = '1'
 
+    @staticmethod
+    def merge_ports_table(port_logic_table, port_connections_table):
+        """
+        Ports table of the logical ports, blades from the logic table with lock state and connections of the east ports
+        :type port_logic_table: dict
+        :type port_connections_table: dict
+        :rtype: dict
+        """
+        ports_table = {}
+        for port_id, port_logic_record in port_logic_table.iteritems():
+            port_record = dict(port_logic_record)
+            port_record.update(port_connections_table.get(port_id, {}))
+            ports_table[port_id] = port_record
+        return ports_table
+
     def _build_chassis(self):
         chassis_dict = {}
 
@@ -34,34 +49,43 @@ class AutoloadHelper(object):
         return blade
 
     def _build_ports_and_blades(self, chassis_dict):
+        """
+        Build blades and ports in one pass over the ports table, mappings are collected on the way
+        :return: ports dict and list of (src_port_id, dst_port_id) mappings
+        :rtype: tuple
+        """
+        chassis = chassis_dict.get(self._chassis_id)
         blades_dict = {}
         ports_dict = {}
+        mappings = []
         for port_id, port_record in self._ports_table.iteritems():
             blade_id = port_record.get('blade')
-            if blade_id not in blades_dict:
+            blade = blades_dict.get(blade_id)
+            if blade is None:
                 blade = self._build_blade(blade_id)
+                blade.set_parent_resource(chassis)
                 blades_dict[blade_id] = blade
-                blade.set_parent_resource(chassis_dict.get(self._chassis_id))
-            else:
-                blade = blades_dict.get(blade_id)
 
             port = Port(port_id, 'Generic L1 Port', 'NA')
             port.set_model_name('Port Paired')
             port.set_parent_resource(blade)
             ports_dict[port_id] = port
-        return ports_dict
 
-    def _build_mappings(self, ports_dict):
-        for port_id, port_record in self._ports_table.iteritems():
             connected_to = port_record.get('connected')
             if connected_to:
-                src_port = ports_dict.get(port_id)
-                dst_port = ports_dict.get(connected_to)
-                if src_port and dst_port:
-                    src_port.add_mapping(dst_port)
+                mappings.append((port_id, connected_to))
+        return ports_dict, mappings
+
+    @staticmethod
+    def _build_mappings(ports_dict, mappings):
+        for src_port_id, dst_port_id in mappings:
+            src_port = ports_dict.get(src_port_id)
+            dst_port = ports_dict.get(dst_port_id)
+            if src_port and dst_port:
+                src_port.add_mapping(dst_port)
 
     def build_structure(self):
         chassis_dict = self._build_chassis()
-        ports_dict = self._build_ports_and_blades(chassis_dict)
-        self._build_mappings(ports_dict)
+        ports_dict, mappings = self._build_ports_and_blades(chassis_dict)
+        self._build_mappings(ports_dict, mappings)
         return chassis_dict.values()
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from fiberzone_afm.command_actions.autoload_actions import AutoloadActions
+from fiberzone_afm.helpers.autoload_helper import AutoloadHelper
+from fiberzone_afm.helpers.tracer import TRACER
+
+
+class AutoloadPipeline(object):
+    """
+    Autoload reads 'show board', 'port show logic table' and 'port show' are independent. In parallel mode every
+    read runs in its own thread on its own pooled session and is parsed as soon as its output arrives, so autoload
+    takes about the slowest read instead of the sum of them. Sessions above CLI.SESSION_POOL_SIZE wait for
+    the pool, with pool size 1 the reads run one after another.
+    """
+    STAGES = ['board_table', 'port_logic_table', 'port_connections_table']
+
+    def __init__(self, cli_handler, logger, parallel=False):
+        """
+        :type cli_handler: fiberzone_afm.cli.fiberzone_cli_handler.FiberzoneCliHandler
+        :type logger: logging.Logger
+        :param parallel: read over separate sessions concurrently
+        """
+        self._cli_handler = cli_handler
+        self._logger = logger
+        self._parallel = parallel
+        self.timings = {}
+
+    def _read_stage(self, stage, session):
+        start_time = time.time()
+        try:
+            return getattr(AutoloadActions(session, self._logger), stage)()
+        finally:
+            self.timings[stage] = time.time() - start_time
+
+    def _read_stage_on_own_session(self, stage, results, errors, request):
+        try:
+            with TRACER.join_request(request):
+                with self._cli_handler.default_mode_service() as session:
+                    results[stage] = self._read_stage(stage, session)
+        except Exception as e:
+            self._logger.exception('Autoload read {} failed'.format(stage))
+            errors[stage] = e
+
+    def _read_parallel(self):
+        results = {}
+        errors = {}
+        # Stage spans belong to the calling command, not to requests of their own threads
+        request = TRACER.current_request()
+        threads = [threading.Thread(target=self._read_stage_on_own_session, args=(stage, results, errors, request),
+                                    name='autoload-{}'.format(stage)) for stage in self.STAGES]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for stage in self.STAGES:
+            if stage in errors:
+                raise errors[stage]
+        return results
+
+    def _read_sequential(self):
+        with self._cli_handler.default_mode_service() as session:
+            return dict((stage, self._read_stage(stage, session)) for stage in self.STAGES)
+
+    def read(self):
+        """
+        Read and parse the autoload tables
+        :return: board table and ports table
+        :rtype: tuple
+        """
+        self.timings = {}
+        start_time = time.time()
+        results = self._read_parallel() if self._parallel else self._read_sequential()
+        self.timings['total'] = time.time() - start_time
+        self._logger.info('Autoload {0} reads: {1}'.format(
+            'parallel' if self._parallel else 'sequential',
+            ', '.join('{0} {1:.3f}s'.format(stage, self.timings[stage]) for stage in self.STAGES + ['total'])))
+        return results['board_table'], AutoloadHelper.merge_ports_table(results['port_logic_table'],
+                                                                        results['port_connections_table'])
@@ -0,0 +1,117 @@
+import cProfile
+import os
+import pstats
+import random
+import threading
+import time
+from datetime import datetime
+from functools import wraps
+
+
+class CommandProfiler(object):
+    """
+    Opt-in cProfile of driver commands, every sampled command is saved as a profile dump and a text summary
+    with wall time split into device I/O, parsing and sleep
+    """
+    DRIVER_NAME = 'fiberzone_afm'
+    DEFAULT_COMMANDS = ['login', 'get_resource_description', 'map_bidi', 'map_clear', 'map_clear_to',
+                        'get_attribute_value', 'get_attribute_values']
+    IO_FUNCTIONS = [('command_template_executor.py', 'execute_command'),
+                    ('session_pool_context_manager.py', '__enter__')]
+    SLEEP_FUNCTION = '<time.sleep>'
+    CLI_LIBRARY_PATH = os.path.join('cloudshell', 'cli')
+
+    def __init__(self, logger, runtime_config):
+        """
+        :type logger: logging.Logger
+        :type runtime_config: cloudshell.layer_one.core.helper.runtime_configuration.RuntimeConfiguration
+        """
+        self._logger = logger
+        self._enabled = runtime_config.read_key('PROFILING.ENABLED', False)
+        self._sample_rate = float(runtime_config.read_key('PROFILING.SAMPLE_RATE', 1))
+        self._commands = runtime_config.read_key('PROFILING.COMMANDS', self.DEFAULT_COMMANDS)
+        self._retention = int(runtime_config.read_key('PROFILING.RETENTION', 50))
+        self._profiles_path = os.path.join(os.environ.get('LOG_PATH', 'Logs'), self.DRIVER_NAME, 'profiles')
+        self._local = threading.local()
+        self._files_lock = threading.Lock()
+
+    def wrap(self, driver_instance):
+        """
+        Replace configured command methods of the driver instance with profiled ones
+        :param driver_instance:
+        :type driver_instance: fiberzone_afm.driver_commands.DriverCommands
+        """
+        if not self._enabled:
+            return
+        for command_name in self._commands:
+            method = getattr(driver_instance, command_name, None)
+            if method:
+                setattr(driver_instance, command_name, self._profiled(command_name, method))
+        self._logger.info('Profiling enabled for {0}, sample rate {1}, saving to {2}'.format(
+            ', '.join(self._commands), self._sample_rate, self._profiles_path))
+
+    def _profiled(self, command_name, method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            if getattr(self._local, 'active', False) or random.random() >= self._sample_rate:
+                return method(*args, **kwargs)
+            profile = cProfile.Profile()
+            self._local.active = True
+            start_time = time.time()
+            try:
+                return profile.runcall(method, *args, **kwargs)
+            finally:
+                wall_time = time.time() - start_time
+                self._local.active = False
+                try:
+                    self._save(command_name, profile, wall_time)
+                except Exception:
+                    self._logger.exception('Cannot save profile for {}'.format(command_name))
+
+        return wrapper
+
+    def _time_split(self, stats, wall_time):
+        """
+        Split wall time, I/O is time spent in CLI command execution and session acquire (sleeps of the cli library
+        included), sleep is time.sleep called by the driver itself, the rest is local parsing and processing
+        :type stats: pstats.Stats
+        :rtype: dict
+        """
+        io_time = 0
+        sleep_time = 0
+        for (file_name, line, function_name), (_, _, _, cumulative, callers) in stats.stats.iteritems():
+            if any(file_name.endswith(io_file) and function_name == io_function for io_file, io_function in
+                   self.IO_FUNCTIONS):
+                io_time += cumulative
+            elif function_name == self.SLEEP_FUNCTION:
+                sleep_time += sum(caller_stats[3] for caller, caller_stats in callers.iteritems() if
+                                  self.CLI_LIBRARY_PATH not in caller[0])
+        return {'wall': wall_time, 'io': io_time, 'sleep': sleep_time,
+                'parsing': max(wall_time - io_time - sleep_time, 0)}
+
+    def _save(self, command_name, profile, wall_time):
+        if not os.path.isdir(self._profiles_path):
+            os.makedirs(self._profiles_path)
+        file_prefix = os.path.join(self._profiles_path, '{0}--{1}--{2}'.format(
+            datetime.now().strftime('%Y-%m-%d--%H-%M-%S-%f'), command_name, threading.current_thread().ident))
+        profile.dump_stats(file_prefix + '.prof')
+
+        with open(file_prefix + '.txt', 'w') as summary_file:
+            stats = pstats.Stats(profile, stream=summary_file)
+            time_split = self._time_split(stats, wall_time)
+            summary = 'Command {0}: wall {wall:.3f}s, device I/O {io:.3f}s, parsing {parsing:.3f}s, ' \
+                      'sleep {sleep:.3f}s'.format(command_name, **time_split)
+            summary_file.write(summary + '\n\n')
+            stats.sort_stats('cumulative').print_stats(30)
+        self._logger.info('{0}, profile {1}.prof'.format(summary, file_prefix))
+        self._apply_retention()
+
+    def _apply_retention(self):
+        with self._files_lock:
+            file_names = sorted(file_name for file_name in os.listdir(self._profiles_path) if
+                                file_name.endswith('.prof'))
+            for file_name in file_names[:max(len(file_names) - self._retention, 0)]:
+                for extension in ('.prof', '.txt'):
+                    file_path = os.path.join(self._profiles_path, file_name[:-len('.prof')] + extension)
+                    if os.path.exists(file_path):
+                        os.remove(file_path)
@@ -0,0 +1,77 @@
+import threading
+
+
+class FirmwareCapabilities(object):
+    """
+    Capabilities probed once per chassis and firmware version, shared by all driver instances of the process
+    """
+    NARROW_PORT_QUERY = 'narrow_port_query'
+
+    _cache = {}
+    _sw_versions = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, logger):
+        """
+        :type logger: logging.Logger
+        """
+        self._logger = logger
+
+    def is_supported(self, address, sw_version, capability, probe):
+        """
+        Cached probe result, the probe is executed when the chassis firmware is not probed yet
+        :param address: chassis address
+        :param sw_version: 'ACTIVE SW VER' of the chassis
+        :param capability: capability name
+        :param probe: function returning True if the capability is supported
+        :rtype: bool
+        """
+        key = (address, sw_version, capability)
+        with self._cache_lock:
+            if key in self._cache:
+                return self._cache[key]
+        supported = bool(probe())
+        with self._cache_lock:
+            self._cache[key] = supported
+        self._logger.info('Chassis {0}, firmware {1}: {2} {3}'.format(
+            address, sw_version, capability, 'supported' if supported else 'not supported'))
+        return supported
+
+    @classmethod
+    def sw_version(cls, address):
+        """
+        Firmware version of the chassis read on the last Login, None if not known yet
+        """
+        with cls._cache_lock:
+            return cls._sw_versions.get(address)
+
+    @classmethod
+    def update_sw_version(cls, address, sw_version):
+        """
+        Remember the firmware version of the chassis, results probed before the version was known are kept
+        for it, results of other versions are forgotten
+        :param address: chassis address
+        :param sw_version: 'ACTIVE SW VER' of the chassis
+        """
+        with cls._cache_lock:
+            cls._sw_versions[address] = sw_version
+            for key in list(cls._cache):
+                key_address, key_sw_version, capability = key
+                if key_address != address or key_sw_version == sw_version:
+                    continue
+                supported = cls._cache.pop(key)
+                if key_sw_version is None:
+                    cls._cache.setdefault((address, sw_version, capability), supported)
+
+    @classmethod
+    def invalidate(cls, address=None):
+        """
+        Forget probe results of the chassis, all chassis if address is not set
+        """
+        with cls._cache_lock:
+            for key in list(cls._cache):
+                if address is None or key[0] == address:
+                    del cls._cache[key]
+            for key in list(cls._sw_versions):
+                if address is None or key == address:
+                    del cls._sw_versions[key]
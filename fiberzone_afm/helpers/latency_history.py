@@ -0,0 +1,250 @@
+import json
+import os
+import tempfile
+import threading
+import time
+
+
+class MappingSchedule(object):
+    """
+    Timeout and confirmation poll delays of one mapping
+    """
+
+    def __init__(self, timeout, check_delay, expected=None, slowest=None, fine_delay=1):
+        """
+        :param timeout: mapping timeout, seconds
+        :param check_delay: poll delay when the port pair has no history
+        :param expected: time before the first poll worth doing, the fastest observed duration
+        :param slowest: fine polling lasts until the slowest observed duration
+        :param fine_delay: poll delay between expected and slowest
+        """
+        self.timeout = timeout
+        self._check_delay = check_delay
+        self._expected = expected
+        self._slowest = slowest
+        self._fine_delay = min(fine_delay, check_delay)
+
+    def next_delay(self, elapsed):
+        """
+        Delay before the next confirmation poll
+        :param elapsed: seconds since the connection command
+        :rtype: float
+        """
+        if self._expected is not None:
+            if elapsed < self._expected:
+                return max(self._expected - elapsed, self._fine_delay)
+            if elapsed < self._slowest:
+                return self._fine_delay
+        return self._check_delay
+
+
+class LatencyHistory(object):
+    """
+    Bounded on-disk history of one chassis, connect and disconnect durations per port pair with the connection
+    counters of the ports read when the mapping was confirmed. Keeps MAX_SAMPLES durations per pair and MAX_PAIRS recently used pairs. Updates are written to the file
+    by a timer thread SAVE_DELAY seconds after the first unsaved update, so mappings do not wait for the disk.
+    """
+    FORMAT_VERSION = 1
+    CONNECT = 'connect'
+    DISCONNECT = 'disconnect'
+    SAVE_DELAY = 1
+    MOVEFILE_REPLACE_EXISTING = 0x1
+    MOVEFILE_WRITE_THROUGH = 0x8
+
+    def __init__(self, history_path, logger, max_samples=20, max_pairs=1000, save_delay=SAVE_DELAY):
+        """
+        :param history_path: json file path
+        :type logger: logging.Logger
+        :param save_delay: seconds updates are collected before the file is written
+        """
+        self._history_path = history_path
+        self._logger = logger
+        self._max_samples = max_samples
+        self._max_pairs = max_pairs
+        self._save_delay = save_delay
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._save_timer = None
+        self._pairs = self._load()
+
+    def _load(self):
+        if not os.path.isfile(self._history_path):
+            return {}
+        try:
+            with open(self._history_path) as history_file:
+                data = json.load(history_file)
+            if data.get('version') == self.FORMAT_VERSION:
+                return data.get('pairs', {})
+            self._logger.warning('Latency history {} has unsupported version, starting a new one'.format(
+                self._history_path))
+        except Exception:
+            self._logger.exception('Cannot read latency history {}'.format(self._history_path))
+        return {}
+
+    def _replace(self, source_path, destination_path):
+        """
+        Atomically replace the destination file, readers see either the old or the new history
+        """
+        if os.name == 'nt':
+            import ctypes
+            if not ctypes.windll.kernel32.MoveFileExW(unicode(source_path), unicode(destination_path),
+                                                      self.MOVEFILE_REPLACE_EXISTING | self.MOVEFILE_WRITE_THROUGH):
+                raise ctypes.WinError()
+        else:
+            os.rename(source_path, destination_path)
+
+    def _save(self, data):
+        history_dir = os.path.dirname(self._history_path)
+        if history_dir and not os.path.isdir(history_dir):
+            os.makedirs(history_dir)
+        file_descriptor, temp_path = tempfile.mkstemp(prefix=os.path.basename(self._history_path) + '.',
+                                                      suffix='.tmp', dir=history_dir or None)
+        try:
+            with os.fdopen(file_descriptor, 'w') as history_file:
+                history_file.write(data)
+                history_file.flush()
+                os.fsync(history_file.fileno())
+            self._replace(temp_path, self._history_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def flush(self):
+        """
+        Write unsaved updates to the history file
+        """
+        with self._save_lock:
+            with self._lock:
+                if self._save_timer:
+                    self._save_timer.cancel()
+                    self._save_timer = None
+                data = json.dumps({'version': self.FORMAT_VERSION, 'pairs': self._pairs})
+            try:
+                self._save(data)
+            except Exception:
+                self._logger.exception('Cannot save latency history {}'.format(self._history_path))
+
+    def _schedule_save(self):
+        """
+        Start the save timer unless one is pending, called with the lock held
+        """
+        if not self._save_timer:
+            self._save_timer = threading.Timer(self._save_delay, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    @staticmethod
+    def _port_order(port_id):
+        return (0, int(port_id)) if str(port_id).isdigit() else (1, port_id)
+
+    def _pair_key(self, action, src_port_id, dst_port_id):
+        first_port_id, second_port_id = sorted((str(src_port_id), str(dst_port_id)), key=self._port_order)
+        return '{0}|{1}|{2}'.format(action, first_port_id, second_port_id)
+
+    def _update(self, action, src_port_id, dst_port_id, update):
+        with self._lock:
+            entry = self._pairs.setdefault(self._pair_key(action, src_port_id, dst_port_id),
+                                           {'samples': [], 'timeouts': 0})
+            update(entry)
+            entry['updated'] = time.time()
+            if len(self._pairs) > self._max_pairs:
+                for key in sorted(self._pairs, key=lambda pair_key: self._pairs[pair_key]['updated'])[
+                           :len(self._pairs) - self._max_pairs]:
+                    del self._pairs[key]
+            self._schedule_save()
+
+    def record(self, action, src_port_id, dst_port_id, duration, counters=None):
+        """
+        Record a confirmed mapping, the pair is not treated as timing out anymore
+        :param action: CONNECT or DISCONNECT
+        :param duration: seconds from the command to the confirmation
+        :param counters: port id to connection counter read with the confirmation
+        :type counters: dict
+        """
+
+        def update(entry):
+            sample = [int(time.time()), round(duration, 3), dict(
+                (str(port_id), counter) for port_id, counter in (counters or {}).iteritems() if counter is not None)]
+            entry['samples'] = (entry['samples'] + [sample])[-self._max_samples:]
+            entry['timeouts'] = 0
+            entry.pop('last_timeout', None)
+
+        self._update(action, src_port_id, dst_port_id, update)
+
+    def record_timeout(self, action, src_port_id, dst_port_id, timeout):
+        def update(entry):
+            entry['timeouts'] += 1
+            entry['last_timeout'] = timeout
+
+        self._update(action, src_port_id, dst_port_id, update)
+
+    def durations(self, action, src_port_id, dst_port_id):
+        with self._lock:
+            entry = self._pairs.get(self._pair_key(action, src_port_id, dst_port_id), {})
+            return [sample[1] for sample in entry.get('samples', [])]
+
+    def schedule(self, action, src_port_id, dst_port_id, timeout, check_delay, timeout_factor=2, max_timeout=600,
+                 fine_delay=1):
+        """
+        Mapping schedule of the port pair, known slow pairs get a longer timeout than the global one,
+        polls of known pairs start shortly before the fastest observed mapping
+        :param timeout: global mapping timeout
+        :param check_delay: global poll delay
+        :param timeout_factor: timeout is at least the slowest observed duration multiplied by the factor,
+            pairs which timed out since their last confirmed mapping get the last timeout multiplied by the factor
+        :param max_timeout: upper limit of the timeout
+        :rtype: MappingSchedule
+        """
+        with self._lock:
+            entry = self._pairs.get(self._pair_key(action, src_port_id, dst_port_id), {})
+            durations = [sample[1] for sample in entry.get('samples', [])]
+            if entry.get('timeouts'):
+                timeout = max(timeout, min(entry.get('last_timeout', timeout) * timeout_factor, max_timeout))
+        if not durations:
+            return MappingSchedule(timeout, check_delay)
+        return MappingSchedule(max(timeout, min(max(durations) * timeout_factor, max_timeout)), check_delay,
+                               min(durations) * 0.9, max(durations), fine_delay)
+
+    def _port_samples(self, action=CONNECT):
+        """
+        :return: port id to [(timestamp, duration, connection counter)]
+        :rtype: dict
+        """
+        port_samples = {}
+        with self._lock:
+            for key, entry in self._pairs.iteritems():
+                key_action, first_port_id, second_port_id = key.split('|')
+                if key_action != action:
+                    continue
+                for port_id in (first_port_id, second_port_id):
+                    port_samples.setdefault(port_id, []).extend(
+                        (sample[0], sample[1], sample[2].get(port_id) if len(sample) > 2 else None) for sample in
+                        entry['samples'])
+        return port_samples
+
+    @staticmethod
+    def _median(values):
+        values = sorted(values)
+        return values[len(values) // 2]
+
+    def port_latency(self, port_id, action=CONNECT):
+        """
+        Median duration of mappings of the port
+        :rtype: float
+        """
+        samples = self._port_samples(action).get(str(port_id))
+        return self._median([duration for _, duration, _ in samples]) if samples else None
+
+    def slowest_ports(self, count, action=CONNECT):
+        """
+        Ports with the longest median mapping duration and their last known connection counter
+        :rtype: list[tuple]
+        :return: [(port id, median duration, connection counter or None)]
+        """
+        latencies = []
+        for port_id, samples in self._port_samples(action).iteritems():
+            counters = [(timestamp, counter) for timestamp, _, counter in samples if counter is not None]
+            latencies.append((port_id, self._median([duration for _, duration, _ in samples]),
+                              max(counters)[1] if counters else None))
+        return sorted(latencies, key=lambda latency: latency[1], reverse=True)[:count]
@@ -0,0 +1,64 @@
+import threading
+from contextlib import contextmanager
+
+from fiberzone_afm.helpers.tracer import TRACER
+
+
+class PortLocker(object):
+    """
+    Per-port locks of every chassis, always acquired in the same order to avoid deadlocks between concurrent mappings
+    """
+
+    def __init__(self):
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    def _get_lock(self, key):
+        """
+        Lock of the port, registered as used until released with _put_lock
+        """
+        with self._locks_lock:
+            if key not in self._locks:
+                self._locks[key] = [threading.Lock(), 0]
+            self._locks[key][1] += 1
+            return self._locks[key][0]
+
+    def _put_lock(self, key):
+        """
+        Drop the lock of the port when no thread holds or waits for it
+        """
+        with self._locks_lock:
+            self._locks[key][1] -= 1
+            if not self._locks[key][1]:
+                del self._locks[key]
+
+    @staticmethod
+    def _order_key(port_id):
+        port_id = str(port_id)
+        return (0, int(port_id), port_id) if port_id.isdigit() else (1, 0, port_id)
+
+    @contextmanager
+    def lock(self, address, *port_ids):
+        """
+        Lock ports of the chassis for the duration of the context
+        :param address: chassis address, '192.168.42.240'
+        :param port_ids: port ids, '21', '22'
+        :return:
+        """
+        acquired = []
+        try:
+            with TRACER.span('ports lock', 'lock', address=address, ports=port_ids):
+                for port_id in sorted(set(port_ids), key=self._order_key):
+                    key = (address, port_id)
+                    port_lock = self._get_lock(key)
+                    try:
+                        port_lock.acquire()
+                    except:
+                        self._put_lock(key)
+                        raise
+                    acquired.append((key, port_lock))
+            yield
+        finally:
+            for key, port_lock in reversed(acquired):
+                port_lock.release()
+                self._put_lock(key)
@@ -0,0 +1,102 @@
+import json
+import threading
+import time
+
+from cloudshell.cli.cli_service import CliService
+from cloudshell.cli.session.session_exceptions import CommandExecutionException
+from fiberzone_afm.cli.cli_recorder import CliRecorder
+from fiberzone_afm.cli.l1_cli_handler import L1CliHandler
+from fiberzone_afm.helpers.test_cli import TestCliContextManager
+
+
+class CliCorpus(object):
+    """
+    Recorded CLI corpus, written by fiberzone_afm.cli.cli_recorder.CliRecorder
+    """
+
+    def __init__(self, corpus_path):
+        with open(corpus_path) as corpus_file:
+            lines = [line for line in corpus_file if line.strip()]
+        if not lines:
+            raise Exception(self.__class__.__name__, 'Corpus {} is empty'.format(corpus_path))
+        self.header = json.loads(lines[0])
+        if self.header.get('format') != CliRecorder.CORPUS_FORMAT:
+            raise Exception(self.__class__.__name__, 'File {} is not a CLI corpus'.format(corpus_path))
+        if self.header.get('version', 0) > CliRecorder.CORPUS_VERSION:
+            raise Exception(self.__class__.__name__,
+                            'Corpus version {} is not supported'.format(self.header.get('version')))
+        self.records = [json.loads(line) for line in lines[1:]]
+
+
+class ReplayCliService(CliService):
+    """
+    Serves recorded outputs in the recorded order, so the device state changes the same way it did,
+    and waits the recorded response time multiplied by time_scale
+    """
+
+    def __init__(self, corpus, time_scale, logger):
+        """
+        :type corpus: CliCorpus
+        :param time_scale: response time multiplier, 0 replays without delays
+        :type time_scale: float
+        """
+        self._records = corpus.records
+        self._time_scale = time_scale
+        self._logger = logger
+        self._cursor = 0
+        self._last_records = {}
+        self._lock = threading.Lock()
+
+    def reconnect(self, timeout=None):
+        pass
+
+    def enter_mode(self, command_mode):
+        pass
+
+    def _next_record(self, command):
+        """
+        Next record of the command after the cursor, the last served record of the command when the corpus
+        has no more of them
+        """
+        with self._lock:
+            for index in xrange(self._cursor, len(self._records)):
+                if self._records[index].get('command') == command:
+                    self._cursor = index + 1
+                    self._last_records[command] = self._records[index]
+                    return self._records[index]
+
+            record = self._last_records.get(command)
+            if record is None:
+                for index in xrange(min(self._cursor, len(self._records)) - 1, -1, -1):
+                    if self._records[index].get('command') == command:
+                        record = self._records[index]
+                        break
+            if record is None:
+                raise Exception(self.__class__.__name__, 'Command "{}" is not recorded in the corpus'.format(command))
+            return record
+
+    def send_command(self, command, expected_string=None, action_map=None, error_map=None, logger=None, *args,
+                     **kwargs):
+        self._logger.debug(command)
+        record = self._next_record(command)
+        if self._time_scale and record.get('response_time'):
+            time.sleep(record['response_time'] * self._time_scale)
+        if record.get('error'):
+            raise CommandExecutionException(record['error'])
+        return record.get('output')
+
+
+class ReplayCliHandler(L1CliHandler):
+    def __init__(self, corpus_path, logger, time_scale=1):
+        self._logger = logger
+        self._cli_service = TestCliContextManager(ReplayCliService(CliCorpus(corpus_path), time_scale, logger))
+        self._logger.info('Replaying CLI corpus {0}, time scale {1}'.format(corpus_path, time_scale))
+
+    def get_cli_service(self, command_mode):
+        return self._cli_service
+
+    def define_session_attributes(self, address, username, password):
+        pass
+
+    def default_mode_service(self):
+        return self._cli_service
@@ -0,0 +1,99 @@
+import threading
+from copy import deepcopy
+from xml.etree.ElementTree import Element, SubElement
+
+from cloudshell.layer_one.core.response.response_info import ResourceDescriptionResponseInfo
+
+
+class CachedResourceInfoBuilder(object):
+    """
+    Builds the same xml as cloudshell ResourceInfoBuilder without parsing templates for every node,
+    nodes of leaf resources (ports) are reused between autoloads while the port is unchanged. Every response gets
+    its own copy of the cached node.
+    """
+    MAX_CACHE_SIZE = 4096
+
+    _leaf_nodes = {}
+    _leaf_nodes_lock = threading.Lock()
+
+    @staticmethod
+    def _leaf_key(resource_info, address):
+        return (resource_info.name, resource_info.family_name, resource_info.model_name, resource_info.serial_number,
+                address, tuple((attribute.name, attribute.type, attribute.value) for attribute in
+                               resource_info.attributes),
+                resource_info.mapping.address if resource_info.mapping else None)
+
+    @staticmethod
+    def _build_resource_node(resource_info, address):
+        """
+        Mirrors resource_template.xml including its whitespace, so the response stays byte to byte the same
+        :type resource_info: cloudshell.layer_one.core.response.resource_info.entities.base.ResourceInfo
+        :rtype: xml.etree.ElementTree.Element
+        """
+        node = Element('ResourceInfo', {'Name': resource_info.name, 'Address': address,
+                                        'ResourceFamilyName': resource_info.family_name,
+                                        'ResourceModelName': resource_info.model_name,
+                                        'SerialNumber': resource_info.serial_number})
+        node.text = '\n    '
+        SubElement(node, 'ChildResources').tail = '\n    '
+        attributes_node = SubElement(node, 'ResourceAttributes')
+        attributes_node.tail = '\n'
+        for attribute in resource_info.attributes:
+            SubElement(attributes_node, 'Attribute', {'Name': attribute.name, 'Type': attribute.type,
+                                                      'Value': attribute.value})
+        if resource_info.mapping:
+            mapping_node = SubElement(node, 'ResourceMapping')
+            mapping_node.text = '\n    '
+            incoming_node = SubElement(mapping_node, 'IncomingMapping')
+            incoming_node.text = resource_info.mapping.address
+            incoming_node.tail = '\n'
+        return node
+
+    @classmethod
+    def _get_resource_node(cls, resource_info):
+        address = resource_info.address
+        if resource_info.child_resources:
+            return cls._build_resource_node(resource_info, address)
+
+        key = cls._leaf_key(resource_info, address)
+        with cls._leaf_nodes_lock:
+            node = cls._leaf_nodes.get(key)
+        if node is None:
+            node = cls._build_resource_node(resource_info, address)
+            with cls._leaf_nodes_lock:
+                if len(cls._leaf_nodes) >= cls.MAX_CACHE_SIZE:
+                    cls._leaf_nodes.clear()
+                cls._leaf_nodes[key] = node
+        return deepcopy(node)
+
+    @classmethod
+    def build_resource_info_nodes(cls, base_resource):
+        """
+        Build tree of xml nodes for resource tree
+        :type base_resource: cloudshell.layer_one.core.response.resource_info.entities.base.ResourceInfo
+        :rtype: xml.etree.ElementTree.Element
+        """
+        resource_node = cls._get_resource_node(base_resource)
+        cls._build_resource_child_nodes(resource_node, base_resource)
+        return resource_node
+
+    @classmethod
+    def _build_resource_child_nodes(cls, node, resource):
+        if resource.child_resources:
+            child_resources_node = node.find('ChildResources')
+            for child_resource in resource.child_resources.values():
+                child_resources_node.append(cls.build_resource_info_nodes(child_resource))
+
+
+class CachedResourceDescriptionResponseInfo(ResourceDescriptionResponseInfo):
+    """
+    Resource description serialized with CachedResourceInfoBuilder
+    """
+
+    def build_xml_node(self):
+        response_info_node = self._build_response_info_node()
+        response_info_node.attrib['xmlns:xsi'] = 'http://www.w3.org/2001/XMLSchema-instance'
+        response_info_node.attrib['xsi:type'] = 'ResourceInfoResponse'
+        for resource_info in self.resource_info_list:
+            response_info_node.append(CachedResourceInfoBuilder.build_resource_info_nodes(resource_info))
+        return response_info_node
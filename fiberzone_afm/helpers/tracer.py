@@ -0,0 +1,240 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+from cloudshell.cli.cli_service import CliService
+
+
+class Tracer(object):
+    """
+    Span tracer with Chrome trace JSON export, traces open in chrome://tracing and ui.perfetto.dev.
+    Spans of one thread nest, the outermost span is a request. In 'request' mode every request is saved
+    to its own file, in 'window' mode requests finished during the window are saved together.
+    """
+    DRIVER_NAME = 'fiberzone_afm'
+    MODE_REQUEST = 'request'
+    MODE_WINDOW = 'window'
+
+    def __init__(self):
+        self._enabled = False
+        self._logger = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._window_events = []
+        self._window_start = time.time()
+
+    def configure(self, logger, runtime_config):
+        """
+        :type logger: logging.Logger
+        :type runtime_config: cloudshell.layer_one.core.helper.runtime_configuration.RuntimeConfiguration
+        """
+        self._logger = logger
+        self._enabled = runtime_config.read_key('TRACING.ENABLED', False)
+        self._mode = runtime_config.read_key('TRACING.MODE', self.MODE_REQUEST)
+        self._window = float(runtime_config.read_key('TRACING.WINDOW', 60))
+        self._min_duration = float(runtime_config.read_key('TRACING.MIN_DURATION', 0))
+        self._max_events = int(runtime_config.read_key('TRACING.MAX_EVENTS', 100000))
+        self._retention = int(runtime_config.read_key('TRACING.RETENTION', 100))
+        self._traces_path = runtime_config.read_key('TRACING.PATH') or os.path.join(
+            os.environ.get('LOG_PATH', 'Logs'), self.DRIVER_NAME, 'traces')
+        if self._mode not in (self.MODE_REQUEST, self.MODE_WINDOW):
+            raise Exception(self.__class__.__name__, 'Tracing mode {} is not supported'.format(self._mode))
+        if self._enabled:
+            self._logger.info('Tracing enabled, {0} mode, saving to {1}'.format(self._mode, self._traces_path))
+
+    @property
+    def enabled(self):
+        return self._enabled
+
+    @contextmanager
+    def span(self, name, category, **args):
+        """
+        Trace the block as a span
+        :param name: span name, 'map_bidi', 'port show'
+        :param category: 'command', 'session', 'device', 'parse', 'sleep', 'lock'
+        :param args: shown with the span
+        """
+        if not self._enabled:
+            yield
+            return
+        depth = getattr(self._local, 'depth', 0)
+        self._local.depth = depth + 1
+        start_time = time.time()
+        try:
+            yield
+        except Exception as e:
+            args['error'] = str(e)
+            raise
+        finally:
+            self._local.depth = depth
+            self._finish(name, category, args, start_time, time.time(), depth == 0)
+
+    def current_request(self):
+        """
+        Events of the request traced on the current thread, to be joined by worker threads of the request
+        :return: None if tracing is disabled or no span is open
+        :rtype: list
+        """
+        if not self._enabled or not getattr(self._local, 'depth', 0):
+            return None
+        if getattr(self._local, 'events', None) is None:
+            self._local.events = []
+        return self._local.events
+
+    @contextmanager
+    def join_request(self, request):
+        """
+        Trace spans of the current thread into a request of another thread, so spans of a worker thread
+        are saved with the request instead of as requests of their own
+        :param request: TRACER.current_request() of the requesting thread
+        """
+        if request is None:
+            yield
+            return
+        depth = getattr(self._local, 'depth', 0)
+        events = getattr(self._local, 'events', None)
+        thread = threading.current_thread()
+        self._local.depth = depth + 1
+        self._local.events = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': thread.ident,
+                               'args': {'name': thread.name}}]
+        try:
+            yield
+        finally:
+            with self._lock:
+                request.extend(self._local.events[:max(self._max_events - len(request), 0)])
+            self._local.depth = depth
+            self._local.events = events
+
+    def _finish(self, name, category, args, start_time, end_time, is_request):
+        thread = threading.current_thread()
+        events = getattr(self._local, 'events', None)
+        if events is None:
+            events = self._local.events = []
+        if len(events) < self._max_events:
+            events.append({'name': name, 'cat': category, 'ph': 'X', 'ts': int(start_time * 1000000),
+                           'dur': int((end_time - start_time) * 1000000), 'pid': os.getpid(), 'tid': thread.ident,
+                           'args': args})
+        if not is_request:
+            return
+
+        self._local.events = []
+        if end_time - start_time < self._min_duration:
+            return
+        # Spans of a request come from one thread, its name goes with them instead of a process wide registry
+        events.insert(0, {'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': thread.ident,
+                          'args': {'name': thread.name}})
+        try:
+            if self._mode == self.MODE_REQUEST:
+                self._save(events, '{0}--{1}'.format(name, thread.ident))
+            else:
+                with self._lock:
+                    self._window_events.extend(events[:max(self._max_events - len(self._window_events), 0)])
+                    if end_time - self._window_start < self._window:
+                        return
+                    events, self._window_events = self._window_events, []
+                    self._window_start = end_time
+                self._save(events, 'window')
+        except Exception:
+            self._logger.exception('Cannot save trace of {}'.format(name))
+
+    def flush(self):
+        """
+        Save spans of the current window
+        """
+        with self._lock:
+            events, self._window_events = self._window_events, []
+            self._window_start = time.time()
+        if events:
+            self._save(events, 'window')
+
+    def _save(self, events, suffix):
+        if not os.path.isdir(self._traces_path):
+            os.makedirs(self._traces_path)
+        thread_names = dict((event['tid'], event) for event in events if event['ph'] == 'M')
+        trace_events = thread_names.values() + [event for event in events if event['ph'] != 'M']
+        trace_path = os.path.join(self._traces_path, '{0}--{1}.json'.format(
+            datetime.now().strftime('%Y-%m-%d--%H-%M-%S-%f'), suffix))
+        with open(trace_path, 'w') as trace_file:
+            json.dump({'traceEvents': trace_events, 'displayTimeUnit': 'ms'}, trace_file)
+        self._logger.debug('Trace saved to {}'.format(trace_path))
+        self._apply_retention()
+
+    def _apply_retention(self):
+        with self._lock:
+            file_names = sorted(file_name for file_name in os.listdir(self._traces_path) if
+                                file_name.endswith('.json'))
+            for file_name in file_names[:max(len(file_names) - self._retention, 0)]:
+                os.remove(os.path.join(self._traces_path, file_name))
+
+
+TRACER = Tracer()
+
+
+def traced(category, name=None):
+    """
+    Trace every call of the decorated function as a span
+    :param category: span category
+    :param name: span name, the function name by default
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with TRACER.span(name or func.__name__, category):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class TracingCliService(CliService):
+    """
+    Cli service wrapper which traces every send_command
+    """
+
+    def __init__(self, cli_service, logger):
+        super(TracingCliService, self).__init__(getattr(cli_service, 'session', None), logger)
+        self._cli_service = cli_service
+
+    def send_command(self, command, expected_string=None, action_map=None, error_map=None, logger=None, *args,
+                     **kwargs):
+        with TRACER.span(command, 'device'):
+            return self._cli_service.send_command(command, expected_string, action_map, error_map, logger, *args,
+                                                  **kwargs)
+
+    def enter_mode(self, command_mode):
+        return self._cli_service.enter_mode(command_mode)
+
+    def reconnect(self, timeout=None):
+        return self._cli_service.reconnect(timeout)
+
+
+class TracingSessionContextManager(object):
+    """
+    Session pool context manager wrapper, traces the session acquire, new session login included
+    """
+
+    def __init__(self, session_context_manager, logger):
+        self._session_context_manager = session_context_manager
+        self._logger = logger
+
+    def __enter__(self):
+        with TRACER.span('session acquire', 'session'):
+            return TracingCliService(self._session_context_manager.__enter__(), self._logger)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return self._session_context_manager.__exit__(exc_type, exc_val, exc_tb)
+
+
+def trace_session(session_context_manager, logger):
+    """
+    Session context manager with traced acquire and commands when tracing is enabled
+    """
+    if TRACER.enabled:
+        return TracingSessionContextManager(session_context_manager, logger)
+    return session_context_manager
@@ -0,0 +1,47 @@
+import bisect
+import hashlib
+
+
+class ConsistentHashRing(object):
+    """
+    Consistent hash ring, adding or removing a node moves only the keys of that node
+    """
+
+    def __init__(self, nodes, replicas=100):
+        """
+        :param nodes: node ids
+        :type nodes: list
+        :param replicas: points on the ring per node
+        :type replicas: int
+        """
+        self._replicas = replicas
+        self._ring = {}
+        self._sorted_keys = []
+        for node in nodes:
+            self.add_node(node)
+
+    @staticmethod
+    def _hash(key):
+        return int(hashlib.md5(str(key).encode('utf-8')).hexdigest()[:16], 16)
+
+    def add_node(self, node):
+        for replica in range(self._replicas):
+            point = self._hash('{0}:{1}'.format(node, replica))
+            self._ring[point] = node
+            bisect.insort(self._sorted_keys, point)
+
+    def remove_node(self, node):
+        for replica in range(self._replicas):
+            point = self._hash('{0}:{1}'.format(node, replica))
+            if self._ring.pop(point, None) is not None:
+                self._sorted_keys.remove(point)
+
+    def get_node(self, key):
+        """
+        Node serving the key
+        :param key: chassis address
+        """
+        if not self._sorted_keys:
+            raise Exception(self.__class__.__name__, 'Hash ring is empty')
+        index = bisect.bisect(self._sorted_keys, self._hash(key)) % len(self._sorted_keys)
+        return self._ring[self._sorted_keys[index]]
@@ -0,0 +1,139 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import threading
+
+from cloudshell.layer_one.core.driver_commands_interface import DriverCommandsInterface
+from fiberzone_afm.sharding.hash_ring import ConsistentHashRing
+from fiberzone_afm.sharding.worker import ShardWorker, WorkersMonitor, PrebuiltResponseInfo, remote_exception
+
+
+class ShardedDriverCommands(DriverCommandsInterface):
+    """
+    Routes driver commands by chassis address to worker processes, every worker runs a DriverCommands per chassis,
+    so parsing and autoload of one chassis do not hold the GIL of another.
+    In 'chassis' mode every chassis gets its own worker, in 'hash' mode chassis are spread over
+    SHARDING.WORKERS workers with a consistent hash ring.
+    """
+    MODE_CHASSIS = 'chassis'
+    MODE_HASH = 'hash'
+
+    def __init__(self, driver_name, config_path, log_path, logger, runtime_config):
+        """
+        :param driver_name: 'fiberzone_afm'
+        :param config_path: runtime configuration path, workers read it on start
+        :param log_path: logs path
+        :type logger: logging.Logger
+        :type runtime_config: cloudshell.layer_one.core.helper.runtime_configuration.RuntimeConfiguration
+        """
+        self._driver_name = driver_name
+        self._config_path = config_path
+        self._log_path = log_path
+        self._logger = logger
+        self._mode = runtime_config.read_key('SHARDING.MODE', self.MODE_HASH)
+        if self._mode not in (self.MODE_CHASSIS, self.MODE_HASH):
+            raise Exception(self.__class__.__name__, 'Sharding mode {} is not supported'.format(self._mode))
+        self._hash_ring = ConsistentHashRing(range(int(runtime_config.read_key('SHARDING.WORKERS', 4))))
+        self._request_timeout = runtime_config.read_key('SHARDING.REQUEST_TIMEOUT')
+
+        self._workers = {}
+        self._workers_lock = threading.Lock()
+        self._local = threading.local()
+        self._last_address = None
+
+        self._monitor = WorkersMonitor(self.workers,
+                                       float(runtime_config.read_key('SHARDING.HEALTH_CHECK_INTERVAL', 10)),
+                                       float(runtime_config.read_key('SHARDING.HEALTH_CHECK_TIMEOUT', 60)), logger)
+        self._monitor.start()
+        self._logger.info('Sharding enabled, {} mode'.format(self._mode))
+
+    def workers(self):
+        """
+        Started workers
+        :rtype: list[fiberzone_afm.sharding.worker.ShardWorker]
+        """
+        with self._workers_lock:
+            return self._workers.values()
+
+    def _get_worker(self, address):
+        """
+        Worker serving the chassis, started on the first request
+        :param address: chassis address, '192.168.42.240'
+        :rtype: fiberzone_afm.sharding.worker.ShardWorker
+        """
+        shard_key = address if self._mode == self.MODE_CHASSIS else self._hash_ring.get_node(address)
+        with self._workers_lock:
+            worker = self._workers.get(shard_key)
+            if not worker:
+                worker = ShardWorker(len(self._workers), self._driver_name, self._config_path, self._log_path,
+                                     self._logger)
+                self._workers[shard_key] = worker
+            return worker
+
+    @staticmethod
+    def _chassis_address(cs_address):
+        return cs_address.split('/')[0]
+
+    def _current_address(self):
+        """
+        Chassis of the last Login on this connection, commands without address are routed to it
+        """
+        address = getattr(self._local, 'address', None) or self._last_address
+        if not address:
+            raise Exception(self.__class__.__name__, 'Chassis address is not defined, call Login command first')
+        return address
+
+    def _execute(self, address, method_name, *args):
+        worker = self._get_worker(address)
+        success, result = worker.request(address, method_name, args, self._request_timeout)
+        if not success:
+            raise remote_exception(*result)
+        if result is not None:
+            return PrebuiltResponseInfo(result)
+
+    def login(self, address, username, password):
+        self._local.address = self._last_address = address
+        self._get_worker(address).remember_login(address, (address, username, password))
+        return self._execute(address, 'login', address, username, password)
+
+    def get_resource_description(self, address):
+        return self._execute(address, 'get_resource_description', address)
+
+    def map_bidi(self, src_port, dst_port):
+        return self._execute(self._chassis_address(src_port), 'map_bidi', src_port, dst_port)
+
+    def map_uni(self, src_port, dst_ports):
+        return self._execute(self._chassis_address(src_port), 'map_uni', src_port, dst_ports)
+
+    def map_clear_to(self, src_port, dst_ports):
+        return self._execute(self._chassis_address(src_port), 'map_clear_to', src_port, dst_ports)
+
+    def map_clear(self, ports):
+        return self._execute(self._chassis_address(ports[0]), 'map_clear', ports)
+
+    def get_attribute_value(self, cs_address, attribute_name):
+        return self._execute(self._chassis_address(cs_address), 'get_attribute_value', cs_address, attribute_name)
+
+    def set_attribute_value(self, cs_address, attribute_name, attribute_value):
+        return self._execute(self._chassis_address(cs_address), 'set_attribute_value', cs_address, attribute_name,
+                             attribute_value)
+
+    def get_state_id(self):
+        return self._execute(self._current_address(), 'get_state_id')
+
+    def set_state_id(self, state_id):
+        return self._execute(self._current_address(), 'set_state_id', state_id)
+
+    def map_tap(self, src_port, dst_ports):
+        return self._execute(self._chassis_address(src_port), 'map_tap', src_port, dst_ports)
+
+    def set_speed_manual(self, src_port, dst_port, speed, duplex):
+        return self._execute(self._chassis_address(src_port), 'set_speed_manual', src_port, dst_port, speed, duplex)
+
+    def stop(self):
+        """
+        Stop the workers monitor and worker processes
+        """
+        self._monitor.stop()
+        for worker in self.workers():
+            worker.stop()
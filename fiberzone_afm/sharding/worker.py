@@ -0,0 +1,318 @@
+import importlib
+import itertools
+import multiprocessing
+import os
+import threading
+from Queue import Queue, Empty
+
+from cloudshell.layer_one.core.response.response_info import ResponseInfo
+
+PING = '__ping__'
+INLINE_METHODS = ['login']
+
+
+class PrebuiltResponseInfo(ResponseInfo):
+    """
+    Response info built by a worker process, the xml node is built where the driver command runs
+    """
+
+    def __init__(self, response_info_node):
+        """
+        :type response_info_node: xml.etree.ElementTree.Element
+        """
+        self._response_info_node = response_info_node
+
+    def build_xml_node(self):
+        return self._response_info_node
+
+
+def remote_exception(type_name, args):
+    """
+    Exception raised by the driver in a worker process, keeps the type name and args the command response shows
+    :param type_name: exception class name
+    :param args: exception args
+    :rtype: Exception
+    """
+    if type_name == Exception.__name__:
+        return Exception(*args)
+    return type(str(type_name), (Exception,), {})(*args)
+
+
+def run_worker(worker_id, driver_name, config_path, log_path, request_queue, response_queue):
+    """
+    Worker process entry point, defined on module level so the process can be started with spawn on Windows
+    :param worker_id: worker id, used in the log file name
+    :param driver_name: 'fiberzone_afm'
+    :param config_path: runtime configuration path
+    :param log_path: logs path
+    :type request_queue: multiprocessing.Queue
+    :type response_queue: multiprocessing.Queue
+    """
+    from cloudshell.core.logger.qs_logger import get_qs_logger
+    from cloudshell.layer_one.core.helper.runtime_configuration import RuntimeConfiguration
+
+    os.environ['LOG_PATH'] = log_path
+    # A forked worker inherits the configuration singleton of the listener process, read the file again
+    runtime_config = RuntimeConfiguration()
+    runtime_config._configuration = runtime_config._read_configuration(config_path)
+    logger = get_qs_logger(log_group=driver_name, log_file_prefix='{0}_worker_{1}'.format(driver_name, worker_id),
+                           log_category='COMMANDS')
+    logger.setLevel(runtime_config.read_key('LOGGING.LEVEL', 'INFO'))
+    logger.info('Starting worker {0}, PID: {1}'.format(worker_id, os.getpid()))
+
+    driver_commands = importlib.import_module('{}.driver_commands'.format(driver_name), package=None)
+    WorkerLoop(lambda: driver_commands.DriverCommands(logger, runtime_config), request_queue, response_queue,
+               logger).run()
+
+
+class ChassisLoop(threading.Thread):
+    """
+    Executes requests of one chassis on its own DriverCommands, every request in its own thread so mappings
+    of the chassis overlap as they do in a single process driver. Login is executed inline, requests sent after
+    it use its session attributes.
+    """
+
+    def __init__(self, address, driver_instance, response_queue, logger):
+        """
+        :param address: chassis address, '192.168.42.240'
+        :param driver_instance: DriverCommands serving only this chassis
+        """
+        super(ChassisLoop, self).__init__(name='chassis-{}'.format(address))
+        self.daemon = True
+        self._driver_instance = driver_instance
+        self._response_queue = response_queue
+        self._logger = logger
+        self.requests = Queue()
+
+    def run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            request_id, method_name, args = request
+            if method_name in INLINE_METHODS:
+                self._execute(request_id, method_name, args)
+            else:
+                command_thread = threading.Thread(target=self._execute, args=(request_id, method_name, args))
+                command_thread.daemon = True
+                command_thread.start()
+
+    def _execute(self, request_id, method_name, args):
+        try:
+            result = getattr(self._driver_instance, method_name)(*args)
+            if isinstance(result, ResponseInfo):
+                result = result.build_xml_node()
+            self._response_queue.put((request_id, True, result))
+        except Exception as e:
+            self._logger.exception('Command {} failed'.format(method_name))
+            self._response_queue.put((request_id, False, (type(e).__name__, [str(arg) for arg in e.args])))
+
+
+class WorkerLoop(object):
+    """
+    Reads the worker queue, answers pings and hands requests to the loop of their chassis. The reading thread
+    never runs device commands, so a slow Login does not delay the health check. Every chassis gets its own
+    DriverCommands, a Login to one chassis does not redirect commands of another one.
+    """
+
+    def __init__(self, driver_factory, request_queue, response_queue, logger):
+        """
+        :param driver_factory: function creating DriverCommands
+        """
+        self._driver_factory = driver_factory
+        self._request_queue = request_queue
+        self._response_queue = response_queue
+        self._logger = logger
+        self._chassis_loops = {}
+
+    def _get_chassis_loop(self, address):
+        chassis_loop = self._chassis_loops.get(address)
+        if not chassis_loop:
+            chassis_loop = ChassisLoop(address, self._driver_factory(), self._response_queue, self._logger)
+            chassis_loop.start()
+            self._chassis_loops[address] = chassis_loop
+        return chassis_loop
+
+    def run(self):
+        while True:
+            request = self._request_queue.get()
+            if request is None:
+                for chassis_loop in self._chassis_loops.values():
+                    chassis_loop.requests.put(None)
+                self._logger.info('Worker stopped')
+                break
+            request_id, address, method_name, args = request
+            if method_name == PING:
+                self._response_queue.put((request_id, True, None))
+                continue
+            try:
+                chassis_loop = self._get_chassis_loop(address)
+            except Exception as e:
+                self._logger.exception('Cannot create driver for {}'.format(address))
+                self._response_queue.put((request_id, False, (type(e).__name__, [str(arg) for arg in e.args])))
+                continue
+            chassis_loop.requests.put((request_id, method_name, args))
+
+
+class PendingRequest(object):
+    def __init__(self):
+        self.event = threading.Event()
+        self.success = None
+        self.result = None
+
+    def set_result(self, success, result):
+        self.success = success
+        self.result = result
+        self.event.set()
+
+
+class ShardWorker(object):
+    """
+    Listener side of a worker process, sends requests and matches responses by request id.
+    Logins are remembered and replayed when the process is restarted.
+    """
+
+    def __init__(self, worker_id, driver_name, config_path, log_path, logger):
+        self.worker_id = worker_id
+        self._driver_name = driver_name
+        self._config_path = config_path
+        self._log_path = log_path
+        self._logger = logger
+        self._lock = threading.Lock()
+        self._request_ids = itertools.count()
+        self._pending = {}
+        self._logins = {}
+        self._process = None
+        self._request_queue = None
+        self.restarts = 0
+        self._start()
+
+    @property
+    def pid(self):
+        return self._process.pid
+
+    def is_alive(self):
+        return self._process.is_alive()
+
+    def _start(self):
+        self._request_queue = multiprocessing.Queue()
+        response_queue = multiprocessing.Queue()
+        self._process = multiprocessing.Process(
+            target=run_worker, name='{0}-worker-{1}'.format(self._driver_name, self.worker_id),
+            args=(self.worker_id, self._driver_name, self._config_path, self._log_path, self._request_queue,
+                  response_queue))
+        self._process.daemon = True
+        self._process.start()
+        reader_thread = threading.Thread(target=self._read_responses, args=(self._process, response_queue),
+                                         name='worker-{}-reader'.format(self.worker_id))
+        reader_thread.daemon = True
+        reader_thread.start()
+        for address, login_args in self._logins.items():
+            self._request_queue.put((next(self._request_ids), address, 'login', login_args))
+        self._logger.info('Worker {0} started, PID: {1}'.format(self.worker_id, self._process.pid))
+
+    def _read_responses(self, process, response_queue):
+        while True:
+            try:
+                request_id, success, result = response_queue.get(timeout=1)
+            except Empty:
+                if process is not self._process or not process.is_alive():
+                    break
+                continue
+            with self._lock:
+                pending = self._pending.pop(request_id, None)
+            if pending:
+                pending.set_result(success, result)
+            elif not success:
+                self._logger.warning('Worker {0} request failed: {1}'.format(self.worker_id, result))
+
+    def remember_login(self, address, login_args):
+        with self._lock:
+            self._logins[address] = login_args
+
+    def request(self, address, method_name, args, timeout=None):
+        """
+        Execute driver method in the worker process
+        :param address: chassis address, the worker runs the method on the DriverCommands of the chassis
+        :param method_name: 'map_bidi'
+        :param args: method args
+        :param timeout: seconds, None waits until the worker answers or restarts
+        :rtype: tuple
+        :return: (success, result or (exception type name, exception args))
+        """
+        pending = PendingRequest()
+        with self._lock:
+            request_id = next(self._request_ids)
+            self._pending[request_id] = pending
+            self._request_queue.put((request_id, address, method_name, args))
+        if not pending.event.wait(timeout):
+            with self._lock:
+                self._pending.pop(request_id, None)
+            raise Exception(self.__class__.__name__,
+                            'Worker {0} did not answer {1} during {2}sec'.format(self.worker_id, method_name, timeout))
+        return pending.success, pending.result
+
+    def ping(self, timeout):
+        try:
+            self.request(None, PING, (), timeout)
+            return True
+        except Exception:
+            return False
+
+    def restart(self, reason):
+        """
+        Fail pending requests and start a new process
+        :param reason: logged and returned to the pending requests
+        """
+        with self._lock:
+            self._logger.error('Restarting worker {0}, PID: {1}, {2}'.format(self.worker_id, self._process.pid,
+                                                                             reason))
+            pending_requests, self._pending = self._pending.values(), {}
+            for pending in pending_requests:
+                pending.set_result(False, (Exception.__name__, [self.__class__.__name__, 'Worker {0} restarted, {1}'
+                                                                .format(self.worker_id, reason)]))
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process.join(5)
+            self.restarts += 1
+            self._start()
+
+    def stop(self, timeout=5):
+        self._request_queue.put(None)
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+
+
+class WorkersMonitor(threading.Thread):
+    """
+    Restarts workers which exited or do not answer a ping
+    """
+
+    def __init__(self, get_workers, interval, timeout, logger):
+        """
+        :param get_workers: returns the current workers list
+        :param interval: seconds between checks
+        :param timeout: ping timeout, seconds
+        """
+        super(WorkersMonitor, self).__init__(name='workers-monitor')
+        self.daemon = True
+        self._get_workers = get_workers
+        self._interval = interval
+        self._timeout = timeout
+        self._logger = logger
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self._interval):
+            self.check()
+
+    def check(self):
+        for worker in self._get_workers():
+            if not worker.is_alive():
+                worker.restart('process exited')
+            elif not worker.ping(self._timeout):
+                worker.restart('no answer during {}sec'.format(self._timeout))
+
+    def stop(self):
+        self._stopped.set()
@@ -21,8 +21,8 @@ class Main(object):
 
     def run_driver(self, driver_name):
         # Reading runtime configuration
-        runtime_config = RuntimeConfiguration(
-            os.path.join(self._driver_path, driver_name + '_runtime_config.yml'))
+        config_path = os.path.join(self._driver_path, driver_name + '_runtime_config.yml')
+        runtime_config = RuntimeConfiguration(config_path)
 
         # Creating XMl logger instance
         xml_file_name = driver_name + '--' + datetime.now().strftime('%d-%b-%Y--%H-%M-%S') + '.xml'
@@ -36,9 +36,14 @@ class Main(object):
 
         command_logger.info('Starting driver {0} on port {1}, PID: {2}'.format(driver_name, self._port, os.getpid()))
 
-        # Importing and creating driver commands instance
-        driver_commands = importlib.import_module('{}.driver_commands'.format(driver_name), package=None)
-        driver_instance = driver_commands.DriverCommands(command_logger, runtime_config)
+        # Importing and creating driver commands instance, sharded mode routes commands to worker processes
+        if runtime_config.read_key('SHARDING.ENABLED', False):
+            sharding = importlib.import_module('{}.sharding.sharded_driver_commands'.format(driver_name), package=None)
+            driver_instance = sharding.ShardedDriverCommands(driver_name, config_path, self._log_path, command_logger,
+                                                             runtime_config)
+        else:
+            driver_commands = importlib.import_module('{}.driver_commands'.format(driver_name), package=None)
+            driver_instance = driver_commands.DriverCommands(command_logger, runtime_config)
 
         # Creating command executor instance
         command_executor = CommandExecutor(driver_instance, command_logger)
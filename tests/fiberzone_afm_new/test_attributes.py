@@ -0,0 +1,78 @@
+from unittest import TestCase
+
+from mock import Mock, MagicMock, DEFAULT
+
+from fiberzone_afm.driver_commands import DriverCommands
+from fiberzone_afm.helpers.afm_simulator import AfmSimulator, SimulatorCliService
+
+
+class TestAttributes(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        runtime_config = Mock()
+        runtime_config.read_key.side_effect = lambda key, default=None: default
+        self._simulator = AfmSimulator(ports_count=180)
+        self._simulator.connect_pairs([('5', '6')])
+        self._simulator.ports['7'].east_locked = True
+        self._cli_service = Mock(wraps=SimulatorCliService(self._simulator, self._logger))
+        self._instance = DriverCommands(self._logger, runtime_config)
+        self._instance._address = '192.168.42.240'
+        self._instance._cli_handler = Mock()
+        self._instance._cli_handler.default_mode_service.return_value = MagicMock(
+            __enter__=Mock(return_value=self._cli_service))
+
+    def test_bulk_read_uses_one_snapshot(self):
+        requests = [('192.168.42.240/1_90/{}'.format(port_id), attribute_name) for port_id in range(1, 181) for
+                    attribute_name in ['Admin Lock State', 'HW Admin State', 'Oper State', 'Connection Counter']]
+        requests.append(('192.168.42.240', 'Serial Number'))
+        values = self._instance.get_attribute_values(requests)
+        self.assertEqual(len(values), len(requests))
+        self.assertEqual(self._cli_service.send_command.call_count, 2)
+        self.assertEqual(values[-1], '9727-4733-2222')
+        value = dict(zip(requests, values))
+        self.assertEqual(value[('192.168.42.240/1_90/5', 'Oper State')], 'Connected')
+        self.assertEqual(value[('192.168.42.240/1_90/5', 'Connection Counter')], '1')
+        self.assertEqual(value[('192.168.42.240/1_90/7', 'Admin Lock State')], 'Locked')
+        self.assertEqual(value[('192.168.42.240/1_90/8', 'Oper State')], 'Disconnected')
+
+        self._instance.get_attribute_value('192.168.42.240/1_90/6', 'Connected To')
+        self.assertEqual(self._cli_service.send_command.call_count, 2)
+
+    def test_snapshot_per_chassis(self):
+        self._instance.get_attribute_value('192.168.42.240/1_90/5', 'Oper State')
+        self._instance._address = '192.168.42.241'
+        self._instance.get_attribute_value('192.168.42.241/1_90/5', 'Oper State')
+        self.assertEqual(self._cli_service.send_command.call_count, 2)
+        self._instance.get_attribute_value('192.168.42.240/1_90/6', 'Oper State')
+        self._instance.get_attribute_value('192.168.42.241/1_90/6', 'Oper State')
+        self.assertEqual(self._cli_service.send_command.call_count, 2)
+
+    def test_chassis_not_logged_in(self):
+        with self.assertRaisesRegexp(Exception, 'Chassis 192.168.42.241 is not logged in'):
+            self._instance.get_attribute_value('192.168.42.241/1_90/5', 'Oper State')
+        self._cli_service.send_command.assert_not_called()
+
+    def test_snapshot_invalidated_after_mapping(self):
+        self.assertEqual(self._instance.get_attribute_values([('192.168.42.240/1_90/1', 'Oper State')]),
+                         ['Disconnected'])
+        self._instance.map_bidi('192.168.42.240/1_90/1', '192.168.42.240/1_90/2')
+        self.assertEqual(self._instance.get_attribute_values([('192.168.42.240/1_90/1', 'Oper State')]),
+                         ['Connected'])
+
+    def test_snapshot_invalidated_during_read_not_cached(self):
+        def invalidating_send_command(*args, **kwargs):
+            self._instance._invalidate_attributes_snapshot('192.168.42.240')
+            return DEFAULT
+
+        self._cli_service.send_command.side_effect = invalidating_send_command
+        self._instance.get_attribute_value('192.168.42.240/1_90/1', 'Oper State')
+        self._cli_service.send_command.side_effect = None
+        self._instance.get_attribute_value('192.168.42.240/1_90/1', 'Oper State')
+        self.assertEqual(self._cli_service.send_command.call_count, 2)
+        self._instance.get_attribute_value('192.168.42.240/1_90/1', 'Oper State')
+        self.assertEqual(self._cli_service.send_command.call_count, 2)
+
+    def test_not_available_attribute(self):
+        with self.assertRaisesRegexp(Exception, 'Attribute Port Speed for 192.168.42.240/1_90/1 is not available'):
+            self._instance.get_attribute_value('192.168.42.240/1_90/1', 'Port Speed')
+        self._cli_service.send_command.assert_not_called()
@@ -0,0 +1,50 @@
+from unittest import TestCase
+from xml.etree import ElementTree
+
+from mock import Mock
+
+from cloudshell.layer_one.core.response.response_info import ResourceDescriptionResponseInfo
+from fiberzone_afm.command_actions.autoload_actions import AutoloadActions
+from fiberzone_afm.helpers.afm_simulator import AfmSimulator, SimulatorCliService
+from fiberzone_afm.helpers.autoload_helper import AutoloadHelper
+from fiberzone_afm.helpers.resource_info_builder import CachedResourceDescriptionResponseInfo
+
+
+class TestAutoloadHelper(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        simulator = AfmSimulator(ports_count=180)
+        simulator.connect_pairs([('5', '6'), ('10', '150')])
+        autoload_actions = AutoloadActions(SimulatorCliService(simulator, self._logger), self._logger)
+        self._board_table = autoload_actions.board_table()
+        self._ports_table = autoload_actions.ports_table()
+
+    def _build_structure(self):
+        return AutoloadHelper('192.168.42.240', self._board_table, self._ports_table, self._logger).build_structure()
+
+    def test_build_structure(self):
+        chassis, = self._build_structure()
+        self.assertEqual(sorted(chassis.child_resources.keys()), ['1_90', '91_180'])
+        ports = dict((port.resource_id, port) for blade in chassis.child_resources.values() for port in
+                     blade.child_resources.values())
+        self.assertEqual(len(ports), 180)
+        self.assertIs(ports['5'].mapping, ports['6'])
+        self.assertEqual(ports['5'].mapping.address, '192.168.42.240/1_90/6')
+        self.assertIs(ports['150'].mapping, ports['10'])
+        self.assertIsNone(ports['1'].mapping)
+
+    def test_cached_xml_matches_library_builder(self):
+        expected = ElementTree.tostring(ResourceDescriptionResponseInfo(self._build_structure()).build_xml_node())
+        for _ in range(2):
+            self.assertEqual(
+                ElementTree.tostring(CachedResourceDescriptionResponseInfo(self._build_structure()).build_xml_node()),
+                expected)
+
+    def test_cached_nodes_not_shared_between_responses(self):
+        first_node = CachedResourceDescriptionResponseInfo(self._build_structure()).build_xml_node()
+        expected = ElementTree.tostring(first_node)
+        for port_node in first_node.iter('ResourceInfo'):
+            port_node.set('Name', 'Changed')
+        self.assertEqual(
+            ElementTree.tostring(CachedResourceDescriptionResponseInfo(self._build_structure()).build_xml_node()),
+            expected)
@@ -0,0 +1,36 @@
+import time
+from unittest import TestCase
+
+from mock import Mock
+
+from fiberzone_afm.command_actions.autoload_actions import AutoloadActions
+from fiberzone_afm.helpers.afm_simulator import AfmSimulator, SimulatorCliHandler, SimulatorCliService
+from fiberzone_afm.helpers.autoload_pipeline import AutoloadPipeline
+
+
+class TestAutoloadPipeline(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        self._simulator = AfmSimulator(ports_count=180)
+        self._simulator.connect_pairs([('5', '6'), ('10', '150')])
+        self._simulator.ports['7'].east_locked = True
+        autoload_actions = AutoloadActions(SimulatorCliService(self._simulator, self._logger), self._logger)
+        self._expected = autoload_actions.board_table(), autoload_actions.ports_table()
+
+    def test_sequential(self):
+        cli_handler = SimulatorCliHandler(self._simulator, self._logger)
+        self.assertEqual(AutoloadPipeline(cli_handler, self._logger).read(), self._expected)
+
+    def test_parallel(self):
+        cli_handler = SimulatorCliHandler(self._simulator, self._logger, response_time=0.2, pool_size=3)
+        pipeline = AutoloadPipeline(cli_handler, self._logger, parallel=True)
+        start_time = time.time()
+        self.assertEqual(pipeline.read(), self._expected)
+        self.assertLess(time.time() - start_time, 0.45)
+        self.assertEqual(sorted(pipeline.timings), sorted(AutoloadPipeline.STAGES + ['total']))
+
+    def test_parallel_read_error(self):
+        cli_handler = Mock()
+        cli_handler.default_mode_service.side_effect = Exception('CliHandler', 'Session is not available')
+        with self.assertRaisesRegexp(Exception, 'Session is not available'):
+            AutoloadPipeline(cli_handler, self._logger, parallel=True).read()
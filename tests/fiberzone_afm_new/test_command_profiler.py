@@ -0,0 +1,80 @@
+import os
+import re
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock, patch
+
+from fiberzone_afm.driver_commands import DriverCommands
+
+
+class TestCommandProfiler(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        self._log_path = tempfile.mkdtemp()
+        self._profiles_path = os.path.join(self._log_path, 'fiberzone_afm', 'profiles')
+        self._config = {'CLI.SIMULATOR.ENABLED': True, 'CLI.SIMULATOR.PORTS_COUNT': 8,
+                        'CLI.SIMULATOR.CONNECT_DELAY': 0.05, 'MAPPING.CHECK_DELAY': 0.02,
+                        'PROFILING.ENABLED': True}
+        self._environ = patch.dict(os.environ, {'LOG_PATH': self._log_path})
+        self._environ.start()
+
+    def tearDown(self):
+        self._environ.stop()
+        shutil.rmtree(self._log_path)
+
+    def _create_instance(self):
+        runtime_config = Mock()
+        runtime_config.read_key.side_effect = lambda key, default=None: self._config.get(key, default)
+        return DriverCommands(self._logger, runtime_config)
+
+    def _profile_files(self, extension):
+        if not os.path.isdir(self._profiles_path):
+            return []
+        return sorted(file_name for file_name in os.listdir(self._profiles_path) if file_name.endswith(extension))
+
+    def test_sample_rate(self):
+        self._config['PROFILING.SAMPLE_RATE'] = 0
+        self._create_instance().get_resource_description('192.168.42.240')
+        self.assertEqual(self._profile_files('.prof'), [])
+
+        self._config['PROFILING.SAMPLE_RATE'] = 1
+        instance = self._create_instance()
+        for _ in range(3):
+            instance.get_resource_description('192.168.42.240')
+        self.assertEqual(len(self._profile_files('.prof')), 3)
+
+    def test_files_and_time_split(self):
+        self._create_instance().map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
+        prof_file, = self._profile_files('.prof')
+        summary_file, = self._profile_files('.txt')
+        self.assertIn('--map_bidi--', prof_file)
+        self.assertEqual(prof_file[:-len('.prof')], summary_file[:-len('.txt')])
+        with open(os.path.join(self._profiles_path, summary_file)) as summary:
+            match = re.match(r'Command map_bidi: wall (\S+)s, device I/O (\S+)s, parsing (\S+)s, sleep (\S+)s',
+                             summary.readline())
+        wall, io, parsing, sleep = [float(value) for value in match.groups()]
+        self.assertGreater(io, 0)
+        self.assertGreaterEqual(sleep, 0.02)
+        self.assertGreaterEqual(parsing, 0)
+        self.assertAlmostEqual(io + parsing + sleep, wall, delta=0.002)
+
+    def test_retention(self):
+        self._config['PROFILING.RETENTION'] = 2
+        instance = self._create_instance()
+        for _ in range(2):
+            instance.get_resource_description('192.168.42.240')
+        oldest_files = self._profile_files('.prof')
+        instance.get_resource_description('192.168.42.240')
+        self.assertEqual(len(self._profile_files('.prof')), 2)
+        self.assertEqual(len(self._profile_files('.txt')), 2)
+        self.assertNotIn(oldest_files[0], self._profile_files('.prof'))
+        self.assertIn(oldest_files[1], self._profile_files('.prof'))
+
+    def test_disabled(self):
+        self._config['PROFILING.ENABLED'] = False
+        instance = self._create_instance()
+        self.assertEqual(instance.map_bidi.__func__, DriverCommands.map_bidi.__func__)
+        instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
+        self.assertEqual(self._profile_files('.prof'), [])
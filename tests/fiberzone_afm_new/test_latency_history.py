@@ -0,0 +1,138 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import TestCase
+
+from mock import Mock, MagicMock
+
+from fiberzone_afm.driver_commands import DriverCommands
+from fiberzone_afm.helpers.afm_simulator import AfmSimulator, SimulatorCliService
+from fiberzone_afm.helpers.latency_history import LatencyHistory, MappingSchedule
+
+
+class TestMappingSchedule(TestCase):
+    def test_without_history(self):
+        schedule = MappingSchedule(60, 5)
+        self.assertEqual(schedule.timeout, 60)
+        self.assertEqual(schedule.next_delay(0), 5)
+
+    def test_with_history(self):
+        schedule = MappingSchedule(60, 5, expected=9, slowest=12, fine_delay=1)
+        self.assertEqual(schedule.next_delay(0), 9)
+        self.assertEqual(schedule.next_delay(10), 1)
+        self.assertEqual(schedule.next_delay(13), 5)
+
+
+class TestLatencyHistory(TestCase):
+    def setUp(self):
+        self._history_dir = tempfile.mkdtemp()
+        self._history_path = os.path.join(self._history_dir, '192.168.42.240.json')
+        self._logger = Mock()
+        self._histories = []
+
+    def tearDown(self):
+        for history in self._histories:
+            history.flush()
+        shutil.rmtree(self._history_dir)
+
+    def _create_history(self, **kwargs):
+        history = LatencyHistory(self._history_path, self._logger, **kwargs)
+        self._histories.append(history)
+        return history
+
+    def test_record_persisted(self):
+        history = self._create_history(save_delay=0.05)
+        history.record(LatencyHistory.CONNECT, '2', '1', 10.5)
+        history.record(LatencyHistory.CONNECT, '1', '2', 11)
+        self.assertFalse(os.path.isfile(self._history_path))
+        time.sleep(0.2)
+        self.assertEqual(LatencyHistory(self._history_path, self._logger).durations(LatencyHistory.CONNECT, '1', '2'),
+                         [10.5, 11])
+        self.assertEqual(os.listdir(self._history_dir), ['192.168.42.240.json'])
+
+    def test_flush_replaces_file(self):
+        history = self._create_history(save_delay=60)
+        history.record(LatencyHistory.CONNECT, '1', '2', 10)
+        history.flush()
+        history.record(LatencyHistory.CONNECT, '1', '2', 12)
+        history.flush()
+        self.assertEqual(LatencyHistory(self._history_path, self._logger).durations(LatencyHistory.CONNECT, '1', '2'),
+                         [10, 12])
+        self.assertEqual(os.listdir(self._history_dir), ['192.168.42.240.json'])
+
+    def test_bounded(self):
+        history = self._create_history(max_samples=2, max_pairs=2)
+        for duration in (1, 2, 3):
+            history.record(LatencyHistory.CONNECT, '1', '2', duration)
+        self.assertEqual(history.durations(LatencyHistory.CONNECT, '1', '2'), [2, 3])
+        history.record(LatencyHistory.CONNECT, '3', '4', 1)
+        history.record(LatencyHistory.CONNECT, '5', '6', 1)
+        self.assertEqual(history.durations(LatencyHistory.CONNECT, '1', '2'), [])
+
+    def test_slow_pair_schedule(self):
+        history = self._create_history()
+        history.record(LatencyHistory.CONNECT, '1', '2', 50)
+        history.record(LatencyHistory.CONNECT, '1', '2', 40)
+        schedule = history.schedule(LatencyHistory.CONNECT, '1', '2', 60, 5)
+        self.assertEqual(schedule.timeout, 100)
+        self.assertEqual(schedule.next_delay(0), 36)
+        self.assertEqual(history.schedule(LatencyHistory.CONNECT, '3', '4', 60, 5).timeout, 60)
+
+    def test_timed_out_pair_schedule(self):
+        history = self._create_history()
+        history.record_timeout(LatencyHistory.DISCONNECT, '1', '2', 60)
+        self.assertEqual(history.schedule(LatencyHistory.DISCONNECT, '1', '2', 60, 5, max_timeout=90).timeout, 90)
+        history.record(LatencyHistory.DISCONNECT, '1', '2', 5)
+        self.assertEqual(history.schedule(LatencyHistory.DISCONNECT, '1', '2', 60, 5, max_timeout=90).timeout, 60)
+
+    def test_slowest_ports(self):
+        history = self._create_history()
+        history.record(LatencyHistory.CONNECT, '1', '2', 10, {'1': 4, '2': 5})
+        history.record(LatencyHistory.CONNECT, '3', '4', 30, {'3': 7, '4': 8})
+        history.record(LatencyHistory.CONNECT, '3', '4', 30, {'3': 9, '4': None})
+        self.assertEqual(history.port_latency('1'), 10)
+        self.assertEqual(sorted(history.slowest_ports(2)), [('3', 30, 9), ('4', 30, 8)])
+
+
+class TestDriverLatencyHistory(TestCase):
+    def setUp(self):
+        self._history_dir = tempfile.mkdtemp()
+        self._logger = Mock()
+        self._simulator = AfmSimulator(ports_count=8)
+        self._cli_service = Mock(wraps=SimulatorCliService(self._simulator, self._logger))
+        config = {'MAPPING.CHECK_DELAY': 0.01, 'MAPPING.LATENCY_HISTORY.ENABLED': True,
+                  'MAPPING.LATENCY_HISTORY.PATH': self._history_dir}
+        runtime_config = Mock()
+        runtime_config.read_key.side_effect = lambda key, default=None: config.get(key, default)
+        self._instance = DriverCommands(self._logger, runtime_config)
+        self._instance._cli_handler = Mock()
+        self._instance._cli_handler.default_mode_service.return_value = MagicMock(
+            __enter__=Mock(return_value=self._cli_service))
+        self._instance.login('192.168.42.240', 'admin', 'admin')
+
+    def tearDown(self):
+        for history in self._instance._latency_histories.values():
+            history.flush()
+        shutil.rmtree(self._history_dir)
+
+    def test_mapping_recorded(self):
+        self._instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
+        self._instance.map_clear_to('192.168.42.240/1_8/1', ['192.168.42.240/1_8/2'])
+        history = self._instance._get_latency_history('192.168.42.240')
+        self.assertEqual(len(history.durations(LatencyHistory.CONNECT, '1', '2')), 1)
+        self.assertEqual(len(history.durations(LatencyHistory.DISCONNECT, '1', '2')), 1)
+        history.flush()
+        self.assertTrue(os.path.isfile(os.path.join(self._history_dir, '192.168.42.240.json')))
+
+    def test_history_attributes(self):
+        self._instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
+        self._cli_service.send_command.reset_mock()
+        slowest_ports, latency, unknown_latency = self._instance.get_attribute_values(
+            [('192.168.42.240', 'Slowest Ports'), ('192.168.42.240/1_8/1', 'Mapping Latency'),
+             ('192.168.42.240/1_8/3', 'Mapping Latency')])
+        self.assertTrue(slowest_ports.startswith('1: ') or slowest_ports.startswith('2: '))
+        self.assertIn('(counter 1)', slowest_ports)
+        self.assertIsNotNone(latency)
+        self.assertIsNone(unknown_latency)
+        self.assertFalse(self._cli_service.send_command.called)
@@ -0,0 +1,38 @@
+from unittest import TestCase
+
+from cloudshell.layer_one.core.command_executor import CommandExecutor
+from cloudshell.layer_one.core.request.requests_parser import RequestsParser
+from cloudshell.layer_one.core.response.command_responses_builder import CommandResponsesBuilder
+from mock import Mock
+
+from fiberzone_afm.driver_commands import DriverCommands
+from fiberzone_afm.helpers.afm_simulator import SimulatorCliHandler
+from tools.load_generator import build_request, parse_response
+
+
+class TestLoadGenerator(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        config = {'CLI.SIMULATOR.ENABLED': True, 'CLI.SIMULATOR.PORTS_COUNT': 8, 'MAPPING.CHECK_DELAY': 0.01}
+        runtime_config = Mock()
+        runtime_config.read_key.side_effect = lambda key, default=None: config.get(key, default)
+        self._instance = DriverCommands(self._logger, runtime_config)
+        self._executor = CommandExecutor(self._instance, self._logger)
+
+    def _execute(self, command_name, parameters):
+        requests = RequestsParser.parse_request_commands(build_request(command_name, '1', parameters))
+        return parse_response(CommandResponsesBuilder.to_string(
+            CommandResponsesBuilder.build_xml_result(self._executor.execute_commands(requests))))
+
+    def test_simulated_driver_round_trip(self):
+        self.assertIsInstance(self._instance._cli_handler, SimulatorCliHandler)
+        self.assertEqual(self._execute('Login', [('Address', '192.168.42.240'), ('User', 'admin'),
+                                                 ('Password', 'admin')]), (True, None))
+        ports = [('MapPort_A', '192.168.42.240/1_8/1'), ('MapPort_B', '192.168.42.240/1_8/2')]
+        self.assertEqual(self._execute('MapBidi', ports), (True, None))
+        success, error = self._execute('MapBidi', ports)
+        self.assertFalse(success)
+        self.assertIn('already been connected', error)
+        self.assertEqual(self._execute('MapClear', [('MapPort', '192.168.42.240/1_8/2')]), (True, None))
+        self.assertEqual(self._execute('GetAttributeValue', [('Address', '192.168.42.240/1_8/1'),
+                                                             ('Attribute', 'Oper State')]), (True, None))
@@ -0,0 +1,81 @@
+from unittest import TestCase
+
+from mock import Mock, MagicMock
+
+from fiberzone_afm.driver_commands import DriverCommands
+from fiberzone_afm.helpers.afm_simulator import AfmSimulator, SimulatorCliService
+from fiberzone_afm.helpers.firmware_capabilities import FirmwareCapabilities
+
+
+class TestNarrowQuery(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        FirmwareCapabilities.invalidate()
+
+    def tearDown(self):
+        FirmwareCapabilities.invalidate()
+
+    def _create_instance(self, simulator):
+        config = {'MAPPING.NARROW_QUERY.ENABLED': True, 'MAPPING.CHECK_DELAY': 0.01}
+        runtime_config = Mock()
+        runtime_config.read_key.side_effect = lambda key, default=None: config.get(key, default)
+        cli_service = Mock(wraps=SimulatorCliService(simulator, self._logger))
+        instance = DriverCommands(self._logger, runtime_config)
+        instance._cli_handler = Mock()
+        instance._cli_handler.default_mode_service.return_value = MagicMock(__enter__=Mock(return_value=cli_service))
+        return instance, cli_service
+
+    @staticmethod
+    def _commands(cli_service):
+        return [call_args[0][0] for call_args in cli_service.send_command.call_args_list]
+
+    def test_narrow_query_supported(self):
+        simulator = AfmSimulator(ports_count=8, narrow_query=True)
+        instance, cli_service = self._create_instance(simulator)
+        instance.login('192.168.42.240', 'admin', 'admin')
+        instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
+        self.assertEqual(self._commands(cli_service), ['show board', 'port show 1', 'port show 1', 'port show 2',
+                                                       'connection create 1 to 2', 'port show 1', 'port show 2'])
+        with self.assertRaisesRegexp(Exception, 'already been connected'):
+            instance.map_bidi('192.168.42.240/1_8/2', '192.168.42.240/1_8/3')
+
+        instance, cli_service = self._create_instance(simulator)
+        instance.login('192.168.42.240', 'admin', 'admin')
+        instance.map_clear(['192.168.42.240/1_8/1'])
+        self.assertEqual(self._commands(cli_service), ['show board', 'port show 1', 'port show 1', 'port show 2',
+                                                       'connection disconnect 1 from 2', 'port show 1',
+                                                       'port show 2'])
+
+    def test_narrow_query_not_supported(self):
+        instance, cli_service = self._create_instance(AfmSimulator(ports_count=8))
+        instance.login('192.168.42.240', 'admin', 'admin')
+        instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
+        self.assertEqual(self._commands(cli_service), ['show board', 'port show 1', 'port show',
+                                                       'connection create 1 to 2', 'port show'])
+
+    def test_narrow_query_per_chassis(self):
+        narrow_simulator = AfmSimulator(ports_count=8, narrow_query=True)
+        instance, narrow_cli_service = self._create_instance(narrow_simulator)
+        full_cli_service = Mock(wraps=SimulatorCliService(AfmSimulator(ports_count=8), self._logger))
+        instance.login('192.168.42.240', 'admin', 'admin')
+        instance._cli_handler.default_mode_service.return_value = MagicMock(
+            __enter__=Mock(return_value=full_cli_service))
+        instance.login('192.168.42.241', 'admin', 'admin')
+        instance.map_bidi('192.168.42.241/1_8/1', '192.168.42.241/1_8/2')
+        self.assertEqual(self._commands(full_cli_service), ['show board', 'port show 1', 'port show',
+                                                            'connection create 1 to 2', 'port show'])
+
+        instance._cli_handler.default_mode_service.return_value = MagicMock(
+            __enter__=Mock(return_value=narrow_cli_service))
+        narrow_cli_service.reset_mock()
+        instance.login('192.168.42.240', 'admin', 'admin')
+        instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
+        self.assertEqual(self._commands(narrow_cli_service), ['show board', 'port show 1', 'port show 2',
+                                                              'connection create 1 to 2', 'port show 1',
+                                                              'port show 2'])
+
+        # Firmware upgrade is probed again
+        narrow_simulator.sw_version = '1.7.0.0'
+        narrow_cli_service.reset_mock()
+        instance.login('192.168.42.240', 'admin', 'admin')
+        self.assertEqual(self._commands(narrow_cli_service), ['show board', 'port show 1'])
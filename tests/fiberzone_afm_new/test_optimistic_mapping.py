@@ -0,0 +1,52 @@
+from unittest import TestCase
+
+from mock import Mock, MagicMock
+
+from fiberzone_afm.driver_commands import DriverCommands
+from fiberzone_afm.helpers.afm_simulator import AfmSimulator, SimulatorCliService
+
+
+class TestOptimisticMapping(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        self._simulator = AfmSimulator(ports_count=8)
+        self._simulator.connect_pairs([('5', '6')])
+        self._simulator.ports['7'].west_locked = True
+        self._cli_service = Mock(wraps=SimulatorCliService(self._simulator, self._logger))
+
+    def _create_instance(self, optimistic):
+        config = {'MAPPING.OPTIMISTIC': optimistic, 'MAPPING.CHECK_DELAY': 0.01}
+        runtime_config = Mock()
+        runtime_config.read_key.side_effect = lambda key, default=None: config.get(key, default)
+        instance = DriverCommands(self._logger, runtime_config)
+        instance._cli_handler = Mock()
+        instance._cli_handler.default_mode_service.return_value = MagicMock(
+            __enter__=Mock(return_value=self._cli_service))
+        return instance
+
+    def _commands(self):
+        return [call_args[0][0] for call_args in self._cli_service.send_command.call_args_list]
+
+    def test_connect_without_pre_check(self):
+        self._create_instance(True).map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
+        self.assertEqual(self._commands(), ['connection create 1 to 2', 'port show'])
+
+    def test_disconnect_without_pre_check(self):
+        self._create_instance(True).map_clear_to('192.168.42.240/1_8/5', ['192.168.42.240/1_8/6'])
+        self.assertEqual(self._commands(), ['connection disconnect 5 from 6', 'port show'])
+
+    def test_same_diagnostics(self):
+        cases = [(lambda instance: instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/7'),
+                  'Port 7 is locked'),
+                 (lambda instance: instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/5'),
+                  'Port 1, or port 5 has already been connected'),
+                 (lambda instance: instance.map_clear_to('192.168.42.240/1_8/5', ['192.168.42.240/1_8/1']),
+                  'Port 5 is not connected or connected not to port 1')]
+        for command, message in cases:
+            for optimistic in (False, True):
+                with self.assertRaisesRegexp(Exception, message):
+                    command(self._create_instance(optimistic))
+
+    def test_clear_not_connected_ports(self):
+        self._create_instance(True).map_clear_to('192.168.42.240/1_8/1', ['192.168.42.240/1_8/2'])
+        self.assertEqual(self._commands(), ['connection disconnect 1 from 2', 'port show'])
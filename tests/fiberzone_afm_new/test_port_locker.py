@@ -0,0 +1,62 @@
+import threading
+import time
+from unittest import TestCase
+
+from fiberzone_afm.helpers.port_locker import PortLocker
+
+
+class TestPortLocker(TestCase):
+    def setUp(self):
+        self._instance = PortLocker()
+
+    def test_disjoint_ports_do_not_block(self):
+        events = []
+        with self._instance.lock('192.168.42.240', '1', '2'):
+            thread = threading.Thread(target=self._lock_and_record, args=(events, '3', '4'))
+            thread.start()
+            thread.join(1)
+            self.assertEqual(events, [('3', '4')])
+
+    def test_shared_port_blocks(self):
+        events = []
+        with self._instance.lock('192.168.42.240', '1', '2'):
+            thread = threading.Thread(target=self._lock_and_record, args=(events, '2', '3'))
+            thread.start()
+            time.sleep(0.1)
+            self.assertEqual(events, [])
+        thread.join(1)
+        self.assertEqual(events, [('2', '3')])
+
+    def test_reversed_order_does_not_deadlock(self):
+        events = []
+        threads = [threading.Thread(target=self._lock_and_record, args=(events, src, dst, 100)) for src, dst in
+                   [('10', '9'), ('9', '10')]]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(events), 200)
+
+    def test_same_ports_of_other_chassis_do_not_block(self):
+        events = []
+        with self._instance.lock('192.168.42.240', '1', '2'):
+            thread = threading.Thread(target=self._lock_and_record, args=(events, '1', '2', 1, '192.168.42.241'))
+            thread.start()
+            thread.join(1)
+            self.assertEqual(events, [('1', '2')])
+
+    def test_unused_locks_dropped(self):
+        events = []
+        threads = [threading.Thread(target=self._lock_and_record, args=(events, str(port_id), str(port_id + 1), 10))
+                   for port_id in range(1, 20, 2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(events), 100)
+        self.assertEqual(self._instance._locks, {})
+
+    def _lock_and_record(self, events, src_port, dst_port, count=1, address='192.168.42.240'):
+        for _ in range(count):
+            with self._instance.lock(address, src_port, dst_port):
+                events.append((src_port, dst_port))
@@ -0,0 +1,79 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from mock import Mock, MagicMock
+
+from fiberzone_afm.cli.cli_recorder import CliRecorder, RecordingSessionContextManager
+from fiberzone_afm.driver_commands import DriverCommands
+from fiberzone_afm.helpers.afm_simulator import AfmSimulator, SimulatorCliService
+from fiberzone_afm.helpers.replay_cli import ReplayCliHandler
+
+
+class TestReplayCli(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        self._runtime_config = Mock()
+        self._runtime_config.read_key.side_effect = lambda key, default=None: {'MAPPING.CHECK_DELAY': 0.01}.get(
+            key, default)
+        self._corpus_dir = tempfile.mkdtemp()
+        self._corpus_path = os.path.join(self._corpus_dir, 'corpus.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self._corpus_dir)
+
+    def _record(self):
+        simulator = AfmSimulator(ports_count=8, connect_delay=0.05)
+        recorder = CliRecorder(self._corpus_path, self._logger)
+        session = MagicMock(__enter__=Mock(return_value=SimulatorCliService(simulator, self._logger)))
+        instance = DriverCommands(self._logger, self._runtime_config)
+        instance._cli_handler = Mock()
+        instance._cli_handler.default_mode_service.side_effect = lambda: RecordingSessionContextManager(
+            session, recorder, self._logger)
+        instance.map_bidi('192.168.42.240/1/1', '192.168.42.240/1/2')
+        with self.assertRaisesRegexp(Exception, 'already been connected'):
+            instance.map_bidi('192.168.42.240/1/1', '192.168.42.240/1/3')
+
+    def test_recorded_corpus(self):
+        self._record()
+        with open(self._corpus_path) as corpus_file:
+            records = [json.loads(line) for line in corpus_file]
+        self.assertEqual(records[0]['format'], CliRecorder.CORPUS_FORMAT)
+        commands = [record['command'] for record in records[1:]]
+        self.assertEqual(commands[:2], ['port show', 'connection create 1 to 2'])
+        self.assertGreater(commands.count('port show'), 2)
+        self.assertTrue(all(record['response_time'] >= 0 for record in records[1:]))
+
+    def test_replay_follows_recorded_state_changes(self):
+        self._record()
+        handler = ReplayCliHandler(self._corpus_path, self._logger, time_scale=0)
+        instance = DriverCommands(self._logger, self._runtime_config)
+        instance._cli_handler = handler
+        instance.map_bidi('192.168.42.240/1/1', '192.168.42.240/1/2')
+        with self.assertRaisesRegexp(Exception, 'already been connected'):
+            instance.map_bidi('192.168.42.240/1/1', '192.168.42.240/1/3')
+
+    def test_not_recorded_command(self):
+        self._record()
+        handler = ReplayCliHandler(self._corpus_path, self._logger, time_scale=0)
+        with handler.default_mode_service() as session:
+            with self.assertRaisesRegexp(Exception, 'is not recorded'):
+                session.send_command('show board')
+
+    def _record_on_session(self, recorder, active):
+        cli_service = Mock(session=Mock(active=Mock(return_value=active)))
+        cli_service.send_command.return_value = 'prompt'
+        with RecordingSessionContextManager(MagicMock(__enter__=Mock(return_value=cli_service)), recorder,
+                                            self._logger) as session:
+            session.send_command('port show')
+        return id(cli_service.session)
+
+    def test_recorder_forgets_closed_session(self):
+        recorder = CliRecorder(self._corpus_path, self._logger)
+        active_id = self._record_on_session(recorder, True)
+        self._record_on_session(recorder, False)
+        self.assertEqual(recorder._last_command_end.keys(), [active_id])
+        recorder.close_session(active_id)
+        self.assertEqual(recorder._last_command_end, {})
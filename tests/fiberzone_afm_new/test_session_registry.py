@@ -0,0 +1,113 @@
+import time
+from unittest import TestCase
+
+from mock import Mock
+
+from fiberzone_afm.cli.session_registry import SessionRegistry, HostSessionContextManager
+
+
+class FakeSession(object):
+    session_type = 'FAKE'
+
+    def __init__(self, host, username):
+        self.host = host
+        self.username = username
+        self.connect = Mock()
+        self.disconnect = Mock()
+
+    def __eq__(self, other):
+        return self.host == other.host and self.username == other.username
+
+
+class FakeSessionContextManager(object):
+    def __init__(self, session_pool, new_session, logger):
+        self._session_pool = session_pool
+        self._new_session = new_session
+        self._logger = logger
+        self._session = None
+
+    def __enter__(self):
+        self._session = self._session_pool.get_session([self._new_session], 'prompt', self._logger)
+        return self._session
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._session_pool.return_session(self._session, self._logger)
+
+
+class TestSessionRegistry(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+
+    def _use_session(self, registry, address, username='admin'):
+        host_pool = registry.get_host_pool(address, username, 'admin')
+        session_context = FakeSessionContextManager(host_pool.session_pool, FakeSession(address, username),
+                                                    self._logger)
+        with HostSessionContextManager(host_pool, session_context, self._logger):
+            pass
+        return host_pool
+
+    def test_alternating_hosts_reuse_sessions(self):
+        registry = SessionRegistry(1, 16, 600, self._logger)
+        for _ in range(3):
+            self._use_session(registry, '192.168.42.240')
+            self._use_session(registry, '192.168.42.241')
+        stats = registry.stats()
+        self.assertEqual(sorted(stats), ['admin@192.168.42.240', 'admin@192.168.42.241'])
+        for host_stats in stats.values():
+            self.assertEqual((host_stats['acquired'], host_stats['created'], host_stats['reused']), (3, 1, 2))
+            self.assertEqual(host_stats['in_use'], 0)
+
+    def test_credentials_get_own_pool(self):
+        registry = SessionRegistry(1, 16, 600, self._logger)
+        self.assertIsNot(registry.get_host_pool('192.168.42.240', 'admin', 'admin'),
+                         registry.get_host_pool('192.168.42.240', 'user', 'user'))
+
+    def test_least_recently_used_evicted(self):
+        registry = SessionRegistry(1, 2, 600, self._logger)
+        first_pool = self._use_session(registry, '192.168.42.240')
+        self._use_session(registry, '192.168.42.241')
+        self._use_session(registry, '192.168.42.242')
+        self.assertEqual(sorted(registry.stats()), ['admin@192.168.42.241', 'admin@192.168.42.242'])
+        self.assertEqual(registry.evictions, 1)
+        self.assertEqual(first_pool.stats()['open'], 0)
+
+    def test_idle_pool_evicted(self):
+        registry = SessionRegistry(1, 16, 0.05, self._logger)
+        self._use_session(registry, '192.168.42.240')
+        time.sleep(0.1)
+        self._use_session(registry, '192.168.42.241')
+        self.assertEqual(sorted(registry.stats()), ['admin@192.168.42.241'])
+
+    def test_busy_pool_not_evicted(self):
+        registry = SessionRegistry(1, 1, 600, self._logger)
+        registry.get_host_pool('192.168.42.240', 'admin', 'admin')
+        registry.get_host_pool('192.168.42.241', 'admin', 'admin')
+        self.assertIn('admin@192.168.42.240', registry.stats())
+
+    def test_host_pool_acquired_until_session_done(self):
+        registry = SessionRegistry(1, 16, 600, self._logger)
+        host_pool = registry.get_host_pool('192.168.42.240', 'admin', 'admin')
+        self.assertEqual(host_pool.stats()['in_use'], 1)
+        session_context = FakeSessionContextManager(host_pool.session_pool, FakeSession('192.168.42.240', 'admin'),
+                                                    self._logger)
+        with HostSessionContextManager(host_pool, session_context, self._logger):
+            self.assertEqual(host_pool.stats()['in_use'], 1)
+        self.assertEqual(host_pool.stats()['in_use'], 0)
+
+    def test_session_returned_to_closed_pool_disconnected(self):
+        registry = SessionRegistry(1, 16, 600, self._logger)
+        host_pool = registry.get_host_pool('192.168.42.240', 'admin', 'admin')
+        session = FakeSession('192.168.42.240', 'admin')
+        session_context = FakeSessionContextManager(host_pool.session_pool, session, self._logger)
+        with HostSessionContextManager(host_pool, session_context, self._logger):
+            registry.close()
+            session.disconnect.assert_not_called()
+        session.disconnect.assert_called_once_with()
+        self.assertEqual(host_pool.stats()['open'], 0)
+
+    def test_closed_sessions_reported(self):
+        on_session_closed = Mock()
+        registry = SessionRegistry(1, 16, 600, self._logger, on_session_closed)
+        self._use_session(registry, '192.168.42.240')
+        registry.close()
+        on_session_closed.assert_called_once_with(FakeSession('192.168.42.240', 'admin'))
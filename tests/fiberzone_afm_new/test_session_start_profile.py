@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+from mock import Mock
+
+from fiberzone_afm.cli.fiberzone_command_modes import DefaultCommandMode
+from fiberzone_afm.cli.session_start_profile import SessionStartProfile
+from fiberzone_afm.helpers.afm_simulator import AfmSimulator
+from fiberzone_afm.helpers.firmware_capabilities import FirmwareCapabilities
+from tools.simulated_terminal_session import SimulatedTerminalSession
+
+SETTINGS = [{'COMMAND': 'terminal length 0', 'VERIFY': 'show terminal', 'EXPECTED': r'[Ll]ength\s*:\s*0\b'}]
+
+
+class TestSessionStartProfile(TestCase):
+    def setUp(self):
+        FirmwareCapabilities.invalidate()
+        self._logger = Mock()
+        self._simulator = AfmSimulator(ports_count=180)
+        self._profile = SessionStartProfile(SETTINGS, self._logger)
+
+    def tearDown(self):
+        FirmwareCapabilities.invalidate()
+
+    def _connect(self, **kwargs):
+        session = SimulatedTerminalSession(self._simulator, latency=0, clear_buffer_timeout=0.01,
+                                           on_session_start=self._profile, **kwargs)
+        session.connect(DefaultCommandMode.PROMPT, self._logger)
+        return session
+
+    def test_setting_applied_and_verified(self):
+        session = self._connect()
+        self.assertEqual(session.commands, ['terminal length 0', 'show terminal'])
+        self.assertEqual(session.length, 0)
+        self.assertNotIn('--More--', session.hardware_expect('port show', DefaultCommandMode.PROMPT, self._logger))
+
+    def test_verified_once_per_chassis(self):
+        self._connect()
+        session = self._connect()
+        self.assertEqual(session.commands, ['terminal length 0'])
+        self.assertEqual(session.length, 0)
+
+    def test_unsupported_command_remembered(self):
+        self.assertEqual(self._connect(terminal_commands=False).commands, ['terminal length 0'])
+        session = self._connect(terminal_commands=False)
+        self.assertEqual(session.commands, [])
+        self.assertGreater(len(session.port_show(self._logger)), 0)
+
+    def test_ineffective_command_remembered(self):
+        self.assertEqual(self._connect(terminal_effective=False).commands, ['terminal length 0', 'show terminal'])
+        self.assertEqual(self._connect(terminal_effective=False).commands, [])
+
+    def test_probed_again_after_firmware_upgrade(self):
+        self._connect(terminal_commands=False)
+        FirmwareCapabilities.update_sw_version('192.168.42.240', '1.6.2.1')
+        self.assertEqual(self._connect().commands, [])
+        FirmwareCapabilities.update_sw_version('192.168.42.240', '1.7.0.0')
+        self.assertEqual(self._connect().commands, ['terminal length 0', 'show terminal'])
+        self.assertEqual(self._connect().commands, ['terminal length 0'])
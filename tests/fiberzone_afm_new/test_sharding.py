@@ -0,0 +1,123 @@
+import os
+import shutil
+import signal
+import tempfile
+import threading
+import time
+from Queue import Queue
+from unittest import TestCase
+
+from mock import Mock
+
+from fiberzone_afm.sharding.hash_ring import ConsistentHashRing
+from fiberzone_afm.sharding.sharded_driver_commands import ShardedDriverCommands
+from fiberzone_afm.sharding.worker import WorkerLoop, PING
+
+WORKER_CONFIG = '''
+CLI:
+  SIMULATOR:
+    ENABLED: TRUE
+    PORTS_COUNT: 8
+    CONNECT_DELAY: 0.05
+MAPPING:
+  CHECK_DELAY: 0.02
+LOGGING:
+  LEVEL: INFO
+'''
+
+
+class TestConsistentHashRing(TestCase):
+    def test_remove_node_moves_only_its_keys(self):
+        addresses = ['10.0.{0}.{1}'.format(i, j) for i in range(4) for j in range(50)]
+        ring = ConsistentHashRing(range(4))
+        nodes = dict((address, ring.get_node(address)) for address in addresses)
+        self.assertEqual(set(nodes.values()), set(range(4)))
+        ring.remove_node(3)
+        for address in addresses:
+            if nodes[address] != 3:
+                self.assertEqual(ring.get_node(address), nodes[address])
+            else:
+                self.assertNotEqual(ring.get_node(address), 3)
+
+
+class TestWorkerLoop(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        self._drivers = []
+        self._request_queue = Queue()
+        self._response_queue = Queue()
+        loop = WorkerLoop(self._create_driver, self._request_queue, self._response_queue, self._logger)
+        self._thread = threading.Thread(target=loop.run)
+        self._thread.start()
+
+    def tearDown(self):
+        self._request_queue.put(None)
+        self._thread.join(5)
+
+    def _create_driver(self):
+        driver = Mock()
+        driver.login.side_effect = lambda address, username, password: time.sleep(0.5)
+        driver.map_bidi.return_value = None
+        self._drivers.append(driver)
+        return driver
+
+    def test_ping_not_blocked_by_login(self):
+        self._request_queue.put((1, '192.168.42.240', 'login', ('192.168.42.240', 'admin', 'admin')))
+        self._request_queue.put((2, None, PING, ()))
+        start_time = time.time()
+        self.assertEqual(self._response_queue.get(timeout=5), (2, True, None))
+        self.assertLess(time.time() - start_time, 0.3)
+        self.assertEqual(self._response_queue.get(timeout=5), (1, True, None))
+
+    def test_driver_per_chassis(self):
+        for request_id, address in enumerate(['192.168.42.240', '192.168.42.241']):
+            self._request_queue.put((request_id, address, 'login', (address, 'admin', 'admin')))
+        self._request_queue.put((2, '192.168.42.240', 'map_bidi', ('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')))
+        self.assertEqual(sorted(self._response_queue.get(timeout=5)[0] for _ in range(3)), [0, 1, 2])
+        first_driver, second_driver = self._drivers
+        first_driver.login.assert_called_once_with('192.168.42.240', 'admin', 'admin')
+        second_driver.login.assert_called_once_with('192.168.42.241', 'admin', 'admin')
+        first_driver.map_bidi.assert_called_once_with('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
+        second_driver.map_bidi.assert_not_called()
+
+
+class TestShardedDriverCommands(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        self._log_path = tempfile.mkdtemp()
+        config_path = os.path.join(self._log_path, 'fiberzone_afm_runtime_config.yml')
+        with open(config_path, 'w') as config_file:
+            config_file.write(WORKER_CONFIG)
+        config = {'SHARDING.MODE': 'chassis', 'SHARDING.HEALTH_CHECK_INTERVAL': 0.2,
+                  'SHARDING.HEALTH_CHECK_TIMEOUT': 10, 'SHARDING.REQUEST_TIMEOUT': 30}
+        runtime_config = Mock()
+        runtime_config.read_key.side_effect = lambda key, default=None: config.get(key, default)
+        self._instance = ShardedDriverCommands('fiberzone_afm', config_path, self._log_path, self._logger,
+                                               runtime_config)
+
+    def tearDown(self):
+        self._instance.stop()
+        shutil.rmtree(self._log_path)
+
+    def test_chassis_served_by_own_workers(self):
+        self._instance.login('192.168.42.240', 'admin', 'admin')
+        self._instance.login('192.168.42.241', 'admin', 'admin')
+        self.assertEqual(len(set(worker.pid for worker in self._instance.workers())), 2)
+
+        self._instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
+        self._instance.map_bidi('192.168.42.241/1_8/1', '192.168.42.241/1_8/2')
+        with self.assertRaisesRegexp(Exception, 'already been connected'):
+            self._instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/3')
+        value_node = self._instance.get_attribute_value('192.168.42.240/1_8/1', 'Oper State').build_xml_node()
+        self.assertEqual(value_node.find('Value').text, 'Connected')
+        self.assertEqual(self._instance.get_state_id().build_xml_node().find('StateId').text, '-1')
+
+    def test_worker_restart(self):
+        self._instance.login('192.168.42.240', 'admin', 'admin')
+        worker, = self._instance.workers()
+        os.kill(worker.pid, signal.SIGKILL)
+        deadline = time.time() + 10
+        while worker.restarts == 0 and time.time() < deadline:
+            time.sleep(0.1)
+        self.assertEqual(worker.restarts, 1)
+        self._instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
@@ -0,0 +1,52 @@
+import socket
+from unittest import TestCase
+
+from mock import Mock
+
+from fiberzone_afm.helpers.afm_simulator import AfmSimulator
+from tools.soak_test import AfmTelnetServer, ResourceSampler, SoakRunner, check_growth, executor_sender
+
+
+class TestSoakTest(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+
+    def test_soak_cycles(self):
+        config = {'CLI.SIMULATOR.ENABLED': True, 'CLI.SIMULATOR.PORTS_COUNT': 8, 'MAPPING.CHECK_DELAY': 0}
+        runtime_config = Mock()
+        runtime_config.read_key.side_effect = lambda key, default=None: config.get(key, default)
+        runner = SoakRunner(executor_sender(runtime_config, self._logger), '192.168.42.240', 8, 8, 2, self._logger)
+        for cycle in range(6):
+            runner.run_cycle(cycle)
+        self.assertEqual(runner.errors, 0)
+
+    def test_sample(self):
+        sample = ResourceSampler(lambda: 2).sample(10, 0)
+        self.assertEqual((sample['cycles'], sample['sessions']), (10, 2))
+        self.assertGreater(sample['threads'], 0)
+        self.assertGreater(sample['gc_objects'], 0)
+
+    def test_check_growth(self):
+        samples = [{'cycles': cycles, 'rss_mb': 50 + cycles / 100.0, 'fds': 6, 'threads': 1, 'sessions': None,
+                    'gc_objects': 1000} for cycles in range(0, 10000, 500)]
+        results = dict((result[0], result) for result in check_growth(
+            samples, 1000, {'rss_mb': 20, 'fds': 5, 'threads': 2, 'sessions': 1, 'gc_objects': 100}))
+        self.assertEqual(sorted(results), ['fds', 'gc_objects', 'rss_mb', 'threads'])
+        self.assertFalse(results['rss_mb'][-1])
+        self.assertTrue(results['fds'][-1])
+
+    def test_telnet_server(self):
+        server = AfmTelnetServer(AfmSimulator(ports_count=8))
+        server.start()
+        try:
+            client = socket.create_connection(('127.0.0.1', server.port), 5)
+            client.sendall('\xff\xfb\x01admin\r\nadmin\r\nshow board\r\n')
+            output = ''
+            while output.count(AfmSimulator.PROMPT) < 2:
+                output += client.recv(4096)
+            self.assertIn('S/N(', output)
+            self.assertEqual(server.open_sessions, 1)
+            client.close()
+        finally:
+            server.shutdown()
+            server.server_close()
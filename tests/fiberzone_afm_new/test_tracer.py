@@ -0,0 +1,97 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+
+from mock import Mock
+
+from fiberzone_afm.driver_commands import DriverCommands
+from fiberzone_afm.helpers.tracer import TRACER
+
+
+class TestTracer(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        self._traces_path = tempfile.mkdtemp()
+        self._config = {'CLI.SIMULATOR.ENABLED': True, 'CLI.SIMULATOR.PORTS_COUNT': 8,
+                        'CLI.SIMULATOR.CONNECT_DELAY': 0.05, 'MAPPING.CHECK_DELAY': 0.02,
+                        'TRACING.ENABLED': True, 'TRACING.PATH': self._traces_path}
+
+    def tearDown(self):
+        TRACER.configure(self._logger, Mock(read_key=lambda key, default=None: default))
+        shutil.rmtree(self._traces_path)
+
+    def _create_instance(self):
+        runtime_config = Mock()
+        runtime_config.read_key.side_effect = lambda key, default=None: self._config.get(key, default)
+        return DriverCommands(self._logger, runtime_config)
+
+    def _read_traces(self, phase='X'):
+        traces = []
+        for file_name in sorted(os.listdir(self._traces_path)):
+            with open(os.path.join(self._traces_path, file_name)) as trace_file:
+                traces.append([event for event in json.load(trace_file)['traceEvents'] if event['ph'] == phase])
+        return traces
+
+    def test_request_trace(self):
+        instance = self._create_instance()
+        instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
+        trace, = self._read_traces()
+        spans = dict((event['name'], event) for event in trace)
+        root = spans['map_bidi']
+        for name in ['ports lock', 'session acquire', 'port show', 'parse port show', 'connection create 1 to 2',
+                     'check delay']:
+            self.assertIn(name, spans)
+            self.assertGreaterEqual(spans[name]['ts'], root['ts'])
+            self.assertLessEqual(spans[name]['ts'] + spans[name]['dur'], root['ts'] + root['dur'])
+        self.assertEqual(spans['port show']['cat'], 'device')
+        self.assertEqual(spans['check delay']['cat'], 'sleep')
+
+    def test_window_trace(self):
+        self._config.update({'TRACING.MODE': 'window', 'TRACING.WINDOW': 600})
+        instance = self._create_instance()
+        instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
+        with self.assertRaisesRegexp(Exception, 'already been connected'):
+            instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/3')
+        self.assertEqual(self._read_traces(), [])
+        TRACER.flush()
+        trace, = self._read_traces()
+        requests = [event for event in trace if event['cat'] == 'command']
+        self.assertEqual([event['name'] for event in requests], ['map_bidi', 'map_bidi'])
+        self.assertIn('already been connected', requests[1]['args']['error'])
+
+    def test_map_clear_trace(self):
+        instance = self._create_instance()
+        instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
+        instance.map_clear(['192.168.42.240/1_8/1'])
+        map_bidi_trace, map_clear_trace = self._read_traces()
+        self.assertEqual([event['name'] for event in map_clear_trace if event['cat'] == 'command'], ['map_clear'])
+        self.assertIn('ports lock', [event['name'] for event in map_clear_trace])
+
+    def test_thread_names(self):
+        self._config.update({'TRACING.MODE': 'window', 'TRACING.WINDOW': 600})
+        instance = self._create_instance()
+        instance.map_bidi('192.168.42.240/1_8/1', '192.168.42.240/1_8/2')
+        thread = threading.Thread(target=instance.map_bidi, args=('192.168.42.240/1_8/3', '192.168.42.240/1_8/4'),
+                                  name='mapping-thread')
+        thread.start()
+        thread.join()
+        instance.map_clear(['192.168.42.240/1_8/1'])
+        TRACER.flush()
+        metadata, = self._read_traces('M')
+        self.assertEqual(sorted((event['tid'], event['args']['name']) for event in metadata),
+                         sorted([(threading.current_thread().ident, threading.current_thread().name),
+                                 (thread.ident, 'mapping-thread')]))
+
+    def test_parallel_autoload_trace(self):
+        self._config.update({'AUTOLOAD.PARALLEL': True, 'CLI.SESSION_POOL_SIZE': 3})
+        instance = self._create_instance()
+        instance.get_resource_description('192.168.42.240')
+        trace, = self._read_traces()
+        self.assertEqual([event['name'] for event in trace if event['cat'] == 'command'],
+                         ['get_resource_description'])
+        spans = [event['name'] for event in trace if event['cat'] == 'actions']
+        for stage in ['board_table', 'port_logic_table', 'port_connections_table']:
+            self.assertEqual(spans.count(stage), 1)
@@ -0,0 +1,112 @@
+import socket
+from unittest import TestCase
+
+from mock import Mock, MagicMock, patch
+
+from fiberzone_afm.cli.transport_selector import TransportSelector, TransportSessionContextManager
+
+
+class TestTransportSelector(TestCase):
+    def setUp(self):
+        self._logger = Mock()
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.bind(('127.0.0.1', 0))
+        self._server.listen(5)
+        self._open_port = self._server.getsockname()[1]
+        closed = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        closed.bind(('127.0.0.1', 0))
+        self._closed_port = closed.getsockname()[1]
+        closed.close()
+        TransportSelector.reset()
+
+    def tearDown(self):
+        self._server.close()
+        TransportSelector.reset()
+
+    @patch('fiberzone_afm.cli.transport_selector.RuntimeConfiguration')
+    def _create_instance(self, runtime_config_class, enabled=True):
+        runtime_config_class.return_value.read_key.side_effect = lambda key, default=None: {
+            'CLI.TRANSPORT_RACE.ENABLED': enabled}.get(key, default)
+        return TransportSelector(self._logger)
+
+    def test_working_transport_goes_first(self):
+        instance = self._create_instance()
+        ports = {'SSH': self._closed_port, 'TELNET': self._open_port}
+        self.assertEqual(instance.order_session_types('127.0.0.1', ['SSH', 'TELNET'], ports), ['TELNET', 'SSH'])
+        record = instance.get_record('127.0.0.1', ['SSH', 'TELNET'], ports)
+        self.assertEqual(record.session_type, 'TELNET')
+        self.assertGreaterEqual(record.latency, 0)
+
+    def test_cached_winner_skips_race(self):
+        instance = self._create_instance()
+        ports = {'SSH': self._closed_port, 'TELNET': self._open_port}
+        instance.order_session_types('127.0.0.1', ['SSH', 'TELNET'], ports)
+        with patch.object(instance, '_race') as race:
+            self.assertEqual(instance.order_session_types('127.0.0.1', ['SSH', 'TELNET'], ports), ['TELNET', 'SSH'])
+            race.assert_not_called()
+
+    def test_configured_order_when_all_failed(self):
+        instance = self._create_instance()
+        ports = {'SSH': self._closed_port, 'TELNET': self._closed_port}
+        self.assertEqual(instance.order_session_types('127.0.0.1', ['SSH', 'TELNET'], ports), ['SSH', 'TELNET'])
+        self.assertIsNone(instance.get_record('127.0.0.1', ['SSH', 'TELNET'], ports))
+
+    def test_disabled(self):
+        instance = self._create_instance(enabled=False)
+        with patch.object(instance, '_race') as race:
+            self.assertEqual(instance.order_session_types('127.0.0.1', ['SSH', 'TELNET'], {}), ['SSH', 'TELNET'])
+            race.assert_not_called()
+
+    def test_failed_cached_transport_races_again(self):
+        instance = self._create_instance()
+        ports = {'SSH': self._closed_port, 'TELNET': self._open_port}
+        instance.order_session_types('127.0.0.1', ['SSH', 'TELNET'], ports)
+        cli_service = Mock()
+        failed_context = MagicMock(__enter__=Mock(side_effect=Exception('Failed to create new session')))
+        contexts = [failed_context, MagicMock(__enter__=Mock(return_value=cli_service))]
+
+        def session_context_factory():
+            instance.order_session_types('127.0.0.1', ['SSH', 'TELNET'], ports)
+            return contexts.pop(0)
+
+        with patch.object(instance, '_race', wraps=instance._race) as race:
+            with TransportSessionContextManager(instance, '127.0.0.1', ['SSH', 'TELNET'], ports,
+                                                session_context_factory, self._logger) as session:
+                self.assertIs(session, cli_service)
+            self.assertEqual(race.call_count, 1)
+        self.assertEqual(instance.get_record('127.0.0.1', ['SSH', 'TELNET'], ports).session_type, 'TELNET')
+
+    def test_fallback_transport_invalidates_record(self):
+        instance = self._create_instance()
+        ports = {'SSH': self._closed_port, 'TELNET': self._open_port}
+        instance.order_session_types('127.0.0.1', ['SSH', 'TELNET'], ports)
+        cli_service = Mock()
+        cli_service.session.new_session = True
+        cli_service.session.session_type = 'SSH'
+        with TransportSessionContextManager(instance, '127.0.0.1', ['SSH', 'TELNET'], ports,
+                                            lambda: MagicMock(__enter__=Mock(return_value=cli_service)),
+                                            self._logger):
+            pass
+        self.assertIsNone(instance.get_record('127.0.0.1', ['SSH', 'TELNET'], ports))
+
+        instance.order_session_types('127.0.0.1', ['SSH', 'TELNET'], ports)
+        cli_service.session.new_session = False
+        with TransportSessionContextManager(instance, '127.0.0.1', ['SSH', 'TELNET'], ports,
+                                            lambda: MagicMock(__enter__=Mock(return_value=cli_service)),
+                                            self._logger):
+            pass
+        self.assertEqual(instance.get_record('127.0.0.1', ['SSH', 'TELNET'], ports).session_type, 'TELNET')
+
+    def test_winner_kept_per_transports(self):
+        instance = self._create_instance()
+        ports = {'SSH': self._closed_port, 'TELNET': self._open_port}
+        instance.order_session_types('127.0.0.1', ['SSH', 'TELNET'], ports)
+        other_ports = {'SSH': self._open_port, 'TELNET': self._closed_port}
+        self.assertIsNone(instance.get_record('127.0.0.1', ['SSH', 'TELNET'], other_ports))
+        self.assertEqual(instance.order_session_types('127.0.0.1', ['SSH', 'TELNET'], other_ports),
+                         ['SSH', 'TELNET'])
+        self.assertEqual(instance.get_record('127.0.0.1', ['SSH', 'TELNET'], other_ports).session_type, 'SSH')
+        self.assertEqual(instance.get_record('127.0.0.1', ['SSH', 'TELNET'], ports).session_type, 'TELNET')
+        instance.invalidate('127.0.0.1')
+        self.assertIsNone(instance.get_record('127.0.0.1', ['SSH', 'TELNET'], ports))
+        self.assertIsNone(instance.get_record('127.0.0.1', ['SSH', 'TELNET'], other_ports))
@@ -62,7 +62,8 @@ class TestMain(TestCase):
         os_mod.path.join.side_effect = [config_path, xml_log_path]
         runtime_config_instance = Mock()
         log_level = Mock()
-        runtime_config_instance.read_key.return_value = log_level
+        runtime_config_instance.read_key.side_effect = lambda key, default=None: {'LOGGING.LEVEL': log_level}.get(
+            key, default)
         runtime_configuration_class.return_value = runtime_config_instance
         xml_logger_inst = Mock()
         xml_logger_class.return_value = xml_logger_inst
@@ -95,10 +96,41 @@ class TestMain(TestCase):
         xml_logger_class.assert_called_once_with(xml_log_path)
         get_qs_logger_mod.assert_called_once_with(log_group=driver_name, log_file_prefix=driver_name + '_commands',
                                                   log_category='COMMANDS')
-        runtime_config_instance.read_key.assert_called_once_with('LOGGING.LEVEL', 'INFO')
+        runtime_config_instance.read_key.assert_has_calls([call('LOGGING.LEVEL', 'INFO'),
+                                                           call('SHARDING.ENABLED', False)])
         command_logger.setLevel.assert_called_once_with(log_level)
         importlib_mod.import_module.assert_called_once_with('{}.driver_commands'.format(driver_name), package=None)
-        driver_commands_mod.DriverCommands.assert_called_once_with(command_logger)
+        driver_commands_mod.DriverCommands.assert_called_once_with(command_logger, runtime_config_instance)
         command_executor_class.assert_called_once_with(driver_commands_inst, command_logger)
         driver_listener_class.assert_called_once_with(command_executor_inst, xml_logger_inst, command_logger)
         server_inst.start_listening.assert_called_once_with(port=self._port)
+
+    @patch('main.os')
+    @patch('main.importlib')
+    @patch('main.datetime')
+    @patch('main.RuntimeConfiguration')
+    @patch('main.XMLLogger')
+    @patch('main.get_qs_logger')
+    @patch('main.CommandExecutor')
+    @patch('main.DriverListener')
+    def test_run_driver_sharded(self, driver_listener_class, command_executor_class, get_qs_logger_mod,
+                                xml_logger_class, runtime_configuration_class, datetime_mod, importlib_mod, os_mod):
+        config_path = Mock()
+        os_mod.path.join.side_effect = [config_path, Mock()]
+        runtime_config_instance = Mock()
+        runtime_config_instance.read_key.side_effect = lambda key, default=None: {'SHARDING.ENABLED': True}.get(
+            key, default)
+        runtime_configuration_class.return_value = runtime_config_instance
+        command_logger = Mock()
+        get_qs_logger_mod.return_value = command_logger
+        sharding_mod = Mock()
+        importlib_mod.import_module.return_value = sharding_mod
+        driver_name = 'test driver'
+
+        self._instance.run_driver(driver_name)
+        importlib_mod.import_module.assert_called_once_with('{}.sharding.sharded_driver_commands'.format(driver_name),
+                                                            package=None)
+        sharding_mod.ShardedDriverCommands.assert_called_once_with(driver_name, config_path, self._log_path,
+                                                                   command_logger, runtime_config_instance)
+        command_executor_class.assert_called_once_with(sharding_mod.ShardedDriverCommands.return_value,
+                                                        command_logger)
@@ -0,0 +1,113 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Compare autoload tree building and xml serialization of the previous AutoloadHelper with the current one
+on synthetic chassis rendered by AfmSimulator.
+
+Usage: python -m tools.autoload_benchmark --sizes 180 360 720 --repeat 20
+"""
+from __future__ import print_function
+
+import argparse
+import logging
+import timeit
+from xml.etree import ElementTree
+
+from cloudshell.layer_one.core.response.resource_info.entities.port import Port
+from cloudshell.layer_one.core.response.response_info import ResourceDescriptionResponseInfo
+from fiberzone_afm.command_actions.autoload_actions import AutoloadActions
+from fiberzone_afm.helpers.afm_simulator import AfmSimulator, SimulatorCliService
+from fiberzone_afm.helpers.autoload_helper import AutoloadHelper
+from fiberzone_afm.helpers.resource_info_builder import CachedResourceInfoBuilder, \
+    CachedResourceDescriptionResponseInfo
+
+ADDRESS = '192.168.42.240'
+
+
+class LegacyAutoloadHelper(AutoloadHelper):
+    """
+    Two pass builder as it was before the single pass one, kept as the benchmark baseline
+    """
+
+    def _build_ports_and_blades(self, chassis_dict):
+        blades_dict = {}
+        ports_dict = {}
+        for port_id, port_record in self._ports_table.iteritems():
+            blade_id = port_record.get('blade')
+            if blade_id not in blades_dict:
+                blade = self._build_blade(blade_id)
+                blades_dict[blade_id] = blade
+                blade.set_parent_resource(chassis_dict.get(self._chassis_id))
+            else:
+                blade = blades_dict.get(blade_id)
+
+            port = Port(port_id, 'Generic L1 Port', 'NA')
+            port.set_model_name('Port Paired')
+            port.set_parent_resource(blade)
+            ports_dict[port_id] = port
+        return ports_dict
+
+    def _legacy_build_mappings(self, ports_dict):
+        for port_id, port_record in self._ports_table.iteritems():
+            connected_to = port_record.get('connected')
+            if connected_to:
+                src_port = ports_dict.get(port_id)
+                dst_port = ports_dict.get(connected_to)
+                if src_port and dst_port:
+                    src_port.add_mapping(dst_port)
+
+    def build_structure(self):
+        chassis_dict = self._build_chassis()
+        ports_dict = self._build_ports_and_blades(chassis_dict)
+        self._legacy_build_mappings(ports_dict)
+        return chassis_dict.values()
+
+
+def _read_tables(ports_count, logger):
+    simulator = AfmSimulator(ports_count=ports_count)
+    simulator.connect_pairs([(port_id, port_id + 1) for port_id in range(1, ports_count, 4)])
+    autoload_actions = AutoloadActions(SimulatorCliService(simulator, logger), logger)
+    return autoload_actions.board_table(), autoload_actions.ports_table()
+
+
+def benchmark(ports_count, repeat, logger):
+    board_table, ports_table = _read_tables(ports_count, logger)
+
+    def legacy():
+        structure = LegacyAutoloadHelper(ADDRESS, board_table, ports_table, logger).build_structure()
+        return ElementTree.tostring(ResourceDescriptionResponseInfo(structure).build_xml_node())
+
+    def current():
+        structure = AutoloadHelper(ADDRESS, board_table, ports_table, logger).build_structure()
+        return ElementTree.tostring(CachedResourceDescriptionResponseInfo(structure).build_xml_node())
+
+    def current_cold():
+        CachedResourceInfoBuilder._leaf_nodes.clear()
+        return current()
+
+    if legacy() != current_cold():
+        raise Exception('Serialized resource description differs for {} ports'.format(ports_count))
+
+    results = {}
+    for name, function in [('legacy', legacy), ('cold', current_cold), ('warm', current)]:
+        results[name] = min(timeit.repeat(function, number=1, repeat=repeat))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Autoload builder benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[180, 360, 720], help='logical ports count')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    logger = logging.getLogger('autoload_benchmark')
+    print('{0:>6} {1:>12} {2:>12} {3:>12} {4:>8}'.format('ports', 'legacy, ms', 'cold, ms', 'warm, ms', 'speedup'))
+    for ports_count in args.sizes:
+        results = benchmark(ports_count, args.repeat, logger)
+        print('{0:>6} {1:>12.2f} {2:>12.2f} {3:>12.2f} {4:>7.1f}x'.format(
+            ports_count, results['legacy'] * 1000, results['cold'] * 1000, results['warm'] * 1000,
+            results['legacy'] / results['warm']))
+
+
+if __name__ == '__main__':
+    main()
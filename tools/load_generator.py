@@ -0,0 +1,406 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Load generator for the DriverListener XML command protocol.
+
+Opens client connections to the listener and sends a weighted mix of Login, GetResourceDescription, MapBidi,
+MapClear, MapClearTo and GetAttributeValue commands at a target rate, then reports throughput, latency
+percentiles and error rate per command type. Every connection maps its own port pairs, so concurrent mappings
+never conflict and the ports used are expected to be disconnected at start.
+
+Against the driver wired to a local simulated device, started in this process:
+    python -m tools.load_generator --start-driver --connections 20 --rate 50 --duration 60 \
+        --set CLI.SESSION_POOL_SIZE=4 --set MAPPING.CHECK_DELAY=0.5
+Against a running driver:
+    python -m tools.load_generator --host 10.0.0.5 --port 1024 --address 192.168.42.240 --user admin --password admin
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import logging
+import os
+import random
+import re
+import socket
+import threading
+import time
+from collections import defaultdict, Counter
+from xml.sax.saxutils import escape
+
+import yaml
+
+COMMANDS_NAMESPACE = 'http://schemas.qualisystems.com/ResourceManagement/DriverCommands.xsd'
+XSI_NAMESPACE = 'http://www.w3.org/2001/XMLSchema-instance'
+RESPONSE_END = '</Responses>'
+COMMAND_RESPONSE_PATTERN = re.compile(r'<CommandResponse[^>]*\sSuccess="(?P<success>\w+)"[^>]*>(?P<body>.*?)'
+                                      r'</CommandResponse>', re.DOTALL)
+RESPONSES_PATTERN = re.compile(r'<Responses[^>]*\sSuccess="(?P<success>\w+)"[^>]*>(?P<body>.*)', re.DOTALL)
+LOG_PATTERN = re.compile(r'<Log>(.*?)</Log>', re.DOTALL)
+
+DEFAULT_MIX = 'Login=1,GetResourceDescription=1,MapBidi=4,MapClearTo=3,MapClear=1,GetAttributeValue=6'
+PORT_ATTRIBUTES = ['Admin Lock State', 'HW Admin State', 'Oper State', 'Connection Counter', 'Connected To']
+CHASSIS_ATTRIBUTES = ['Serial Number', 'Model Name', 'OS Version']
+DRIVER_NAME = 'fiberzone_afm'
+
+
+def build_request(command_name, command_id, parameters):
+    """
+    Request in the format CloudShell sends to the driver
+    :param command_name: 'MapBidi'
+    :param command_id: unique command id
+    :param parameters: list of (name, value)
+    :rtype: str
+    """
+    parameters_xml = ''.join('<{0}>{1}</{0}>'.format(name, escape(str(value))) for name, value in parameters)
+    return '<Commands xmlns="{0}" xmlns:xsi="{1}"><Command CommandName="{2}" CommandId="{3}">' \
+           '<Parameters xsi:type="{2}Parameters">{4}</Parameters></Command></Commands>\r\n'.format(
+        COMMANDS_NAMESPACE, XSI_NAMESPACE, command_name, command_id, parameters_xml)
+
+
+def parse_response(response):
+    """
+    Command status from the driver response
+    :rtype: tuple
+    :return: (success, error message)
+    """
+    match = COMMAND_RESPONSE_PATTERN.search(response) or RESPONSES_PATTERN.search(response)
+    if not match:
+        return False, 'Unexpected response'
+    if match.group('success') == 'true':
+        return True, None
+    log_match = LOG_PATTERN.search(match.group('body'))
+    return False, log_match.group(1).strip() if log_match else 'Failed without log'
+
+
+class DriverClient(object):
+    """
+    One CloudShell connection to the driver listener, requests are sent one at a time
+    """
+
+    def __init__(self, host, port, timeout):
+        self._socket = socket.create_connection((host, port), timeout)
+        self._socket.settimeout(timeout)
+
+    def request(self, request):
+        self._socket.sendall(request)
+        data = ''
+        while RESPONSE_END not in data:
+            buffer_data = self._socket.recv(4096)
+            if not buffer_data:
+                raise Exception(self.__class__.__name__, 'Connection closed by the driver')
+            data += buffer_data
+        return data
+
+    def close(self):
+        self._socket.close()
+
+
+class Pacer(object):
+    """
+    Spreads requests of all connections evenly at the target rate, rate 0 sends as fast as responses come
+    """
+
+    def __init__(self, rate):
+        self._interval = 1.0 / rate if rate else 0
+        self._next_time = time.time()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self._interval:
+            return
+        with self._lock:
+            scheduled_time = max(self._next_time, time.time())
+            self._next_time = scheduled_time + self._interval
+        delay = scheduled_time - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class LoadStats(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(Counter)
+
+    def add(self, command_name, latency, error=None):
+        with self._lock:
+            self.latencies[command_name].append(latency)
+            if error:
+                self.errors[command_name][error] += 1
+
+    @staticmethod
+    def percentile(sorted_values, percent):
+        if not sorted_values:
+            return 0
+        index = int(round(percent / 100.0 * len(sorted_values) + 0.5)) - 1
+        return sorted_values[min(max(index, 0), len(sorted_values) - 1)]
+
+    def summary(self, duration):
+        """
+        :param duration: measured time, seconds
+        :rtype: dict
+        """
+        result = {}
+        all_latencies = []
+        all_errors = 0
+        for command_name, latencies in self.latencies.iteritems():
+            all_latencies.extend(latencies)
+            errors = sum(self.errors[command_name].values())
+            all_errors += errors
+            result[command_name] = self._command_summary(sorted(latencies), errors, duration)
+            result[command_name]['top_errors'] = self.errors[command_name].most_common(3)
+        result['TOTAL'] = self._command_summary(sorted(all_latencies), all_errors, duration)
+        return result
+
+    def _command_summary(self, latencies, errors, duration):
+        return {'count': len(latencies), 'errors': errors,
+                'error_rate': float(errors) / len(latencies) if latencies else 0,
+                'throughput': len(latencies) / duration if duration else 0,
+                'p50': self.percentile(latencies, 50), 'p90': self.percentile(latencies, 90),
+                'p99': self.percentile(latencies, 99), 'max': latencies[-1] if latencies else 0}
+
+
+class LoadWorker(threading.Thread):
+    """
+    One client connection, picks the next command from the mix, mapping commands use the own port pairs only
+    """
+
+    def __init__(self, worker_id, args, mix, port_pairs, pacer, stats, stop_time):
+        super(LoadWorker, self).__init__(name='load-worker-{}'.format(worker_id))
+        self.daemon = True
+        self._worker_id = worker_id
+        self._args = args
+        self._commands, self._weights = zip(*mix)
+        self._free_pairs = list(port_pairs)
+        self._connected_pairs = []
+        self._pacer = pacer
+        self._stats = stats
+        self._stop_time = stop_time
+        self._commands_count = 0
+
+    def _port_address(self, port_id):
+        first = (port_id - 1) // self._args.blade_size * self._args.blade_size + 1
+        return '{0}/{1}_{2}/{3}'.format(self._args.address, first,
+                                        min(first + self._args.blade_size - 1, self._args.ports_count), port_id)
+
+    def _choose_command(self):
+        point = random.uniform(0, sum(self._weights))
+        for command_name, weight in zip(self._commands, self._weights):
+            point -= weight
+            if point <= 0:
+                break
+        if command_name == 'MapBidi' and not self._free_pairs:
+            command_name = 'MapClearTo'
+        elif command_name in ('MapClearTo', 'MapClear') and not self._connected_pairs:
+            command_name = 'MapBidi'
+        return command_name
+
+    def _parameters(self, command_name):
+        """
+        :return: (parameters, mapping action), mapping action moves the pair between free and connected on success
+        """
+        args = self._args
+        if command_name == 'Login':
+            return [('Address', args.address), ('User', args.user), ('Password', args.password)], None
+        if command_name == 'GetResourceDescription':
+            return [('Address', args.address)], None
+        if command_name == 'GetAttributeValue':
+            if random.random() < 0.1:
+                return [('Address', args.address), ('Attribute', random.choice(CHASSIS_ATTRIBUTES))], None
+            return [('Address', self._port_address(random.randint(1, args.ports_count))),
+                    ('Attribute', random.choice(PORT_ATTRIBUTES))], None
+        if command_name == 'MapBidi':
+            pair = random.choice(self._free_pairs)
+            return [('MapPort_A', self._port_address(pair[0])), ('MapPort_B', self._port_address(pair[1]))], \
+                (pair, self._free_pairs, self._connected_pairs)
+        pair = random.choice(self._connected_pairs)
+        if command_name == 'MapClearTo':
+            parameters = [('SrcPort', self._port_address(pair[0])), ('DstPort', self._port_address(pair[1]))]
+        else:
+            parameters = [('MapPort', self._port_address(pair[0]))]
+        return parameters, (pair, self._connected_pairs, self._free_pairs)
+
+    def _send(self, client, command_name, parameters):
+        self._commands_count += 1
+        command_id = '{0}-{1}'.format(self._worker_id, self._commands_count)
+        start_time = time.time()
+        try:
+            success, error = parse_response(client.request(build_request(command_name, command_id, parameters)))
+        except Exception as e:
+            success, error = False, 'Connection error: {}'.format(e)
+        self._stats.add(command_name, time.time() - start_time, error)
+        return success, error
+
+    def run(self):
+        try:
+            client = DriverClient(self._args.host, self._args.port, self._args.timeout)
+        except Exception as e:
+            self._stats.add('Connect', 0, str(e))
+            return
+        try:
+            # CloudShell starts every connection with Login
+            self._send(client, 'Login', self._parameters('Login')[0])
+            while time.time() < self._stop_time:
+                self._pacer.wait()
+                if time.time() >= self._stop_time:
+                    break
+                command_name = self._choose_command()
+                parameters, mapping_action = self._parameters(command_name)
+                success, error = self._send(client, command_name, parameters)
+                if error and error.startswith('Connection error'):
+                    break
+                if success and mapping_action:
+                    pair, from_pairs, to_pairs = mapping_action
+                    from_pairs.remove(pair)
+                    to_pairs.append(pair)
+        finally:
+            client.close()
+
+
+def parse_mix(mix_string):
+    """
+    :param mix_string: 'MapBidi=4,MapClearTo=3'
+    :rtype: list
+    """
+    mix = []
+    for item in mix_string.split(','):
+        command_name, weight = item.split('=')
+        mix.append((command_name.strip(), float(weight)))
+    return mix
+
+
+def _set_key(configuration, complex_key, value):
+    keys = complex_key.split('.')
+    for key in keys[:-1]:
+        configuration = configuration.setdefault(key, {})
+    configuration[keys[-1]] = value
+
+
+def load_runtime_config(overrides):
+    """
+    Driver runtime configuration with overrides applied, the configuration singleton is shared with the driver
+    :param overrides: list of (config key, value)
+    :rtype: cloudshell.layer_one.core.helper.runtime_configuration.RuntimeConfiguration
+    """
+    from cloudshell.layer_one.core.helper.runtime_configuration import RuntimeConfiguration
+
+    runtime_config = RuntimeConfiguration(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                       DRIVER_NAME + '_runtime_config.yml'))
+    if runtime_config.configuration is None:
+        runtime_config._configuration = {}
+    for key, value in overrides:
+        _set_key(runtime_config.configuration, key, value)
+    return runtime_config
+
+
+def parse_overrides(items):
+    """
+    :param items: ['CLI.SIMULATOR.RESPONSE_TIME=0.1']
+    :return: list of (config key, value)
+    :rtype: list
+    """
+    overrides = []
+    for item in items:
+        key, value = item.split('=', 1)
+        overrides.append((key, yaml.safe_load(value)))
+    return overrides
+
+
+def start_driver(port, overrides):
+    """
+    Start the driver listener with the simulated device in this process, the same way main.Main.run_driver does
+    :param port: listener port
+    :param overrides: list of (config key, value) applied on top of the driver runtime configuration
+    """
+    from cloudshell.layer_one.core.command_executor import CommandExecutor
+    from cloudshell.layer_one.core.driver_listener import DriverListener
+    from fiberzone_afm.driver_commands import DriverCommands
+
+    runtime_config = load_runtime_config([('CLI.SIMULATOR.ENABLED', True)] + overrides)
+    command_logger = logging.getLogger('load_generator.driver')
+    xml_logger = logging.getLogger('load_generator.xml')
+    xml_logger.setLevel(logging.WARNING)
+    driver_instance = DriverCommands(command_logger, runtime_config)
+    server = DriverListener(CommandExecutor(driver_instance, command_logger), xml_logger, command_logger)
+    listener_thread = threading.Thread(target=server.start_listening, kwargs={'host': '127.0.0.1', 'port': port},
+                                       name='driver-listener')
+    listener_thread.daemon = True
+    listener_thread.start()
+
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', port), 1).close()
+            return
+        except socket.error:
+            time.sleep(0.1)
+    raise Exception('start_driver', 'Driver listener is not started on port {}'.format(port))
+
+
+def print_report(summary, duration):
+    print('Duration {0:.1f}s'.format(duration))
+    print('{0:<24} {1:>7} {2:>7} {3:>7} {4:>8} {5:>9} {6:>9} {7:>9} {8:>9}'.format(
+        'command', 'count', 'errors', 'err %', 'req/s', 'p50, ms', 'p90, ms', 'p99, ms', 'max, ms'))
+    for command_name in sorted(summary, key=lambda name: (name == 'TOTAL', name)):
+        result = summary[command_name]
+        print('{0:<24} {count:>7} {errors:>7} {1:>7.1f} {throughput:>8.2f} {2:>9.1f} {3:>9.1f} {4:>9.1f} '
+              '{5:>9.1f}'.format(command_name, result['error_rate'] * 100, result['p50'] * 1000,
+                                 result['p90'] * 1000, result['p99'] * 1000, result['max'] * 1000, **result))
+    for command_name, result in sorted(summary.iteritems()):
+        for error, count in result.get('top_errors', []):
+            print('  {0}: {1} x {2}'.format(command_name, count, error))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load generator for the L1 driver listener')
+    parser.add_argument('--host', default='127.0.0.1', help='driver listener host')
+    parser.add_argument('--port', type=int, default=1024, help='driver listener port')
+    parser.add_argument('--start-driver', action='store_true',
+                        help='start the driver with a simulated device in this process')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help='runtime configuration override for --start-driver, CLI.SIMULATOR.RESPONSE_TIME=0.1')
+    parser.add_argument('--address', default='192.168.42.240', help='chassis address')
+    parser.add_argument('--user', default='admin')
+    parser.add_argument('--password', default='admin')
+    parser.add_argument('--ports-count', type=int, default=180, help='logical ports on the chassis')
+    parser.add_argument('--blade-size', type=int, default=90, help='logical ports per blade')
+    parser.add_argument('--connections', type=int, default=10, help='concurrent client connections')
+    parser.add_argument('--rate', type=float, default=20, help='requests per second of all connections, 0 unlimited')
+    parser.add_argument('--duration', type=float, default=30, help='seconds')
+    parser.add_argument('--timeout', type=float, default=300, help='response timeout, seconds')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='command weights')
+    parser.add_argument('--json', help='save the report to a json file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.start_driver:
+        start_driver(args.port, parse_overrides(args.set))
+        args.host = '127.0.0.1'
+
+    mix = parse_mix(args.mix)
+    all_pairs = [(port_id, port_id + 1) for port_id in range(1, args.ports_count, 2)]
+    if len(all_pairs) < args.connections:
+        parser.error('Not enough port pairs for {} connections'.format(args.connections))
+
+    stats = LoadStats()
+    pacer = Pacer(args.rate)
+    start_time = time.time()
+    stop_time = start_time + args.duration
+    workers = [LoadWorker(worker_id, args, mix, all_pairs[worker_id::args.connections], pacer, stats, stop_time)
+               for worker_id in range(args.connections)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        while worker.is_alive():
+            worker.join(1)
+    duration = time.time() - start_time
+
+    summary = stats.summary(duration)
+    print_report(summary, duration)
+    if args.json:
+        with open(args.json, 'w') as json_file:
+            json.dump(summary, json_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Compare bytes and time per mapping confirmation poll of two ports, full 'port show' table against
+per-port 'port show <port id>' queries, on chassis rendered by AfmSimulator.
+Local time covers output rendering and parsing, transfer time is estimated for the given CLI throughput.
+Wall time of a poll adds one round trip per command sent, narrow mode sends a command per port.
+
+Usage: python -m tools.narrow_query_benchmark --sizes 180 360 720 --repeat 200 --throughput 100 --rtt 20
+"""
+from __future__ import print_function
+
+import argparse
+import logging
+import timeit
+
+from fiberzone_afm.command_actions.mapping_actions import MappingActions
+from fiberzone_afm.helpers.afm_simulator import AfmSimulator, SimulatorCliService
+
+
+class CountingCliService(SimulatorCliService):
+    """
+    Counts bytes of command outputs
+    """
+
+    def __init__(self, simulator, logger):
+        super(CountingCliService, self).__init__(simulator, logger)
+        self.bytes_received = 0
+        self.commands_sent = 0
+
+    def send_command(self, command, expected_string=None, action_map=None, error_map=None, logger=None, *args,
+                     **kwargs):
+        output = super(CountingCliService, self).send_command(command, expected_string, action_map, error_map,
+                                                              logger, *args, **kwargs)
+        self.bytes_received += len(output)
+        self.commands_sent += 1
+        return output
+
+
+def benchmark(ports_count, repeat, logger):
+    """
+    :return: {'full': (bytes, commands, seconds), 'narrow': (bytes, commands, seconds)} per poll
+    :rtype: dict
+    """
+    simulator = AfmSimulator(ports_count=ports_count, narrow_query=True)
+    simulator.connect_pairs([(port_id, port_id + 1) for port_id in range(1, ports_count, 4)])
+    results = {}
+    for name, narrow_query in (('full', False), ('narrow', True)):
+        cli_service = CountingCliService(simulator, logger)
+        mapping_actions = MappingActions(cli_service, logger, narrow_query)
+        if narrow_query and not mapping_actions.probe_narrow_query():
+            raise Exception('benchmark', 'Narrow query probe failed')
+        cli_service.bytes_received = cli_service.commands_sent = 0
+        seconds = timeit.timeit(lambda: mapping_actions.ports_info('1', '2'), number=repeat) / repeat
+        results[name] = (cli_service.bytes_received / repeat, cli_service.commands_sent / repeat, seconds)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Narrow port query benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[180, 360, 720], help='logical ports count')
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--throughput', type=float, default=100.0, help='CLI output throughput, KB/s')
+    parser.add_argument('--rtt', type=float, default=20.0, help='round trip time per command, ms')
+    args = parser.parse_args()
+
+    logger = logging.getLogger('narrow_query_benchmark')
+    print('{0:>6} {1:>7} {2:>9} {3:>9} {4:>10} {5:>13} {6:>9}'.format('ports', 'query', 'bytes', 'commands',
+                                                                     'local, ms', 'transfer, ms', 'wall, ms'))
+    for ports_count in args.sizes:
+        results = benchmark(ports_count, args.repeat, logger)
+        wall_times = {}
+        for name in ('full', 'narrow'):
+            bytes_received, commands_sent, seconds = results[name]
+            transfer_time = bytes_received / (args.throughput * 1024) * 1000
+            wall_times[name] = seconds * 1000 + transfer_time + commands_sent * args.rtt
+            print('{0:>6} {1:>7} {2:>9} {3:>9} {4:>10.3f} {5:>13.1f} {6:>9.1f}'.format(
+                ports_count, name, bytes_received, commands_sent, seconds * 1000, transfer_time, wall_times[name]))
+        print('{0:>6} {1:>7} {2:>8.1f}x {3:>9} {4:>9.1f}x {5:>13} {6:>8.1f}x'.format(
+            ports_count, 'ratio', float(results['full'][0]) / results['narrow'][0], '',
+            results['full'][2] / results['narrow'][2], '', wall_times['full'] / wall_times['narrow']))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Compare 'port show' read latency on a new session before and after the session start profile, on a simulated
+terminal which pages, wraps and echoes as a default terminal does. Reads go through the cloudshell-cli expect
+loop, so every page costs a read timeout and a key press round trip.
+
+Usage: python -m tools.session_start_benchmark --sizes 180 360 --latency 0.02
+"""
+from __future__ import print_function
+
+import argparse
+import logging
+import time
+
+from cloudshell.layer_one.core.helper.runtime_configuration import RuntimeConfiguration
+from fiberzone_afm.cli.fiberzone_command_modes import DefaultCommandMode
+from fiberzone_afm.cli.session_start_profile import SessionStartProfile
+from fiberzone_afm.helpers.afm_simulator import AfmSimulator
+from tools.simulated_terminal_session import SimulatedTerminalSession
+
+
+def read_port_show(session, logger):
+    """
+    :type session: SimulatedTerminalSession
+    :return: seconds and output length
+    :rtype: tuple
+    """
+    start_time = time.time()
+    output = session.port_show(logger)
+    return time.time() - start_time, len(output)
+
+
+def benchmark(ports_count, latency, repeat, settings, logger):
+    """
+    :return: {'default': (read seconds, bytes, first connect seconds, next connect seconds), 'profile': (...)},
+        settings are probed on the first connect only
+    :rtype: dict
+    """
+    simulator = AfmSimulator(ports_count=ports_count)
+    simulator.connect_pairs([(port_id, port_id + 1) for port_id in range(1, ports_count, 4)])
+    results = {}
+    for name, profile in (('default', None), ('profile', SessionStartProfile(settings, logger))):
+        connect_times = []
+        for _ in range(2):
+            session = SimulatedTerminalSession(simulator, host='bench-{}'.format(ports_count), latency=latency,
+                                               on_session_start=profile)
+            start_time = time.time()
+            session.connect(DefaultCommandMode.PROMPT, logger)
+            connect_times.append(time.time() - start_time)
+        reads = [read_port_show(session, logger) for _ in range(repeat)]
+        results[name] = (sum(seconds for seconds, _ in reads) / repeat, reads[-1][1]) + tuple(connect_times)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Session start profile benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[180, 360], help='logical ports count')
+    parser.add_argument('--latency', type=float, default=0.02, help='round trip time, seconds')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--config', default='fiberzone_afm_runtime_config.yml',
+                        help='runtime configuration with CLI.SESSION_START.SETTINGS')
+    args = parser.parse_args()
+
+    logger = logging.getLogger('session_start_benchmark')
+    settings = RuntimeConfiguration(args.config).read_key('CLI.SESSION_START.SETTINGS', [])
+    print('{0:>6} {1:>8} {2:>9} {3:>10} {4:>17} {5:>16}'.format('ports', 'terminal', 'bytes', 'read, ms',
+                                                                'first connect, ms', 'next connect, ms'))
+    for ports_count in args.sizes:
+        results = benchmark(ports_count, args.latency, args.repeat, settings, logger)
+        for name in ('default', 'profile'):
+            seconds, output_length, first_connect_time, next_connect_time = results[name]
+            print('{0:>6} {1:>8} {2:>9} {3:>10.1f} {4:>17.1f} {5:>16.1f}'.format(
+                ports_count, name, output_length, seconds * 1000, first_connect_time * 1000,
+                next_connect_time * 1000))
+        print('{0:>6} {1:>8} {2:>9} {3:>9.1f}x'.format(ports_count, 'ratio', '',
+                                                       results['default'][0] / results['profile'][0]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Simulated terminal for the session start benchmark and its unit tests. The terminal length, width and echo
+behaviour is modelled on a generic CLI terminal, it is not recorded from an AFM chassis.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from cloudshell.cli.session.expect_session import ExpectSession
+from cloudshell.cli.session.session_exceptions import SessionReadTimeout
+from fiberzone_afm.cli.fiberzone_command_modes import DefaultCommandMode
+
+
+class SimulatedTerminalSession(ExpectSession):
+    """
+    Expect session to AfmSimulator behind a terminal with paging, line wrapping and echo,
+    'terminal length|width|echo' commands change the terminal when the firmware supports them
+    """
+    SESSION_TYPE = 'SIMULATED'
+    MORE_PROMPT = '--More--'
+    PAGING_ACTION_MAP = OrderedDict([(MORE_PROMPT, lambda session, logger: session.send_line(' ', logger))])
+
+    def __init__(self, simulator, host='192.168.42.240', latency=0.02, terminal_commands=True,
+                 terminal_effective=True, on_session_start=None, **kwargs):
+        """
+        :type simulator: AfmSimulator
+        :param latency: round trip time, seconds
+        :param terminal_commands: firmware supports terminal commands
+        :param terminal_effective: terminal commands change the terminal
+        """
+        super(SimulatedTerminalSession, self).__init__(**kwargs)
+        self.host = host
+        self.on_session_start = on_session_start
+        self.length = 24
+        self.width = 80
+        self.echo = True
+        self.commands = []
+        self._simulator = simulator
+        self._latency = latency
+        self._terminal_commands = terminal_commands
+        self._terminal_effective = terminal_effective
+        self._lock = threading.Lock()
+        self._chunks = []
+        self._pages = []
+
+    def _initialize_session(self, prompt, logger):
+        self._put(self._simulator.PROMPT)
+
+    def _connect_actions(self, prompt, logger):
+        self.hardware_expect(None, expected_string=prompt, logger=logger)
+        if self.on_session_start:
+            self.on_session_start(self, logger)
+
+    def disconnect(self):
+        self._active = False
+
+    def _put(self, data):
+        with self._lock:
+            self._chunks.append((time.time() + self._latency / 2, data))
+
+    def _send(self, command, logger):
+        if self._pages:
+            self._put(self._pages.pop(0))
+            return
+        command = command.strip()
+        if not command:
+            self._put('\r\n' + self._simulator.PROMPT)
+            return
+        self.commands.append(command)
+        output = self._terminal_command(command)
+        if output is None:
+            output = self._simulator.execute(command)
+        lines = []
+        for line in output.split('\r\n'):
+            lines.extend([line[i:i + self.width] for i in range(0, len(line), self.width)] or [''])
+        if self.echo:
+            lines.insert(0, command)
+        if self.length:
+            pages = ['\r\n'.join(lines[i:i + self.length]) for i in range(0, len(lines), self.length)]
+            self._pages = ['\r\n' + page for page in pages[1:]]
+            for index in range(len(self._pages) - 1):
+                self._pages[index] += '\r\n' + self.MORE_PROMPT
+            self._put(pages[0] + ('\r\n' + self.MORE_PROMPT if self._pages else ''))
+        else:
+            self._put('\r\n'.join(lines))
+
+    def _terminal_command(self, command):
+        if command == 'show terminal':
+            return 'Length: {0}\r\nWidth: {1}\r\nEcho: {2}\r\n{3}'.format(
+                self.length, self.width, 'on' if self.echo else 'off', self._simulator.PROMPT)
+        match = re.match(r'terminal\s+(length|width|echo)\s+(\S+)$', command)
+        if not match:
+            return None
+        if not self._terminal_commands:
+            return 'Error: unknown command\r\n{}'.format(self._simulator.PROMPT)
+        if self._terminal_effective:
+            setting, value = match.groups()
+            if setting == 'echo':
+                self.echo = value == 'on'
+            else:
+                setattr(self, setting, int(value))
+        return self._simulator.PROMPT
+
+    def _receive(self, timeout, logger):
+        with self._lock:
+            if self._chunks and self._chunks[0][0] <= time.time():
+                return self._chunks.pop(0)[1]
+            wait_time = self._chunks[0][0] - time.time() if self._chunks else timeout
+        time.sleep(max(min(wait_time, timeout), 0))
+        raise SessionReadTimeout()
+
+    def port_show(self, logger):
+        """
+        'port show' output, pages are read with a key press
+        :rtype: str
+        """
+        # Every page repeats the same action, the action loop detector would stop a paged read after a few pages
+        return self.hardware_expect('port show', DefaultCommandMode.PROMPT, logger, action_map=self.PAGING_ACTION_MAP,
+                                    check_action_loop_detector=False)
@@ -0,0 +1,349 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""
+Soak test of the driver, runs mapping and autoload cycles through DriverCommands against a local stand-in device
+and samples RSS, open file descriptors, threads, device sessions and gc objects of the process. Growth between
+the first and the last quarter of the samples taken after warmup is compared with the limits, the exit code is 1
+when a limit is passed or a command failed.
+
+Stand-in devices:
+    simulator   AfmSimulator wired in place of the CLI handler, fast, covers the driver code above the CLI
+    telnet      AfmSimulator behind a local telnet server, covers telnet sessions and the session pools,
+                sessions are counted on the server side
+
+Commands are sent through CommandExecutor in this process, or with --listener through the driver listener,
+reconnecting every --reconnect-every cycles.
+
+Usage:
+    python -m tools.soak_test --cycles 200000 --sample-every 1000 --csv soak.csv
+    python -m tools.soak_test --device telnet --listener --cycles 5000 --sample-every 100 \
+        --set CLI.SESSION_POOL_SIZE=2
+"""
+from __future__ import print_function
+
+import argparse
+import csv
+import gc
+import logging
+import os
+import re
+import SocketServer
+import threading
+import time
+
+from tools.load_generator import (DriverClient, build_request, parse_response, load_runtime_config,
+                                  parse_overrides, start_driver)
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+METRICS = ['rss_mb', 'fds', 'threads', 'sessions', 'gc_objects']
+TELNET_IAC_PATTERN = re.compile(r'\xff[\xfb-\xfe].|\xff[\xf0-\xfa]', re.DOTALL)
+
+
+class AfmTelnetServer(SocketServer.ThreadingTCPServer):
+    """
+    Local telnet stand-in of the chassis, every connection logs in and runs commands on the shared AfmSimulator
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, simulator, port=0):
+        """
+        :type simulator: fiberzone_afm.helpers.afm_simulator.AfmSimulator
+        :param port: listening port, 0 picks a free one
+        """
+        SocketServer.ThreadingTCPServer.__init__(self, ('127.0.0.1', port), AfmTelnetHandler)
+        self.simulator = simulator
+        self.open_sessions = 0
+        self.total_sessions = 0
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def session_opened(self):
+        with self._lock:
+            self.open_sessions += 1
+            self.total_sessions += 1
+
+    def session_closed(self):
+        with self._lock:
+            self.open_sessions -= 1
+
+    def start(self):
+        server_thread = threading.Thread(target=self.serve_forever, name='afm-telnet-server')
+        server_thread.daemon = True
+        server_thread.start()
+
+
+class AfmTelnetHandler(SocketServer.BaseRequestHandler):
+    def setup(self):
+        self._buffer = ''
+
+    def _read_line(self):
+        while not re.search(r'[\r\n]', self._buffer):
+            data = self.request.recv(4096)
+            if not data:
+                return None
+            self._buffer += TELNET_IAC_PATTERN.sub('', data)
+        line, self._buffer = re.split(r'\r\n|\r\x00|[\r\n]', self._buffer, 1)
+        return line.strip()
+
+    def handle(self):
+        self.server.session_opened()
+        try:
+            self.request.sendall('login: ')
+            if self._read_line() is None:
+                return
+            self.request.sendall('\r\nPassword: ')
+            if self._read_line() is None:
+                return
+            self.request.sendall('\r\n' + self.server.simulator.PROMPT)
+            while True:
+                command = self._read_line()
+                if command is None or command == 'exit':
+                    break
+                output = self.server.simulator.execute(command) if command else self.server.simulator.PROMPT
+                self.request.sendall('{0}\r\n{1}'.format(command, output))
+        finally:
+            self.server.session_closed()
+
+
+class ResourceSampler(object):
+    """
+    Resource usage of this process, psutil is used when installed, /proc otherwise
+    """
+
+    def __init__(self, session_count=None):
+        """
+        :param session_count: returns open device sessions
+        """
+        self._session_count = session_count
+        self._process = psutil.Process() if psutil else None
+
+    def _rss_mb(self):
+        if self._process:
+            return self._process.memory_info().rss / 1048576.0
+        try:
+            with open('/proc/self/status') as status_file:
+                return int(re.search(r'VmRSS:\s+(\d+)', status_file.read()).group(1)) / 1024.0
+        except (IOError, AttributeError):
+            return None
+
+    def _fds(self):
+        if self._process:
+            return self._process.num_fds() if hasattr(self._process, 'num_fds') else self._process.num_handles()
+        if os.path.isdir('/proc/self/fd'):
+            return len(os.listdir('/proc/self/fd'))
+        return None
+
+    def sample(self, cycles, errors):
+        """
+        :rtype: dict
+        """
+        gc.collect()
+        return {'time': time.time(), 'cycles': cycles, 'errors': errors, 'rss_mb': self._rss_mb(),
+                'fds': self._fds(), 'threads': threading.active_count(),
+                'sessions': self._session_count() if self._session_count else None,
+                'gc_objects': len(gc.get_objects())}
+
+
+def check_growth(samples, warmup_cycles, limits):
+    """
+    Compare the median of the first quarter of samples taken after warmup with the median of the last quarter
+    :param samples: ResourceSampler samples
+    :param limits: metric name to allowed growth
+    :return: list of (metric, baseline, current, limit, passed)
+    :rtype: list
+    """
+    measured = [sample for sample in samples if sample['cycles'] >= warmup_cycles]
+    window = max(len(measured) // 4, 1)
+    results = []
+    for metric in METRICS:
+        values = [sample[metric] for sample in measured if sample[metric] is not None]
+        if len(values) < 2 or limits.get(metric) is None:
+            continue
+        baseline = sorted(values[:window])[len(values[:window]) // 2]
+        current = sorted(values[-window:])[len(values[-window:]) // 2]
+        results.append((metric, baseline, current, limits[metric], current - baseline <= limits[metric]))
+    return results
+
+
+class SoakRunner(object):
+    """
+    Runs soak cycles, every cycle maps a port pair, reads a port attribute and clears the mapping,
+    every autoload_every cycles logs in and runs autoload
+    """
+
+    def __init__(self, send, address, ports_count, blade_size, autoload_every, logger):
+        """
+        :param send: sends the request xml, returns the response xml
+        """
+        self._send = send
+        self._address = address
+        self._ports_count = ports_count
+        self._blade_size = blade_size
+        self._autoload_every = autoload_every
+        self._logger = logger
+        self._pairs = [(port_id, port_id + 1) for port_id in range(1, ports_count, 2)]
+        self._command_id = 0
+        self.errors = 0
+
+    def _port_address(self, port_id):
+        blade_start = (port_id - 1) // self._blade_size * self._blade_size + 1
+        return '{0}/{1}_{2}/{3}'.format(self._address, blade_start,
+                                        min(blade_start + self._blade_size - 1, self._ports_count), port_id)
+
+    def _execute(self, command_name, parameters):
+        self._command_id += 1
+        success, error = parse_response(self._send(build_request(command_name, str(self._command_id), parameters)))
+        if not success:
+            self.errors += 1
+            self._logger.error('{0} failed: {1}'.format(command_name, error))
+
+    def run_cycle(self, cycle):
+        if cycle % self._autoload_every == 0:
+            self._execute('Login', [('Address', self._address), ('User', 'admin'), ('Password', 'admin')])
+            self._execute('GetResourceDescription', [('Address', self._address)])
+        src_port, dst_port = [self._port_address(port_id) for port_id in self._pairs[cycle % len(self._pairs)]]
+        self._execute('MapBidi', [('MapPort_A', src_port), ('MapPort_B', dst_port)])
+        self._execute('GetAttributeValue', [('Address', src_port), ('Attribute', 'Connection Counter')])
+        self._execute('MapClearTo', [('SrcPort', src_port), ('DstPort', dst_port)])
+
+
+def executor_sender(runtime_config, logger):
+    """
+    Send requests through CommandExecutor in this process, the way ConnectionHandler does
+    """
+    from cloudshell.layer_one.core.command_executor import CommandExecutor
+    from cloudshell.layer_one.core.request.requests_parser import RequestsParser
+    from cloudshell.layer_one.core.response.command_responses_builder import CommandResponsesBuilder
+    from fiberzone_afm.driver_commands import DriverCommands
+
+    command_executor = CommandExecutor(DriverCommands(logger, runtime_config), logger)
+    xml_logger = logging.getLogger('soak_test.xml')
+
+    def send(request):
+        xml_logger.debug(request)
+        response = CommandResponsesBuilder.to_string(CommandResponsesBuilder.build_xml_result(
+            command_executor.execute_commands(RequestsParser.parse_request_commands(request))))
+        xml_logger.debug(response)
+        return response
+
+    return send
+
+
+def listener_sender(port, reconnect_every, timeout):
+    """
+    Send requests to the driver listener, a new connection every reconnect_every requests
+    """
+    state = {'client': None, 'requests': 0}
+
+    def send(request):
+        if not state['client'] or state['requests'] % reconnect_every == 0:
+            if state['client']:
+                state['client'].close()
+            state['client'] = DriverClient('127.0.0.1', port, timeout)
+        state['requests'] += 1
+        return state['client'].request(request)
+
+    return send
+
+
+def print_sample(sample, previous_sample):
+    cycles_rate = (sample['cycles'] - previous_sample['cycles']) / max(sample['time'] - previous_sample['time'], 0.001)
+    print('{0:>9} {1:>9.1f} {2:>7} {3:>9} {4:>5} {5:>8} {6:>9} {7:>11}'.format(
+        sample['cycles'], cycles_rate, sample['errors'],
+        '{:.1f}'.format(sample['rss_mb']) if sample['rss_mb'] is not None else '-',
+        sample['fds'] if sample['fds'] is not None else '-', sample['threads'],
+        sample['sessions'] if sample['sessions'] is not None else '-', sample['gc_objects']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Driver soak test')
+    parser.add_argument('--device', choices=['simulator', 'telnet'], default='simulator', help='stand-in device')
+    parser.add_argument('--listener', action='store_true', help='send commands through the driver listener')
+    parser.add_argument('--listener-port', type=int, default=1124)
+    parser.add_argument('--reconnect-every', type=int, default=100, help='listener requests per connection')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help='runtime configuration override, CLI.SESSION_POOL_SIZE=2')
+    parser.add_argument('--ports-count', type=int, default=180, help='logical ports on the chassis')
+    parser.add_argument('--blade-size', type=int, default=90, help='logical ports per blade')
+    parser.add_argument('--cycles', type=int, default=100000, help='mapping cycles')
+    parser.add_argument('--duration', type=float, default=0, help='stop after seconds, 0 runs all cycles')
+    parser.add_argument('--autoload-every', type=int, default=10, help='cycles between login and autoload')
+    parser.add_argument('--sample-every', type=int, default=1000, help='cycles between samples')
+    parser.add_argument('--warmup', type=int, default=1000, help='cycles before the baseline samples')
+    parser.add_argument('--max-rss-growth', type=float, default=20, help='MB')
+    parser.add_argument('--max-fd-growth', type=int, default=5)
+    parser.add_argument('--max-thread-growth', type=int, default=2)
+    parser.add_argument('--max-session-growth', type=int, default=1)
+    parser.add_argument('--max-gc-objects-growth', type=int, default=50000)
+    parser.add_argument('--timeout', type=float, default=300, help='listener response timeout, seconds')
+    parser.add_argument('--csv', help='save samples to a csv file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logger = logging.getLogger('soak_test.driver')
+
+    from fiberzone_afm.helpers.afm_simulator import AfmSimulator
+
+    overrides = [('MAPPING.CHECK_DELAY', 0), ('CLI.SIMULATOR.CONNECT_DELAY', 0),
+                 ('CLI.SIMULATOR.RESPONSE_TIME', 0), ('CLI.SIMULATOR.PORTS_COUNT', args.ports_count)]
+    address = '192.168.42.240'
+    session_count = None
+    if args.device == 'telnet':
+        telnet_server = AfmTelnetServer(AfmSimulator(ports_count=args.ports_count, blade_size=args.blade_size))
+        telnet_server.start()
+        overrides += [('CLI.SIMULATOR.ENABLED', False), ('CLI.TYPE', ['TELNET']),
+                      ('CLI.PORTS.TELNET', telnet_server.port)]
+        address = '127.0.0.1'
+        session_count = lambda: telnet_server.open_sessions
+    else:
+        overrides += [('CLI.SIMULATOR.ENABLED', True)]
+    overrides += parse_overrides(args.set)
+
+    if args.listener:
+        start_driver(args.listener_port, overrides)
+        send = listener_sender(args.listener_port, args.reconnect_every, args.timeout)
+    else:
+        send = executor_sender(load_runtime_config(overrides), logger)
+
+    runner = SoakRunner(send, address, args.ports_count, args.blade_size, args.autoload_every, logger)
+    sampler = ResourceSampler(session_count)
+    samples = []
+    start_time = time.time()
+    print('{0:>9} {1:>9} {2:>7} {3:>9} {4:>5} {5:>8} {6:>9} {7:>11}'.format(
+        'cycles', 'cycles/s', 'errors', 'rss, MB', 'fds', 'threads', 'sessions', 'gc objects'))
+    cycle = 0
+    while cycle < args.cycles and not (args.duration and time.time() - start_time > args.duration):
+        runner.run_cycle(cycle)
+        cycle += 1
+        if cycle % args.sample_every == 0:
+            samples.append(sampler.sample(cycle, runner.errors))
+            print_sample(samples[-1], samples[-2] if len(samples) > 1 else {'cycles': 0, 'time': start_time})
+
+    if args.csv:
+        with open(args.csv, 'wb') as csv_file:
+            writer = csv.DictWriter(csv_file, ['time', 'cycles', 'errors'] + METRICS)
+            writer.writeheader()
+            writer.writerows(samples)
+
+    limits = {'rss_mb': args.max_rss_growth, 'fds': args.max_fd_growth, 'threads': args.max_thread_growth,
+              'sessions': args.max_session_growth, 'gc_objects': args.max_gc_objects_growth}
+    results = check_growth(samples, args.warmup, limits)
+    print('{0} cycles in {1:.0f}s, {2} errors'.format(cycle, time.time() - start_time, runner.errors))
+    for metric, baseline, current, limit, passed in results:
+        print('{0:<11} baseline {1:>10.1f} current {2:>10.1f} growth {3:>9.1f} limit {4:>9} {5}'.format(
+            metric, baseline, current, current - baseline, limit, 'OK' if passed else 'FAILED'))
+    if not results:
+        print('Not enough samples after warmup to check growth')
+    return 1 if runner.errors or not all(result[-1] for result in results) else 0
+
+
+if __name__ == '__main__':
+    exit(main())